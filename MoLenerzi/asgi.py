@@ -14,3 +14,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "MoLenerzi.settings")
 
 application = get_asgi_application()
+
+from django.conf import settings
+
+if settings.OCR_WARMUP:
+    from core.ocr import warm_up
+
+    warm_up()
@@ -37,6 +37,91 @@ TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_FROM_NUMBER = os.getenv("TWILIO_FROM_NUMBER")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# Point at an OpenAI-compatible server instead of api.openai.com, e.g. for load tests
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "")
+
+# OCR engine pool (see core/ocr.py)
+OCR_LANGUAGES = ["en"]
+OCR_USE_GPU = os.getenv("OCR_USE_GPU", "False") == "True"
+OCR_POOL_SIZE = int(os.getenv("OCR_POOL_SIZE", "1"))
+# Torch threads per reader; 0 splits the CPU cores evenly across the pool
+OCR_TORCH_THREADS = int(os.getenv("OCR_TORCH_THREADS", "0"))
+OCR_ACQUIRE_TIMEOUT = float(os.getenv("OCR_ACQUIRE_TIMEOUT", "120"))
+# fp32, int8 (EasyOCR's CPU default) or torchscript (int8 plus a frozen detector);
+# compare them with manage.py benchmark_ocr_modes before switching
+OCR_INFERENCE_MODE = os.getenv("OCR_INFERENCE_MODE", "int8")
+# Recognizer batch size and upload limit for the multi-image endpoints
+OCR_BATCH_SIZE = int(os.getenv("OCR_BATCH_SIZE", "8"))
+OCR_BATCH_MAX_IMAGES = int(os.getenv("OCR_BATCH_MAX_IMAGES", "12"))
+# Load the OCR models when a worker boots instead of on the first upload
+OCR_WARMUP = os.getenv("OCR_WARMUP", "False") == "True"
+# Unix socket of the standalone OCR server (manage.py run_ocr_server); empty runs OCR in-process
+OCR_SERVER_SOCKET = os.getenv("OCR_SERVER_SOCKET", "")
+OCR_SERVER_TIMEOUT = float(os.getenv("OCR_SERVER_TIMEOUT", "180"))
+
+# PDF bills and payslips (see core/pdf.py)
+OCR_PDF_WORKERS = int(os.getenv("OCR_PDF_WORKERS", "2"))
+OCR_PDF_DPI = int(os.getenv("OCR_PDF_DPI", "200"))
+OCR_PDF_MAX_PAGES = int(os.getenv("OCR_PDF_MAX_PAGES", "20"))
+# Pages with less text than this in their text layer are treated as scans
+OCR_PDF_MIN_TEXT_CHARS = int(os.getenv("OCR_PDF_MIN_TEXT_CHARS", "20"))
+
+# Image preparation before OCR (see core/preprocess.py)
+_ocr_stages = os.getenv("OCR_PREPROCESS_STAGES", "resize,grayscale,crop,deskew,contrast").split(",")
+OCR_PREPROCESS = {
+    "resize": "resize" in _ocr_stages,
+    "max_dimension": int(os.getenv("OCR_MAX_DIMENSION", "1600")),
+    "grayscale": "grayscale" in _ocr_stages,
+    "crop": "crop" in _ocr_stages,
+    "deskew": "deskew" in _ocr_stages,
+    "contrast": "contrast" in _ocr_stages,
+}
+
+# Quality gate run before OCR (see core/quality.py)
+OCR_QUALITY = {
+    "enabled": os.getenv("OCR_QUALITY_ENABLED", "True") == "True",
+    # Reject failing uploads; when False they are only logged and counted
+    "reject": os.getenv("OCR_QUALITY_REJECT", "True") == "True",
+    "min_side": int(os.getenv("OCR_QUALITY_MIN_SIDE", "400")),
+    "min_sharpness": float(os.getenv("OCR_QUALITY_MIN_SHARPNESS", "40")),
+    "min_brightness": float(os.getenv("OCR_QUALITY_MIN_BRIGHTNESS", "50")),
+    "max_brightness": float(os.getenv("OCR_QUALITY_MAX_BRIGHTNESS", "250")),
+    "max_clipped_fraction": float(os.getenv("OCR_QUALITY_MAX_CLIPPED", "0.6")),
+    # Used to estimate OCR time saved until real OCR timings are available
+    "assumed_ocr_seconds": 8.0,
+}
+
+# OCR result cache keyed by the SHA-256 of the upload (see core/ocr_cache.py)
+OCR_CACHE_ENABLED = os.getenv("OCR_CACHE_ENABLED", "True") == "True"
+OCR_CACHE_MAX_BYTES = int(os.getenv("OCR_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# OpenAI response cache (see core/llm_cache.py)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "True") == "True"
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(20 * 1024 * 1024)))
+
+# OpenAI gateway (see core/llm.py): timeouts in seconds, retries with
+# jittered backoff, and a cap on requests in flight per process
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "30"))
+LLM_POOL_CONNECTIONS = int(os.getenv("LLM_POOL_CONNECTIONS", "20"))
+# Save the token usage of every call (core.models.LLMCall)
+LLM_USAGE_LOG = os.getenv("LLM_USAGE_LOG", "True") == "True"
+
+# Threads that run OCR for the async views under ASGI (see core/aio.py)
+ASYNC_OFFLOAD_THREADS = int(os.getenv("ASYNC_OFFLOAD_THREADS", "4"))
+
+# Identical analysis requests in flight at once share one run (see core/singleflight.py);
+# times in seconds
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "True") == "True"
+SINGLE_FLIGHT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_TIMEOUT", "300"))
+SINGLE_FLIGHT_RESULT_TTL = float(os.getenv("SINGLE_FLIGHT_RESULT_TTL", "10"))
+SINGLE_FLIGHT_POLL_INTERVAL = float(os.getenv("SINGLE_FLIGHT_POLL_INTERVAL", "0.25"))
 
 
 # Application definition
@@ -63,6 +148,7 @@ MIDDLEWARE = [
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
+    "core.middleware.LLMEndpointMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
@@ -89,12 +175,43 @@ WSGI_APPLICATION = "MoLenerzi.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# SQLite by default; DB_ENGINE=postgresql for production, where writes from
+# several workers do not queue on one database file lock
+DB_ENGINE = os.getenv("DB_ENGINE", "sqlite")
+
+if DB_ENGINE == "postgresql":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.getenv("DB_NAME", "molenerzi"),
+            "USER": os.getenv("DB_USER", "molenerzi"),
+            "PASSWORD": os.getenv("DB_PASSWORD", ""),
+            "HOST": os.getenv("DB_HOST", "localhost"),
+            "PORT": os.getenv("DB_PORT", "5432"),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {},
+        }
+    }
+    if os.getenv("DB_POOL", "True") == "True":
+        # psycopg connection pool per worker process; Django takes a
+        # connection from it per request and returns it afterwards
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        }
+    else:
+        # Persistent connections, kept open for this many seconds between requests
+        DATABASES["default"]["CONN_MAX_AGE"] = int(os.getenv("DB_CONN_MAX_AGE", "60"))
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.getenv("SQLITE_PATH") or BASE_DIR / "db.sqlite3",
+            # Seconds a write waits for the database lock before "database is locked"
+            "OPTIONS": {"timeout": float(os.getenv("SQLITE_TIMEOUT", "20"))},
+        }
     }
-}
 
 
 # Password validation
@@ -148,6 +265,11 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 
 
+# Keep phone-camera uploads in memory so OCR can decode them without a
+# temporary file (Django spools anything above 2.5 MB to disk by default)
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv("FILE_UPLOAD_MAX_MEMORY_SIZE", str(15 * 1024 * 1024)))
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
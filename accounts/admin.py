@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import UserStats
 
-# Register your models here.
+
+@admin.register(UserStats)
+class UserStatsAdmin(admin.ModelAdmin):
+    list_display = ('user', 'audit_count', 'total_kwh', 'total_spend', 'loan_applications', 'loans_approved', 'updated_at')
+    search_fields = ('user__username',)
+    readonly_fields = ('audit_count', 'total_kwh', 'total_spend', 'loan_applications', 'loans_approved', 'updated_at')
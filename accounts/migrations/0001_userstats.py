@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('audit_count', models.IntegerField(default=0)),
+                ('total_kwh', models.DecimalField(decimal_places=2, default=0, help_text='kWh over all audited bills', max_digits=14)),
+                ('total_spend', models.DecimalField(decimal_places=2, default=0, help_text='MUR over all audited bills', max_digits=14)),
+                ('loan_applications', models.IntegerField(default=0)),
+                ('loans_approved', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'User stats',
+                'verbose_name_plural': 'User stats',
+            },
+        ),
+    ]
@@ -1,3 +1,27 @@
+from django.contrib.auth.models import User
 from django.db import models
 
-# Create your models here.
+
+class UserStats(models.Model):
+    """
+    Lifetime totals behind the green audit and green loan dashboards.
+
+    Kept up to date by the signal handlers in accounts/signals.py, one row
+    per user, so a dashboard reads them with a single primary key lookup.
+    ``manage.py rebuild_user_stats`` recomputes them from the audits and loans.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    audit_count = models.IntegerField(default=0)
+    total_kwh = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="kWh over all audited bills")
+    total_spend = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="MUR over all audited bills")
+    loan_applications = models.IntegerField(default=0)
+    loans_approved = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'User stats'
+        verbose_name_plural = 'User stats'
+
+    def __str__(self):
+        return f"Stats for {self.user.username}"
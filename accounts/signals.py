@@ -0,0 +1,49 @@
+"""Keep ``UserStats`` in step with saved and deleted audits and loan applications (see accounts/stats.py)"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from green_audit.models import GreenAudit
+from green_loan.models import GreenLoan
+
+from . import stats
+
+# Model: (fields its share depends on, function computing the share)
+TRACKED = {
+    GreenAudit: (['user_id', 'kwh_consumption', 'total_amount'], stats.audit_share),
+    GreenLoan: (['user_id', 'loan_available'], stats.loan_share),
+}
+
+
+def _values(instance, fields):
+    return {field: getattr(instance, field) for field in fields}
+
+
+@receiver(pre_save, sender=GreenAudit)
+@receiver(pre_save, sender=GreenLoan)
+def remember_previous(sender, instance, raw=False, **kwargs):
+    """Keep the stored values of a record about to be updated, so its old share can be removed"""
+    fields, _ = TRACKED[sender]
+    instance._stats_previous = None
+    if instance.pk is not None and not instance._state.adding:
+        instance._stats_previous = sender.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+@receiver(post_save, sender=GreenAudit)
+@receiver(post_save, sender=GreenLoan)
+def count_saved(sender, instance, created, **kwargs):
+    fields, share = TRACKED[sender]
+    current = _values(instance, fields)
+    previous = getattr(instance, '_stats_previous', None)
+    if previous == current:
+        return
+    if previous is not None:
+        stats.apply(previous['user_id'], share(previous), sign=-1, create=False)
+    stats.apply(current['user_id'], share(current))
+
+
+@receiver(post_delete, sender=GreenAudit)
+@receiver(post_delete, sender=GreenLoan)
+def count_deleted(sender, instance, **kwargs):
+    fields, share = TRACKED[sender]
+    # No row is created here: the user may be the one being deleted
+    stats.apply(instance.user_id, share(_values(instance, fields)), sign=-1, create=False)
@@ -0,0 +1,86 @@
+"""
+Maintenance of the per-user dashboard totals in ``UserStats``.
+
+Every saved or deleted audit and loan adds its share to, or takes it from,
+the owner's row with ``F()`` updates, so the totals never need a scan of
+the history. A user without a row yet gets one computed from their audits
+and loans. ``QuerySet.update()``, ``bulk_create()`` and raw SQL bypass
+the signals; ``manage.py rebuild_user_stats`` puts the totals right.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import UserStats
+
+FIELDS = ['audit_count', 'total_kwh', 'total_spend', 'loan_applications', 'loans_approved']
+
+
+def audit_share(values):
+    """One audit's share of the totals, from its ``kwh_consumption`` and ``total_amount``"""
+    return {
+        'audit_count': 1,
+        'total_kwh': Decimal(str(values['kwh_consumption'] or 0)),
+        'total_spend': Decimal(str(values['total_amount'] or 0)),
+    }
+
+
+def loan_share(values):
+    """One loan application's share of the totals, from its ``loan_available``"""
+    return {'loan_applications': 1, 'loans_approved': int(bool(values['loan_available']))}
+
+
+def get_stats(user):
+    """The user's totals; an unsaved zero row for anonymous users"""
+    if not user.is_authenticated:
+        return UserStats()
+    stats = UserStats.objects.filter(user=user).first()
+    return stats if stats is not None else build(user.pk)
+
+
+def totals(user_ids=None):
+    """Totals computed from the audits and loans, by user id"""
+    from green_audit.models import GreenAudit
+    from green_loan.models import GreenLoan
+
+    audits = GreenAudit.objects.filter(user__isnull=False)
+    loans = GreenLoan.objects.all()
+    if user_ids is not None:
+        audits = audits.filter(user_id__in=user_ids)
+        loans = loans.filter(user_id__in=user_ids)
+
+    rows = {}
+    for row in audits.values('user_id').annotate(
+        audit_count=Count('id'), total_kwh=Sum('kwh_consumption'), total_spend=Sum('total_amount')
+    ).order_by():
+        rows.setdefault(row.pop('user_id'), {}).update(row)
+    for row in loans.values('user_id').annotate(
+        loan_applications=Count('id'), loans_approved=Count('id', filter=Q(loan_available=True))
+    ).order_by():
+        rows.setdefault(row.pop('user_id'), {}).update(row)
+
+    for row in rows.values():
+        for field in FIELDS:
+            if row.get(field) is None:
+                row[field] = 0
+    return rows
+
+
+def build(user_id):
+    """Create or overwrite one user's row from their audits and loans"""
+    values = totals([user_id]).get(user_id, {field: 0 for field in FIELDS})
+    stats, _ = UserStats.objects.update_or_create(user_id=user_id, defaults=values)
+    return stats
+
+
+def apply(user_id, share, sign=1, create=True):
+    """Add (``sign=1``) or remove (``sign=-1``) one record's share of the user's totals"""
+    if user_id is None:
+        return
+    updated = UserStats.objects.filter(user_id=user_id).update(
+        updated_at=timezone.now(), **{field: F(field) + sign * value for field, value in share.items()}
+    )
+    if not updated and create:
+        # The first record seen for this user; the aggregate already includes it
+        build(user_id)
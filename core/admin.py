@@ -1,3 +1,41 @@
 from django.contrib import admin
+from .models import InFlightRequest, LLMCacheEntry, LLMCall, OCRCacheEntry, OCRJob
 
-# Register your models here.
+
+@admin.register(OCRJob)
+class OCRJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'user', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status', 'created_at')
+    search_fields = ('id', 'user__username')
+    readonly_fields = ('id', 'created_at', 'started_at', 'finished_at')
+
+
+@admin.register(OCRCacheEntry)
+class OCRCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ('content_hash', 'variant', 'size_bytes', 'hits', 'created_at', 'last_used_at')
+    search_fields = ('content_hash',)
+    readonly_fields = ('created_at', 'last_used_at')
+
+
+@admin.register(LLMCacheEntry)
+class LLMCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ('key', 'template', 'model', 'size_bytes', 'hits', 'created_at', 'last_used_at')
+    list_filter = ('template', 'model')
+    search_fields = ('key', 'template')
+    readonly_fields = ('key', 'template', 'model', 'size_bytes', 'hits', 'created_at', 'last_used_at')
+
+
+@admin.register(LLMCall)
+class LLMCallAdmin(admin.ModelAdmin):
+    list_display = ('template', 'endpoint', 'model', 'prompt_tokens', 'cached_prompt_tokens', 'completion_tokens',
+                    'from_cache', 'latency_ms', 'created_at')
+    list_filter = ('template', 'endpoint', 'from_cache', 'created_at')
+    readonly_fields = ('template', 'endpoint', 'model', 'prompt_tokens', 'cached_prompt_tokens', 'completion_tokens',
+                       'from_cache', 'latency_ms', 'created_at')
+
+
+@admin.register(InFlightRequest)
+class InFlightRequestAdmin(admin.ModelAdmin):
+    list_display = ('key', 'owner', 'started_at', 'finished_at')
+    search_fields = ('key', 'owner')
+    readonly_fields = ('key', 'owner', 'result', 'started_at', 'finished_at')
@@ -0,0 +1,111 @@
+"""
+Helpers for the async views.
+
+OCR and PDF rendering are CPU-bound and call into blocking libraries, so the
+async views hand them to a bounded thread pool instead of running them on the
+event loop. EasyOCR and pdfium release the GIL while they work, and the
+readers stay in this process, so threads are enough; a process pool would
+load the models again in every child.
+
+Each pipeline (OCR, analysis, OpenAI, saving) is written once, as async
+code. ``run_sync`` and ``iterate_sync`` run it from the job worker and from
+streamed responses under WSGI.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import ThreadSensitiveContext, async_to_sync, sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+from . import llm
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.ASYNC_OFFLOAD_THREADS,
+                    thread_name_prefix='offload',
+                )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    try:
+        return func(*args, **kwargs)
+    finally:
+        # The pool threads outlive requests; release their connections like a request would
+        close_old_connections()
+
+
+async def offload(func, *args, **kwargs):
+    """Run a blocking call (OCR, PDF rendering) in the offload pool and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), _run, func, args, kwargs)
+
+
+def run_sync(func, *args, **kwargs):
+    """
+    Run an async pipeline from sync code on an event loop of its own.
+
+    Its ORM calls run on the calling thread, and its OpenAI calls go through
+    the shared sync client rather than a client for this one loop.
+    """
+    token = llm.loop_per_request.set(True)
+    try:
+        return async_to_sync(func)(*args, **kwargs)
+    finally:
+        llm.loop_per_request.reset(token)
+
+
+def iterate_sync(agen):
+    """
+    Plain generator over the async generator ``agen``, for a WSGI response.
+
+    ``agen`` keeps one event loop for its whole life, and the calling thread
+    runs that loop until each next item is ready, so nothing runs while the
+    item is being sent. Its ORM calls share one thread of their own, whose
+    connections are closed at the end; its OpenAI calls go through the
+    shared sync client.
+    """
+    loop = asyncio.new_event_loop()
+    items = asyncio.Queue(maxsize=1)
+    end = object()
+
+    async def pump():
+        llm.loop_per_request.set(True)
+        try:
+            async with ThreadSensitiveContext():
+                try:
+                    async for item in agen:
+                        await items.put((item, None))
+                finally:
+                    await agen.aclose()
+                    await sync_to_async(connections.close_all)()
+        except Exception as error:
+            await items.put((end, error))
+        else:
+            await items.put((end, None))
+
+    task = loop.create_task(pump())
+    try:
+        while True:
+            item, error = loop.run_until_complete(items.get())
+            if error is not None:
+                raise error
+            if item is end:
+                return
+            yield item
+    finally:
+        # The client went away, or the stream ended: stop the pipeline where it is
+        task.cancel()
+        loop.run_until_complete(asyncio.gather(task, return_exceptions=True))
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
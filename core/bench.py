@@ -0,0 +1,262 @@
+"""
+Seeding helpers for the benchmark commands.
+
+Rows are written with plain multi-row INSERTs, so seeded ``created_at``
+values are kept and no signals fire, and belong to throwaway ``bench_*``
+users so that ``delete_bench_rows`` can remove them again. The bench users
+carry ``BENCH_EMAIL``; the helpers refuse to run while a ``bench_*`` user
+without it exists, so a real account is never mistaken for one.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from green_audit import calculator as bill_calculator
+from green_audit.models import GreenAudit, GreenAuditPayload
+from green_loan import calculator as loan_calculator
+from green_loan.models import GreenLoan, GreenLoanPayload
+
+BENCH_PREFIX = 'bench_'
+BENCH_EMAIL = 'bench-user@benchmark.invalid'
+
+OCR_BILL = '''CENTRAL ELECTRICITY BOARD
+Royal Road, Curepipe, Mauritius   Tel: 602 3000
+ELECTRICITY BILL   Bill No: {bill_number}   Account No: {account_number}
+Customer: {name}   Address: {address}
+Tariff: 110A Domestic   Meter No: M{meter:07d}
+Billing Period: {start:%d/%m/%Y} to {end:%d/%m/%Y}   Days: 30
+Previous Reading: {previous}   Current Reading: {current}
+Units Consumed (kWh): {kwh}
+Energy Charge: Rs {energy}   Fixed Charge: Rs 51.00   Meter Rent: Rs 0.00
+Amount Due: Rs {amount}   Due Date: {due:%d/%m/%Y}
+Pay at any CEB cashier, MCB Juice, SBM, post office or online at ceb.mu.
+Please quote your account number in all correspondence.'''
+
+OCR_PAYSLIP = '''{company} - PAYSLIP {month:%B %Y}
+Employee Name: {name}   Employee ID: E{employee:05d}
+Designation: {designation}   Department: Finance
+Basic Salary: MUR {salary:,}   Travelling Allowance: MUR 1,500
+Gross Salary: MUR {gross:,}
+NPF / CSG: MUR {csg:,}   PAYE: MUR {paye:,}   NSF: MUR {nsf:,}
+Net Pay: MUR {net:,}   Bank: MCB  Account: 000{employee:09d}'''
+
+NAMES = ['Jane Doe', 'Ravi Ramful', 'Marie Laval', 'Ahmad Joomun', 'Li Wen Chan', 'Priya Seetohul']
+TOWNS = ['Curepipe', 'Quatre Bornes', 'Rose Hill', 'Port Louis', 'Vacoas', 'Mahebourg']
+COMPANIES = ['ACME Ltd', 'Island Foods Ltd', 'Ocean Bank', 'Port Louis Logistics', 'Sun Resorts']
+DESIGNATIONS = ['Accountant', 'Software Engineer', 'Sales Officer', 'Nurse', 'Teacher', 'Technician']
+
+
+def insert_rows(model, rows):
+    """Plain INSERT of ``rows`` (dicts of attribute names); missing fields get their defaults"""
+    fields = [field for field in model._meta.concrete_fields
+              if not (field.primary_key and field.auto_created and field.attname not in rows[0])]
+    qn = connection.ops.quote_name
+    sql = (f'INSERT INTO {qn(model._meta.db_table)} ({", ".join(qn(field.column) for field in fields)}) '
+           f'VALUES ({", ".join(["%s"] * len(fields))})')
+    params = [
+        [field.get_db_prep_save(row[field.attname] if field.attname in row else field.get_default(), connection)
+         for field in fields]
+        for row in rows
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def check_bench_users():
+    """Refuse to go on if a ``bench_*`` username belongs to an account the benchmarks did not create"""
+    foreign = User.objects.filter(username__startswith=BENCH_PREFIX).exclude(email=BENCH_EMAIL)
+    names = list(foreign.values_list('username', flat=True)[:5])
+    if names:
+        raise CommandError(f"Users {', '.join(names)} look like bench users but were not created by a benchmark; "
+                           f"rename them or run the benchmark against another database")
+
+
+def create_users(count):
+    check_bench_users()
+    User.objects.bulk_create([User(username=f'{BENCH_PREFIX}{i}', email=BENCH_EMAIL, password='!')
+                              for i in range(count)], batch_size=1000)
+    return bench_user_ids()
+
+
+def bench_user_ids():
+    return list(User.objects.filter(username__startswith=BENCH_PREFIX, email=BENCH_EMAIL)
+                .values_list('pk', flat=True))
+
+
+def delete_bench_rows():
+    """Delete the bench users with their audits, loans and payloads"""
+    check_bench_users()
+    user_ids = bench_user_ids()
+    qn = connection.ops.quote_name
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Chunked to stay under SQLite's limit on query parameters
+        for start in range(0, len(user_ids), 500):
+            chunk = user_ids[start:start + 500]
+            users = ', '.join(['%s'] * len(chunk))
+            for payload, fk, model in ((GreenAuditPayload, 'audit_id', GreenAudit),
+                                       (GreenLoanPayload, 'loan_id', GreenLoan)):
+                table = qn(model._meta.db_table)
+                cursor.execute(f'DELETE FROM {qn(payload._meta.db_table)} WHERE {qn(fk)} IN '
+                               f'(SELECT id FROM {table} WHERE user_id IN ({users}))', chunk)
+                cursor.execute(f'DELETE FROM {table} WHERE user_id IN ({users})', chunk)
+        User.objects.filter(pk__in=user_ids).delete()
+
+
+def table_bytes(model):
+    """On-disk size of a model's table and its indexes, where the backend reports it"""
+    table = model if isinstance(model, str) else model._meta.db_table
+    with connection.cursor() as cursor:
+        try:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT pg_total_relation_size(%s)', [table])
+            elif connection.vendor == 'sqlite':
+                cursor.execute('SELECT SUM(pgsize) FROM dbstat WHERE name = %s', [table])
+            else:
+                return None
+        except Exception:
+            # SQLite built without the dbstat table
+            return None
+        return cursor.fetchone()[0]
+
+
+def random_created(rng, now, years=3):
+    return now - timedelta(seconds=rng.randrange(years * 365 * 24 * 3600))
+
+
+def sample_audit(rng, n, now):
+    """(GreenAudit row, payload row) for a bill with OCR text and a rendered report, like the upload path saves"""
+    kwh = rng.randrange(80, 900)
+    bill_data = {'kwh_consumption': Decimal(kwh)}
+    results = bill_calculator.calculate(bill_data)
+    amount = Decimal(str(results['amount'])).quantize(Decimal('0.01'))
+    created = random_created(rng, now)
+    previous = rng.randrange(10000, 90000)
+    row = {
+        'bill_number': f'B{n:010d}',
+        'account_number': f'ACC{n % 400000:08d}',
+        'billing_period': f'{created:%b %Y}',
+        'kwh_consumption': Decimal(kwh),
+        'total_amount': amount,
+        'previous_reading': Decimal(previous),
+        'current_reading': Decimal(previous + kwh),
+        'created_at': created,
+        'updated_at': created,
+    }
+    text = OCR_BILL.format(
+        bill_number=row['bill_number'], account_number=row['account_number'], name=rng.choice(NAMES),
+        address=f'{rng.randrange(1, 200)} Royal Road, {rng.choice(TOWNS)}', meter=rng.randrange(10 ** 7),
+        start=created - timedelta(days=30), end=created, previous=previous, current=previous + kwh, kwh=kwh,
+        energy=amount - 51, amount=amount, due=created + timedelta(days=21),
+    )
+    narrative = (f"At {kwh} kWh this household is {results['status'].lower()} compared with the "
+                 f"{results['average_household_kwh']} kWh average. A {results['solar']['system_kw']:g} kW solar "
+                 f"system would save about MUR {results['solar']['monthly_savings']:,.0f} a month.")
+    payload = {
+        'audit_text': text,
+        'analysis_result': render_to_string('green_audit/bill_report.html', {'r': results, 'narrative': narrative}),
+    }
+    return row, payload
+
+
+def sample_loan(rng, n, now):
+    """(GreenLoan row, payload row) for a payslip with OCR text and the loan summary"""
+    salary = rng.randrange(12, 120) * 1000
+    extracted = {'monthly_salary': str(salary)}
+    loan = loan_calculator.calculate(extracted)
+    created = random_created(rng, now)
+    gross = salary + 1500
+    csg, paye, nsf = round(gross * 0.03), round(max(0, gross - 30000) * 0.1), round(gross * 0.01)
+    row = {
+        'employee_name': rng.choice(NAMES),
+        'employee_id': f'E{n % 100000:05d}',
+        'monthly_salary': Decimal(salary),
+        'company_name': rng.choice(COMPANIES),
+        'designation': rng.choice(DESIGNATIONS),
+        'loan_available': loan['loan_available'],
+        'loan_type': loan['loan_type'],
+        'interest_rate': Decimal(str(loan['interest_rate'])) if loan['interest_rate'] else None,
+        'max_loan_amount': Decimal(loan['max_loan_amount']) if loan['max_loan_amount'] else None,
+        'loan_term_months': loan['loan_term_years'] * 12 if loan['loan_term_years'] else None,
+        'created_at': created,
+        'updated_at': created,
+    }
+    text = OCR_PAYSLIP.format(
+        company=row['company_name'], month=created, name=row['employee_name'], employee=n % 100000,
+        designation=row['designation'], salary=salary, gross=gross, csg=csg, paye=paye, nsf=nsf,
+        net=gross - csg - paye - nsf,
+    )
+    payload = {'payslip_text': text, 'loan_suggestion': loan['detailed_analysis'] + ' ' + loan['eco_impact']}
+    return row, payload
+
+
+def narrow_audit(rng, n, now):
+    """GreenAudit row with the indexed and summary fields only, for query plan benchmarks"""
+    created = random_created(rng, now)
+    kwh = Decimal(rng.randrange(8000, 90000)) / 100
+    return {
+        'bill_number': f'B{n:010d}',
+        'account_number': f'ACC{n % 400000:08d}',
+        'kwh_consumption': kwh,
+        'total_amount': (kwh * Decimal('5.5')).quantize(Decimal('0.01')),
+        'created_at': created,
+        'updated_at': created,
+    }
+
+
+def narrow_loan(rng, n, now):
+    created = random_created(rng, now)
+    return {
+        'monthly_salary': Decimal(rng.randrange(12000, 120000)),
+        'loan_available': rng.random() < 0.6,
+        'loan_type': 'Solar Panel Installation Loan',
+        'created_at': created,
+        'updated_at': created,
+    }
+
+
+def seed(rows, users, batch_size=1000, payloads=True, progress=None):
+    """
+    Seed ``rows`` audits and ``rows`` loan applications spread over ``users``
+    bench users, with realistic payloads unless ``payloads`` is False.
+    Returns the bench user ids.
+    """
+    rng = random.Random(42)
+    now = timezone.now()
+    user_ids = create_users(users)
+    audit_pk = (GreenAudit.objects.order_by('-pk').values_list('pk', flat=True).first() or 0) + 1
+    loan_pk = (GreenLoan.objects.order_by('-pk').values_list('pk', flat=True).first() or 0) + 1
+    for start in range(0, rows, batch_size):
+        audits, audit_payloads, loans, loan_payloads = [], [], [], []
+        for n in range(start, min(rows, start + batch_size)):
+            if payloads:
+                audit, audit_payload = sample_audit(rng, n, now)
+                loan, loan_payload = sample_loan(rng, n, now)
+                audit_payloads.append({'audit_id': audit_pk, **audit_payload})
+                loan_payloads.append({'loan_id': loan_pk, **loan_payload})
+            else:
+                audit, loan = narrow_audit(rng, n, now), narrow_loan(rng, n, now)
+            audits.append({'id': audit_pk, 'user_id': rng.choice(user_ids), **audit})
+            loans.append({'id': loan_pk, 'user_id': rng.choice(user_ids), **loan})
+            audit_pk += 1
+            loan_pk += 1
+        with transaction.atomic():
+            insert_rows(GreenAudit, audits)
+            insert_rows(GreenLoan, loans)
+            if payloads:
+                insert_rows(GreenAuditPayload, audit_payloads)
+                insert_rows(GreenLoanPayload, loan_payloads)
+        if progress:
+            progress(min(rows, start + batch_size))
+
+    # Ids were given explicitly, so move the sequences past them (PostgreSQL)
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [GreenAudit, GreenLoan]):
+            cursor.execute(sql)
+    return user_ids
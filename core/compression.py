@@ -0,0 +1,161 @@
+"""
+Compressed storage for the long text of the payload tables.
+
+Bill reports, OCR text and loan suggestions repeat the same markup and
+wording from row to row but are too short for zlib to find much of it within
+a single value. Each ``CompressedTextField`` therefore names a shared preset
+dictionary, trained on existing values with ``train_compression_dictionaries``
+and shipped in ``core/dictionaries`` as ``<name>.<version>.zdict``.
+
+Values are stored as plain zlib streams compressed with the newest version of
+the field's dictionary. A stream made with a dictionary carries that
+dictionary's Adler-32 in its header, so older values still decompress after
+a new version is trained; dictionary files must never be changed or deleted
+once rows use them. The field reads and writes ``str`` like a ``TextField``,
+but the database only sees bytes: it cannot be searched or filtered on its
+contents.
+"""
+import re
+import struct
+import zlib
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+
+from django import forms
+from django.db import models
+
+DICTIONARY_DIR = Path(__file__).resolve().parent / 'dictionaries'
+# zlib only looks back 32 KB, so a longer dictionary is never used
+DICTIONARY_SIZE = 32 * 1024
+LEVEL = 9
+
+_NUMBER = re.compile(r'\d[\d,.]*')
+
+
+@lru_cache(maxsize=None)
+def _dictionaries():
+    """{name: [(version, data), ...]} oldest first, and {adler32: data}"""
+    by_name, by_id = {}, {}
+    for path in DICTIONARY_DIR.glob('*.zdict'):
+        name, version = path.stem.rsplit('.', 1)
+        data = path.read_bytes()
+        by_name.setdefault(name, []).append((int(version), data))
+        by_id[zlib.adler32(data)] = data
+    for versions in by_name.values():
+        versions.sort()
+    return by_name, by_id
+
+
+def latest_dictionary(name):
+    """(version, data) of the newest dictionary called ``name``, or (0, b'') if none is trained yet"""
+    versions = _dictionaries()[0].get(name)
+    return versions[-1] if versions else (0, b'')
+
+
+def save_dictionary(name, data):
+    """Store ``data`` as the next version of dictionary ``name``; returns its path"""
+    version = latest_dictionary(name)[0] + 1
+    DICTIONARY_DIR.mkdir(exist_ok=True)
+    path = DICTIONARY_DIR / f'{name}.{version}.zdict'
+    path.write_bytes(data)
+    _dictionaries.cache_clear()
+    return path
+
+
+def compress(text, dictionary=b''):
+    if not text:
+        return b''
+    compressor = zlib.compressobj(LEVEL, zdict=dictionary) if dictionary else zlib.compressobj(LEVEL)
+    return compressor.compress(text.encode()) + compressor.flush()
+
+
+def decompress(data):
+    data = bytes(data)
+    if not data:
+        return ''
+    # FDICT flag: the Adler-32 of the preset dictionary follows the two header bytes
+    if data[1] & 0x20:
+        dictionary_id, = struct.unpack('>I', data[2:6])
+        dictionary = _dictionaries()[1].get(dictionary_id)
+        if dictionary is None:
+            # Rows may have been recompressed with a dictionary added since this process loaded them
+            _dictionaries.cache_clear()
+            dictionary = _dictionaries()[1].get(dictionary_id)
+        if dictionary is None:
+            raise ValueError(f'No compression dictionary with id {dictionary_id:08x} in {DICTIONARY_DIR}')
+        decompressor = zlib.decompressobj(zdict=dictionary)
+    else:
+        decompressor = zlib.decompressobj()
+    return (decompressor.decompress(data) + decompressor.flush()).decode()
+
+
+def _segments(text):
+    """The fixed parts of ``text``: each line split at the numbers in it"""
+    for line in text.splitlines(keepends=True):
+        for segment in _NUMBER.split(line):
+            if len(segment) > 3:
+                yield segment
+
+
+def train_dictionary(samples, size=DICTIONARY_SIZE):
+    """
+    Build a preset dictionary from sample values: the segments that recur
+    across at least 1% of the samples, best (frequency × length) first until
+    ``size`` bytes are used. The best segments go at the end, where zlib
+    reaches them with the shortest distances.
+    """
+    counts = Counter()
+    for sample in samples:
+        counts.update(set(_segments(sample)))
+    threshold = max(2, len(samples) // 100)
+    common = sorted((segment for segment, count in counts.items() if count >= threshold),
+                    key=lambda segment: counts[segment] * len(segment), reverse=True)
+    chosen, used = [], 0
+    for segment in common:
+        data = segment.encode()
+        if used + len(data) <= size:
+            chosen.append(data)
+            used += len(data)
+    return b''.join(reversed(chosen))
+
+
+class CompressedTextField(models.BinaryField):
+    """Text stored zlib-compressed with the shared dictionary ``dictionary``"""
+    empty_values = [None, '', b'']
+
+    def __init__(self, *args, dictionary, **kwargs):
+        self.dictionary = dictionary
+        kwargs.setdefault('editable', True)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['dictionary'] = self.dictionary
+        kwargs.pop('editable', None)
+        if not self.editable:
+            kwargs['editable'] = False
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else decompress(value)
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, memoryview)):
+            return decompress(value)
+        return value
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if isinstance(value, str):
+            value = compress(value, latest_dictionary(self.dictionary)[1])
+        return super().get_db_prep_value(value, connection, prepared)
+
+    def get_default(self):
+        # BinaryField would turn the empty default into b''
+        return models.Field.get_default(self)
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
+
+    def formfield(self, **kwargs):
+        return super().formfield(**{'widget': forms.Textarea, **kwargs})
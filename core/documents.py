@@ -0,0 +1,11 @@
+"""
+Text extraction for uploaded bills and payslips, whether photos or PDFs.
+"""
+from . import ocr_cache, pdf
+
+
+def extract_text(data):
+    """Return the text of an uploaded image or PDF"""
+    if pdf.is_pdf(data):
+        return pdf.extract_text(data)
+    return ' '.join([text[1] for text in ocr_cache.cached_readtext(data)])
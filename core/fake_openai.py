@@ -0,0 +1,189 @@
+"""
+Local stand-in for the OpenAI chat completions API, for load tests.
+
+Serves ``POST /v1/chat/completions``, plain and streamed, with a configurable
+delay before the first token and a fixed token rate after it. Replies are
+canned: the first rule whose ``match`` text appears in the request messages
+wins, and the built-in rules give each prompt in the project a reply its
+view can parse. Point the project at it with
+``OPENAI_BASE_URL=http://127.0.0.1:<port>/v1`` and any ``OPENAI_API_KEY``.
+"""
+import itertools
+import json
+import logging
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES = [
+    {'match': 'green loan recommendation', 'response': (
+        'You qualify for a green loan sized from your monthly salary at the best available bank rate. '
+        'The amount is enough for the project listed, and the monthly repayment takes only a small share '
+        'of your salary. Getting quotations from certified suppliers early will speed up approval.'
+    )},
+    {'match': 'quotation request email', 'response': (
+        'Hello,\n\nI would like to request a quotation for the materials described below. '
+        'Please let me know your prices, minimum quantities and collection options.\n\n'
+        'Thank you for your time.\n\nKind regards'
+    )},
+    {'match': 'summary of a Mauritius household', 'response': (
+        'This household uses more electricity than the Mauritian average, and most of it is billed '
+        'at the top CEB tier. A rooftop solar system would cover most of the bill and pay for itself '
+        'within a few years after the subsidy. Cheap measures such as LED bulbs and standby cuts are '
+        'worth doing first.'
+    )},
+    {'match': '', 'response': (
+        '## Energy Usage Assessment\n\nConsumption is above the household average.\n\n'
+        '## Recommendations\n\n1. Replace remaining bulbs with LEDs.\n2. Set the air conditioning to 25°C.\n'
+        '3. Consider a solar water heater.\n\n## Environmental Impact\n\n'
+        'These measures would cut emissions by roughly a fifth.'
+    )},
+]
+
+
+def tokens(text):
+    """Split a reply into token-sized pieces, keeping the whitespace"""
+    return re.findall(r'\S+\s*|\s+', text)
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+    def _json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _chunk(self, data):
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path.rstrip('/').endswith('/models'):
+            self._json(200, {'object': 'list', 'data': [{'id': 'fake', 'object': 'model', 'owned_by': 'local'}]})
+        else:
+            self._json(404, {'error': {'message': 'Not found', 'type': 'invalid_request_error'}})
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._json(404, {'error': {'message': 'Not found', 'type': 'invalid_request_error'}})
+            return
+        try:
+            request = json.loads(body)
+            messages = request['messages']
+        except (ValueError, KeyError):
+            self._json(400, {'error': {'message': 'Invalid request body', 'type': 'invalid_request_error'}})
+            return
+
+        server.count('requests')
+        if server.error_rate and random.random() < server.error_rate:
+            server.count('errors')
+            self._json(503, {'error': {'message': 'Simulated overload', 'type': 'server_error'}})
+            return
+
+        prompt = '\n'.join(str(message.get('content', '')) for message in messages)
+        pieces = tokens(server.reply_for(prompt))
+        if request.get('max_tokens'):
+            pieces = pieces[:request['max_tokens']]
+        usage = {
+            'prompt_tokens': max(1, len(prompt) // 4),
+            'completion_tokens': len(pieces),
+            'total_tokens': max(1, len(prompt) // 4) + len(pieces),
+        }
+        completion_id = f'chatcmpl-fake{next(server.ids)}'
+        created = int(time.time())
+        model = request.get('model', 'fake')
+
+        time.sleep(server.first_token_delay())
+        if not request.get('stream'):
+            time.sleep(len(pieces) / server.tokens_per_second)
+            self._json(200, {
+                'id': completion_id,
+                'object': 'chat.completion',
+                'created': created,
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': ''.join(pieces)},
+                    'finish_reason': 'stop',
+                }],
+                'usage': usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def event(choices, **extra):
+            chunk = {'id': completion_id, 'object': 'chat.completion.chunk', 'created': created,
+                     'model': model, 'choices': choices, **extra}
+            self._chunk(b'data: ' + json.dumps(chunk).encode() + b'\n\n')
+
+        try:
+            for index, piece in enumerate(pieces):
+                delta = {'content': piece}
+                if index == 0:
+                    delta['role'] = 'assistant'
+                event([{'index': 0, 'delta': delta, 'finish_reason': None}])
+                time.sleep(1 / server.tokens_per_second)
+            event([{'index': 0, 'delta': {}, 'finish_reason': 'stop'}])
+            if (request.get('stream_options') or {}).get('include_usage'):
+                event([], usage=usage)
+            self._chunk(b'data: [DONE]\n\n')
+            self._chunk(b'')
+        except OSError:
+            server.count('disconnects')
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address, latency=0.5, jitter=0.2, tokens_per_second=50.0, error_rate=0.0, rules=None):
+        super().__init__(address, FakeOpenAIHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.rules = list(rules or []) + DEFAULT_RULES
+        self.ids = itertools.count(1)
+        self.stats = {'requests': 0, 'errors': 0, 'disconnects': 0}
+        self._stats_lock = threading.Lock()
+
+    def count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def first_token_delay(self):
+        return max(0.0, self.latency * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    def reply_for(self, prompt):
+        lowered = prompt.lower()
+        for rule in self.rules:
+            if rule['match'].lower() in lowered:
+                return rule['response']
+        return ''
+
+
+def load_rules(path):
+    """Read canned replies: a JSON list of {"match": ..., "response": ...}, tried in order"""
+    with open(path) as f:
+        rules = json.load(f)
+    for rule in rules:
+        if not isinstance(rule, dict) or 'match' not in rule or 'response' not in rule:
+            raise ValueError(f'Each rule needs "match" and "response": {rule!r}')
+    return rules
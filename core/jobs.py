@@ -0,0 +1,103 @@
+"""
+DB-backed OCR job queue.
+
+Uploads are stored as ``OCRJob`` rows and picked up by ``manage.py
+run_ocr_worker``. Jobs are claimed with a conditional UPDATE so several
+workers can share the same SQLite database without a broker.
+"""
+import logging
+from datetime import timedelta
+
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import llm
+from .models import OCRJob
+from .quality import ImageQualityError
+
+logger = logging.getLogger(__name__)
+
+# Callables that take an OCRJob and return the JSON result for it
+JOB_HANDLERS = {
+    OCRJob.KIND_BILL: 'green_audit.jobs.process_bill_job',
+    OCRJob.KIND_PAYSLIP: 'green_loan.jobs.process_payslip_job',
+}
+
+
+def submit_job(kind, image_file, user=None):
+    """Queue an uploaded image for OCR and analysis"""
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f'Unknown job kind: {kind}')
+    return OCRJob.objects.create(
+        kind=kind,
+        image=image_file,
+        user=user if user is not None and user.is_authenticated else None,
+    )
+
+
+def claim_next_job():
+    """Atomically move the oldest pending job to running and return it"""
+    candidates = (
+        OCRJob.objects.filter(status=OCRJob.STATUS_PENDING)
+        .order_by('created_at')
+        .values_list('pk', flat=True)[:10]
+    )
+    for pk in candidates:
+        claimed = OCRJob.objects.filter(pk=pk, status=OCRJob.STATUS_PENDING).update(
+            status=OCRJob.STATUS_RUNNING,
+            started_at=timezone.now(),
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return OCRJob.objects.get(pk=pk)
+    return None
+
+
+def run_job(job):
+    """Run the handler for a claimed job and record the outcome"""
+    llm.endpoint.set(f'job:{job.kind}')
+    try:
+        handler = import_string(JOB_HANDLERS[job.kind])
+        job.result = handler(job)
+        job.status = OCRJob.STATUS_DONE
+        job.error = ''
+    except ImageQualityError as e:
+        job.result = {'quality': e.report}
+        job.status = OCRJob.STATUS_FAILED
+        job.error = str(e)
+    except Exception as e:
+        logger.exception('OCR job %s failed', job.pk)
+        job.status = OCRJob.STATUS_FAILED
+        job.error = str(e)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['result', 'status', 'error', 'finished_at'])
+    return job
+
+
+def requeue_stale_jobs(timeout, max_attempts):
+    """Put back jobs whose worker died mid-run, failing those retried too often"""
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    stale = OCRJob.objects.filter(status=OCRJob.STATUS_RUNNING, started_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        status=OCRJob.STATUS_FAILED,
+        error='Worker stopped before the job finished.',
+        finished_at=timezone.now(),
+    )
+    requeued = stale.update(status=OCRJob.STATUS_PENDING, started_at=None)
+    return requeued, failed
+
+
+def job_status(job):
+    """Public JSON view of a job"""
+    data = {
+        'job_id': str(job.pk),
+        'kind': job.kind,
+        'status': job.status,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+    }
+    if job.status == OCRJob.STATUS_FAILED:
+        data['error'] = job.error
+    return data
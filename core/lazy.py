@@ -0,0 +1,33 @@
+"""
+Deferred imports for the heavy OCR stack.
+
+cv2 and numpy together add tens of megabytes and a noticeable pause to every
+process that imports them. Modules that only need them inside functions bind
+a ``LazyModule`` at module level instead, so importing the module (and
+therefore the URLconf) stays cheap until an image is actually processed.
+"""
+import importlib
+import threading
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f'<LazyModule {self._name!r} ({state})>'
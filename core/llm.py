@@ -0,0 +1,530 @@
+"""
+Gateway for every OpenAI call in the project.
+
+The clients are built on first use rather than at import time, so importing
+the views does not load the openai package and does not need an API key.
+All calls share one pooled HTTP connection per process (per event loop for
+``AsyncOpenAI``; under WSGI, where each async view gets an event loop of its
+own, the async calls go through the process-wide sync client instead), time
+out after ``LLM_TIMEOUT``, are retried with jittered
+exponential backoff, and wait for one of ``LLM_MAX_CONCURRENCY`` process-wide
+slots before being sent. Latencies, retries and token counts are recorded in
+core/metrics.py under ``llm.*``, and each call's token usage is saved as an
+``LLMCall`` for ``manage.py llm_token_report``.
+
+``chat`` and ``stream_chat`` answer repeated requests from the response
+cache in core/llm_cache.py. The ``a``-prefixed versions are for async views:
+they use ``AsyncOpenAI`` and the async ORM, so a request waiting on OpenAI
+does not hold a worker thread.
+"""
+import asyncio
+import collections
+import contextvars
+import logging
+import random
+import threading
+import time
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import llm_cache, metrics
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_client_lock = threading.Lock()
+# An AsyncOpenAI connection pool belongs to the event loop it was created on
+_async_clients = weakref.WeakKeyDictionary()
+
+# URL route of the request being served, for the usage records; set by
+# core.middleware.LLMEndpointMiddleware
+endpoint = contextvars.ContextVar('llm_endpoint', default='')
+# Whether the request being served runs on an event loop of its own, as
+# async views do under WSGI; set by core.middleware.LLMEndpointMiddleware
+loop_per_request = contextvars.ContextVar('llm_loop_per_request', default=False)
+
+# Status codes worth another attempt, as in the OpenAI SDK's own retry logic
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMBusyError(RuntimeError):
+    """Every LLM slot stayed in use for longer than ``LLM_QUEUE_TIMEOUT``"""
+
+
+class ConcurrencyLimiter:
+    """
+    Process-wide cap on in-flight OpenAI requests.
+
+    Works like a semaphore shared by worker threads and event loops alike:
+    threads block in ``acquire`` and coroutines wait in ``aacquire`` without
+    holding a thread. A released slot goes to the longest waiter.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiters = collections.deque()
+
+    @property
+    def active(self):
+        return self._active
+
+    def _grant(self, waiter):
+        if isinstance(waiter, threading.Event):
+            waiter.set()
+        else:
+            loop, future = waiter
+            try:
+                loop.call_soon_threadsafe(self._wake, future)
+            except RuntimeError:
+                # The waiter's loop has closed; hand the slot on
+                self.release()
+
+    def _wake(self, future):
+        if future.done():
+            self.release()
+        else:
+            future.set_result(None)
+
+    def acquire(self, timeout=None):
+        with self._lock:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                return
+            event = threading.Event()
+            self._waiters.append(event)
+        if event.wait(timeout):
+            return
+        with self._lock:
+            if event in self._waiters:
+                self._waiters.remove(event)
+                raise LLMBusyError('All LLM slots are busy.')
+
+    async def aacquire(self, timeout=None):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                return
+            future = loop.create_future()
+            waiter = (loop, future)
+            self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            with self._lock:
+                granted = waiter not in self._waiters
+                if not granted:
+                    self._waiters.remove(waiter)
+            if granted:
+                # The slot was handed over as we gave up: pass it on
+                if future.done() and not future.cancelled():
+                    self.release()
+                else:
+                    future.cancel()
+            if isinstance(e, asyncio.TimeoutError):
+                raise LLMBusyError('All LLM slots are busy.') from None
+            raise
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                waiter = self._waiters.popleft()
+            else:
+                self._active -= 1
+                return
+        self._grant(waiter)
+
+
+_limiter = None
+
+
+def get_limiter():
+    global _limiter
+    if _limiter is None:
+        with _client_lock:
+            if _limiter is None:
+                _limiter = ConcurrencyLimiter(settings.LLM_MAX_CONCURRENCY)
+    return _limiter
+
+
+def _http_options():
+    import httpx
+
+    return {
+        'timeout': httpx.Timeout(settings.LLM_TIMEOUT, connect=settings.LLM_CONNECT_TIMEOUT),
+        'limits': httpx.Limits(
+            max_connections=settings.LLM_POOL_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_POOL_CONNECTIONS,
+        ),
+    }
+
+
+def _client_options():
+    options = {'api_key': settings.OPENAI_API_KEY, 'max_retries': 0}
+    if settings.OPENAI_BASE_URL:
+        options['base_url'] = settings.OPENAI_BASE_URL
+    return options
+
+
+def get_client():
+    """Return the process-wide OpenAI client, creating it on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import httpx
+                from openai import OpenAI
+
+                _client = OpenAI(http_client=httpx.Client(**_http_options()), **_client_options())
+    return _client
+
+
+def get_async_client():
+    """Return the AsyncOpenAI client for the running event loop, creating it on first use"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        import httpx
+        from openai import AsyncOpenAI
+
+        client = _async_clients[loop] = AsyncOpenAI(
+            http_client=httpx.AsyncClient(**_http_options()), **_client_options()
+        )
+    return client
+
+
+def _retry_delay(error, attempt):
+    """Seconds to wait before another attempt, or None if the error is final"""
+    import openai
+
+    if isinstance(error, openai.APIStatusError):
+        if error.status_code not in RETRY_STATUSES:
+            return None
+        retry_after = error.response.headers.get('retry-after')
+        if retry_after:
+            try:
+                return min(float(retry_after), settings.LLM_BACKOFF_MAX)
+            except ValueError:
+                pass
+    elif not isinstance(error, openai.APIConnectionError):
+        return None
+    # Full jitter, so workers that failed together do not retry together
+    return random.uniform(0, min(settings.LLM_BACKOFF_MAX, settings.LLM_BACKOFF_BASE * 2 ** attempt))
+
+
+def _metric_name(template):
+    return template.split(':')[0]
+
+
+def _record(template, model, started, usage):
+    """Update the metrics for a finished call and return its unsaved usage record"""
+    from .models import LLMCall
+
+    elapsed = time.perf_counter() - started
+    name = _metric_name(template)
+    metrics.incr('llm.requests')
+    metrics.observe('llm.latency', elapsed)
+    metrics.observe(f'llm.latency.{name}', elapsed)
+    call = LLMCall(template=template, endpoint=endpoint.get(), model=model, latency_ms=round(elapsed * 1000))
+    if usage is not None:
+        details = getattr(usage, 'prompt_tokens_details', None)
+        call.prompt_tokens = usage.prompt_tokens or 0
+        call.completion_tokens = usage.completion_tokens or 0
+        call.cached_prompt_tokens = getattr(details, 'cached_tokens', None) or 0
+        for kind in ('prompt_tokens', 'cached_prompt_tokens', 'completion_tokens'):
+            metrics.incr(f'llm.{kind}', getattr(call, kind))
+            metrics.incr(f'llm.{kind}.{name}', getattr(call, kind))
+    return call
+
+
+def _cache_hit(template, model):
+    from .models import LLMCall
+
+    return LLMCall(template=template, endpoint=endpoint.get(), model=model, from_cache=True)
+
+
+def _save_usage(call):
+    if not settings.LLM_USAGE_LOG:
+        return
+    try:
+        call.save()
+    except Exception:
+        logger.exception('Could not save LLM usage for %s', call.template)
+
+
+async def _asave_usage(call):
+    if not settings.LLM_USAGE_LOG:
+        return
+    try:
+        await call.asave()
+    except Exception:
+        logger.exception('Could not save LLM usage for %s', call.template)
+
+
+def _failed(error, attempt):
+    """Count a failed attempt and return the backoff before the next one, or None to give up"""
+    import openai
+
+    if isinstance(error, openai.APITimeoutError):
+        metrics.incr('llm.timeouts')
+    delay = _retry_delay(error, attempt) if attempt < settings.LLM_MAX_RETRIES else None
+    if delay is None:
+        metrics.incr('llm.errors')
+    else:
+        metrics.incr('llm.retries')
+    return delay
+
+
+def _call_options(params, timeout):
+    if timeout is not None:
+        params = dict(params, timeout=timeout)
+    return params
+
+
+def _create(template, model, messages, timeout, params):
+    """One completion through the limiter, retried on transient errors"""
+    limiter = get_limiter()
+    waited = time.perf_counter()
+    limiter.acquire(settings.LLM_QUEUE_TIMEOUT)
+    metrics.observe('llm.queue_wait', time.perf_counter() - waited)
+    try:
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = get_client().chat.completions.create(
+                    model=model, messages=messages, **_call_options(params, timeout)
+                )
+            except Exception as e:
+                delay = _failed(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+            _save_usage(_record(template, model, started, getattr(response, 'usage', None)))
+            return response.choices[0].message.content
+    finally:
+        limiter.release()
+
+
+async def _acreate(template, model, messages, timeout, params):
+    """Async version of ``_create``"""
+    if loop_per_request.get():
+        # A client built for this loop would never be reused or closed
+        return await sync_to_async(_create)(template, model, messages, timeout, params)
+    limiter = get_limiter()
+    waited = time.perf_counter()
+    await limiter.aacquire(settings.LLM_QUEUE_TIMEOUT)
+    metrics.observe('llm.queue_wait', time.perf_counter() - waited)
+    try:
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = await get_async_client().chat.completions.create(
+                    model=model, messages=messages, **_call_options(params, timeout)
+                )
+            except Exception as e:
+                delay = _failed(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            await _asave_usage(_record(template, model, started, getattr(response, 'usage', None)))
+            return response.choices[0].message.content
+    finally:
+        limiter.release()
+
+
+def _stream(template, model, messages, timeout, params):
+    """
+    Yield the pieces of a streamed completion through the limiter.
+
+    Only opening the stream is retried: once text has been sent on, a
+    failure is raised to the caller.
+    """
+    limiter = get_limiter()
+    waited = time.perf_counter()
+    limiter.acquire(settings.LLM_QUEUE_TIMEOUT)
+    metrics.observe('llm.queue_wait', time.perf_counter() - waited)
+    try:
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                stream = get_client().chat.completions.create(
+                    model=model, messages=messages, stream=True,
+                    stream_options={'include_usage': True}, **_call_options(params, timeout)
+                )
+                break
+            except Exception as e:
+                delay = _failed(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+
+        usage = None
+        first = True
+        try:
+            for chunk in stream:
+                if getattr(chunk, 'usage', None) is not None:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                piece = chunk.choices[0].delta.content
+                if piece:
+                    if first:
+                        metrics.observe('llm.first_token', time.perf_counter() - started)
+                        first = False
+                    yield piece
+        finally:
+            # Hand the connection back to the pool even if the client went away
+            stream.close()
+        _save_usage(_record(template, model, started, usage))
+    finally:
+        limiter.release()
+
+
+async def _astream(template, model, messages, timeout, params):
+    """Async version of ``_stream``"""
+    if loop_per_request.get():
+        # As in _acreate: read the sync stream from the request thread
+        pieces = _stream(template, model, messages, timeout, params)
+        try:
+            while (piece := await sync_to_async(next)(pieces, None)) is not None:
+                yield piece
+        finally:
+            await sync_to_async(pieces.close)()
+        return
+    limiter = get_limiter()
+    waited = time.perf_counter()
+    await limiter.aacquire(settings.LLM_QUEUE_TIMEOUT)
+    metrics.observe('llm.queue_wait', time.perf_counter() - waited)
+    try:
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                stream = await get_async_client().chat.completions.create(
+                    model=model, messages=messages, stream=True,
+                    stream_options={'include_usage': True}, **_call_options(params, timeout)
+                )
+                break
+            except Exception as e:
+                delay = _failed(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+
+        usage = None
+        first = True
+        try:
+            async for chunk in stream:
+                if getattr(chunk, 'usage', None) is not None:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                piece = chunk.choices[0].delta.content
+                if piece:
+                    if first:
+                        metrics.observe('llm.first_token', time.perf_counter() - started)
+                        first = False
+                    yield piece
+        finally:
+            await stream.close()
+        await _asave_usage(_record(template, model, started, usage))
+    finally:
+        limiter.release()
+
+
+def chat(template, model, messages, timeout=None, **params):
+    """
+    Return the reply to a chat completion request, reusing a cached reply.
+
+    ``template`` names the prompt and its version, e.g. ``"bill_analysis:1"``.
+    Bump the version whenever the prompt wording changes so stale replies
+    are not served. ``timeout`` overrides ``LLM_TIMEOUT`` for this call.
+    """
+    key = None
+    if settings.LLM_CACHE_ENABLED:
+        key = llm_cache.request_key(template, model, messages, params)
+        cached = llm_cache.get(key)
+        if cached is not None:
+            _save_usage(_cache_hit(template, model))
+            return cached
+
+    content = _create(template, model, messages, timeout, params)
+    if key is not None and content:
+        llm_cache.put(key, template, model, content)
+    return content
+
+
+def stream_chat(template, model, messages, timeout=None, **params):
+    """
+    Yield the reply to a chat completion request as it is generated.
+
+    Shares the cache with ``chat``: a cached reply is yielded in one piece,
+    and a streamed reply is stored once it has arrived in full.
+    """
+    key = None
+    if settings.LLM_CACHE_ENABLED:
+        key = llm_cache.request_key(template, model, messages, params)
+        cached = llm_cache.get(key)
+        if cached is not None:
+            _save_usage(_cache_hit(template, model))
+            yield cached
+            return
+
+    parts = []
+    for piece in _stream(template, model, messages, timeout, params):
+        parts.append(piece)
+        yield piece
+
+    content = ''.join(parts)
+    if key is not None and content:
+        llm_cache.put(key, template, model, content)
+
+
+async def achat(template, model, messages, timeout=None, **params):
+    """Async version of ``chat``"""
+    key = None
+    if settings.LLM_CACHE_ENABLED:
+        key = llm_cache.request_key(template, model, messages, params)
+        cached = await llm_cache.aget(key)
+        if cached is not None:
+            await _asave_usage(_cache_hit(template, model))
+            return cached
+
+    content = await _acreate(template, model, messages, timeout, params)
+    if key is not None and content:
+        await llm_cache.aput(key, template, model, content)
+    return content
+
+
+async def astream_chat(template, model, messages, timeout=None, **params):
+    """Async version of ``stream_chat``"""
+    key = None
+    if settings.LLM_CACHE_ENABLED:
+        key = llm_cache.request_key(template, model, messages, params)
+        cached = await llm_cache.aget(key)
+        if cached is not None:
+            await _asave_usage(_cache_hit(template, model))
+            yield cached
+            return
+
+    parts = []
+    async for piece in _astream(template, model, messages, timeout, params):
+        parts.append(piece)
+        yield piece
+
+    content = ''.join(parts)
+    if key is not None and content:
+        await llm_cache.aput(key, template, model, content)
@@ -0,0 +1,121 @@
+"""
+Response cache for OpenAI chat completions.
+
+The audit, bill and loan analyses are often requested again with the same
+inputs. Replies are stored against a hash of the model, the prompt template
+version, the whitespace-normalised messages and the sampling parameters.
+Entries expire after ``LLM_CACHE_TTL`` seconds, and the table is bounded by
+``LLM_CACHE_MAX_BYTES`` with least recently used entries evicted first.
+"""
+import hashlib
+import json
+import logging
+import re
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from . import metrics
+from .models import LLMCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+def normalise(text):
+    """Collapse runs of spaces and tabs, and trim each line and the whole text"""
+    lines = (re.sub(r'[ \t]+', ' ', line).strip() for line in text.strip().splitlines())
+    return '\n'.join(lines)
+
+
+def request_key(template, model, messages, params):
+    payload = {
+        'template': template,
+        'model': model,
+        'messages': [{'role': m['role'], 'content': normalise(m['content'])} for m in messages],
+        'params': params,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _fresh():
+    return LLMCacheEntry.objects.filter(created_at__gte=timezone.now() - timedelta(seconds=settings.LLM_CACHE_TTL))
+
+
+def get(key):
+    """Return the cached reply for a request, or None"""
+    entry = _fresh().filter(key=key).only('pk', 'response').first()
+    if entry is None:
+        metrics.incr('llm_cache.misses')
+        return None
+    LLMCacheEntry.objects.filter(pk=entry.pk).update(hits=F('hits') + 1, last_used_at=timezone.now())
+    metrics.incr('llm_cache.hits')
+    return entry.response
+
+
+def put(key, template, model, response):
+    """Store a reply, replacing an expired one, and evict past the size limit"""
+    LLMCacheEntry.objects.filter(key=key).exclude(pk__in=_fresh().values('pk')).delete()
+    try:
+        LLMCacheEntry.objects.create(
+            key=key,
+            template=template,
+            model=model,
+            response=response,
+            size_bytes=len(response.encode()),
+        )
+    except IntegrityError:
+        # Another worker stored the same request first
+        return
+    evict()
+
+
+async def aget(key):
+    """Async version of ``get``"""
+    entry = await _fresh().filter(key=key).only('pk', 'response').afirst()
+    if entry is None:
+        metrics.incr('llm_cache.misses')
+        return None
+    await LLMCacheEntry.objects.filter(pk=entry.pk).aupdate(hits=F('hits') + 1, last_used_at=timezone.now())
+    metrics.incr('llm_cache.hits')
+    return entry.response
+
+
+async def aput(key, template, model, response):
+    """Async version of ``put``"""
+    await LLMCacheEntry.objects.filter(key=key).exclude(pk__in=_fresh().values('pk')).adelete()
+    try:
+        await LLMCacheEntry.objects.acreate(
+            key=key,
+            template=template,
+            model=model,
+            response=response,
+            size_bytes=len(response.encode()),
+        )
+    except IntegrityError:
+        return
+    await sync_to_async(evict)()
+
+
+def evict(max_bytes=None):
+    """Delete expired entries, then least recently used ones until the cache fits in ``max_bytes``"""
+    if max_bytes is None:
+        max_bytes = settings.LLM_CACHE_MAX_BYTES
+    deleted, _ = LLMCacheEntry.objects.exclude(pk__in=_fresh().values('pk')).delete()
+
+    total = LLMCacheEntry.objects.aggregate(total=Sum('size_bytes'))['total'] or 0
+    excess = total - max_bytes
+    if excess > 0:
+        doomed = []
+        for pk, size in LLMCacheEntry.objects.order_by('last_used_at').values_list('pk', 'size_bytes').iterator():
+            doomed.append(pk)
+            excess -= size
+            if excess <= 0:
+                break
+        deleted += LLMCacheEntry.objects.filter(pk__in=doomed).delete()[0]
+    if deleted:
+        logger.info('LLM cache evicted %s entries', deleted)
+    return deleted
@@ -0,0 +1,129 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.db.models.functions import Length
+
+from core import bench, compression
+from core.compression import CompressedTextField
+from green_audit.models import GreenAuditPayload
+from green_loan.models import GreenLoanPayload
+
+
+class Command(BaseCommand):
+    help = ("Seed audits and loan applications and report how much the compressed text fields "
+            "save against plain text, zlib without the shared dictionaries, and a dictionary "
+            "trained on one half of the values and measured on the other")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Audits and loan applications to seed, each')
+        parser.add_argument('--users', type=int, default=200, help='Users the seeded rows are spread over')
+        parser.add_argument('--reuse', action='store_true', help='Use the rows left by an earlier --keep run')
+        parser.add_argument('--stored', action='store_true',
+                            help='Measure all rows already in the database instead of seeding any')
+        parser.add_argument('--keep', action='store_true', help='Leave the seeded rows in place')
+        parser.add_argument('--json', help='Also write the results to this JSON file')
+
+    def _plain_table_bytes(self, model, fields, rows):
+        """On-disk size of the same rows in a scratch table with plain text columns"""
+        qn = connection.ops.quote_name
+        name = f'bench_plain_{model._meta.db_table}'
+        table = qn(name)
+        columns = ', '.join(f'{qn(field.column)} text' for field in fields)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+            cursor.execute(f'CREATE TABLE {table} (id integer PRIMARY KEY, {columns})')
+            try:
+                with transaction.atomic():
+                    cursor.executemany(f'INSERT INTO {table} VALUES ({", ".join(["%s"] * (len(fields) + 1))})', rows)
+                return bench.table_bytes(name)
+            finally:
+                cursor.execute(f'DROP TABLE {table}')
+
+    def handle(self, *args, **options):
+        if options['stored']:
+            user_ids = None
+            self.stdout.write(f'Measuring the stored rows on {connection.vendor}')
+        elif options['reuse']:
+            user_ids = bench.bench_user_ids()
+            self.stdout.write(f'Reusing {len(user_ids)} seeded users')
+        else:
+            bench.delete_bench_rows()
+            self.stdout.write(f"Seeding {options['rows']:,} audits and loan applications with their text "
+                              f"over {options['users']} users on {connection.vendor}")
+            started = time.perf_counter()
+
+            def progress(done):
+                if done % 5000 == 0 or done == options['rows']:
+                    self.stdout.write(f"  seeded {done:,} of {options['rows']:,} ({time.perf_counter() - started:.0f}s)")
+
+            user_ids = bench.seed(options['rows'], options['users'], progress=progress)
+
+        columns, tables = {}, {}
+        for model, owner in ((GreenAuditPayload, 'audit'), (GreenLoanPayload, 'loan')):
+            fields = [field for field in model._meta.concrete_fields if isinstance(field, CompressedTextField)]
+            payloads = model.objects.order_by('pk')
+            if user_ids is not None:
+                payloads = payloads.filter(**{f'{owner}__user_id__in': user_ids})
+            rows = list(payloads.values_list('pk', *(field.name for field in fields)))
+            stored = payloads.aggregate(**{field.name: Sum(Length(field.name)) for field in fields})
+            for position, field in enumerate(fields, start=1):
+                values = [row[position] or '' for row in rows]
+                dictionary = compression.latest_dictionary(field.dictionary)[1]
+                plain = sum(len(value.encode()) for value in values)
+                zlib_only = sum(len(compression.compress(value)) for value in values)
+                started = time.perf_counter()
+                packed = [compression.compress(value, dictionary) for value in values]
+                compress_seconds = time.perf_counter() - started
+                started = time.perf_counter()
+                for data in packed:
+                    compression.decompress(data)
+                decompress_seconds = time.perf_counter() - started
+                # The shipped dictionaries were trained on the same generator the seeded rows come
+                # from, so also train on one half of the values and measure on the half it never saw
+                held_out = values[len(values) // 2:]
+                held_out_dictionary = compression.train_dictionary(values[:len(values) // 2])
+                held_out_plain = sum(len(value.encode()) for value in held_out)
+                held_out_bytes = sum(len(compression.compress(value, held_out_dictionary)) for value in held_out)
+                columns[f'{model.__name__}.{field.name}'] = {
+                    'rows': len(values),
+                    'dictionary': field.dictionary,
+                    'plain_bytes': plain,
+                    'zlib_bytes': zlib_only,
+                    'stored_bytes': stored[field.name] or 0,
+                    'ratio': plain / max(stored[field.name] or 0, 1),
+                    'held_out_ratio': held_out_plain / max(held_out_bytes, 1),
+                    'compress_us': compress_seconds / max(len(values), 1) * 1e6,
+                    'decompress_us': decompress_seconds / max(len(values), 1) * 1e6,
+                }
+            tables[model._meta.db_table] = {
+                'table_bytes': bench.table_bytes(model),
+                'plain_table_bytes': self._plain_table_bytes(
+                    model, fields, [(pk, *(value or '' for value in values)) for pk, *values in rows]),
+            }
+
+        if not options['keep'] and not options['stored']:
+            bench.delete_bench_rows()
+
+        self.stdout.write('')
+        self.stdout.write(f"{'column':34} {'plain MB':>9} {'zlib':>6} {'zlib+dict':>10} {'held-out':>9} "
+                          f"{'us in/out':>10}")
+        for name, result in columns.items():
+            self.stdout.write(f"{name:34} {result['plain_bytes'] / 1e6:9.1f} "
+                              f"{result['plain_bytes'] / max(result['zlib_bytes'], 1):5.1f}x "
+                              f"{result['ratio']:9.1f}x {result['held_out_ratio']:8.1f}x "
+                              f"{result['compress_us']:5.0f}/{result['decompress_us']:.0f}")
+        for name, result in tables.items():
+            if result['table_bytes'] is not None:
+                self.stdout.write(f"{name}: {result['plain_table_bytes'] / 1e6:.1f} MB as plain text, "
+                                  f"{result['table_bytes'] / 1e6:.1f} MB compressed "
+                                  f"({result['plain_table_bytes'] / max(result['table_bytes'], 1):.1f}x smaller)")
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump({'vendor': connection.vendor, 'rows': None if options['stored'] else options['rows'],
+                           'columns': columns, 'tables': tables}, f, indent=2)
+                f.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json']}"))
@@ -0,0 +1,128 @@
+import json
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core import bench
+from green_audit.models import GreenAudit
+from green_loan.models import GreenLoan
+
+
+class Command(BaseCommand):
+    help = ("Seed the audit and loan history tables and compare query plans and latency "
+            "of the dashboard and admin queries without and with the history indexes")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000, help='Audits and loan applications to seed, each')
+        parser.add_argument('--users', type=int, default=2000, help='Users the seeded rows are spread over')
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=30, help='Runs of each query per phase')
+        parser.add_argument('--reuse', action='store_true', help='Use the rows left by an earlier --keep run (pass the same --rows)')
+        parser.add_argument('--keep', action='store_true', help='Leave the seeded rows in place')
+        parser.add_argument('--json', help='Also write the results to this JSON file')
+
+    def _queries(self, user_ids, rng):
+        return [
+            ('audit dashboard', 'GreenAudit filter(user) newest 10',
+             lambda: list(GreenAudit.objects.filter(user_id=rng.choice(user_ids))[:10])),
+            ('loan dashboard', 'GreenLoan filter(user) newest 5',
+             lambda: list(GreenLoan.objects.filter(user_id=rng.choice(user_ids))[:5])),
+            ('loan approvals', 'GreenLoan filter(user, loan_available) count',
+             lambda: GreenLoan.objects.filter(user_id=rng.choice(user_ids), loan_available=True).count()),
+            ('admin approved loans', 'GreenLoan changelist filtered on loan_available',
+             lambda: list(GreenLoan.objects.filter(loan_available=True)[:100])),
+            ('admin audit list', 'GreenAudit changelist, first page',
+             lambda: list(GreenAudit.objects.all()[:100])),
+        ]
+
+    def _run_phase(self, queries, repeat):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        results = {}
+        for name, description, run in queries:
+            with CaptureQueriesContext(connection) as captured:
+                run()
+            sql = captured.captured_queries[-1]['sql']
+            with connection.cursor() as cursor:
+                cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}')
+                plan = [str(row[-1]) for row in cursor.fetchall()]
+
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            results[name] = {
+                'description': description,
+                'sql': sql,
+                'plan': plan,
+                'p50_ms': statistics.median(timings),
+                'p95_ms': timings[max(0, round(0.95 * len(timings)) - 1)],
+            }
+        return results
+
+    def handle(self, *args, **options):
+        self.rows = options['rows']
+        if options['reuse']:
+            user_ids = bench.bench_user_ids()
+            self.stdout.write(f'Reusing {len(user_ids)} seeded users')
+        else:
+            bench.delete_bench_rows()
+            self.stdout.write(f"Seeding {options['rows']:,} audits and {options['rows']:,} loan applications "
+                              f"over {options['users']} users on {connection.vendor}")
+            started = time.perf_counter()
+
+            def progress(done):
+                if done % (options['batch_size'] * 10) == 0 or done == options['rows']:
+                    self.stdout.write(f"  seeded {done:,} of {options['rows']:,} rows per table "
+                                      f'({time.perf_counter() - started:.0f}s)')
+
+            user_ids = bench.seed(options['rows'], options['users'], options['batch_size'], payloads=False,
+                                  progress=progress)
+
+        indexes = [(model, index) for model in (GreenAudit, GreenLoan) for index in model._meta.indexes]
+        rng = random.Random(7)
+        queries = self._queries(user_ids, rng)
+        try:
+            with connection.schema_editor() as editor:
+                for model, index in indexes:
+                    editor.remove_index(model, index)
+            self.stdout.write('Measuring without the history indexes...')
+            before = self._run_phase(queries, options['repeat'])
+        finally:
+            with connection.schema_editor() as editor:
+                for model, index in indexes:
+                    editor.add_index(model, index)
+        self.stdout.write('Measuring with the history indexes...')
+        after = self._run_phase(queries, options['repeat'])
+
+        if not options['keep']:
+            bench.delete_bench_rows()
+
+        self.stdout.write('')
+        self.stdout.write(f"{'query':22} {'before p50':>11} {'p95':>9} {'after p50':>10} {'p95':>9} {'speedup':>8}")
+        for name in before:
+            b, a = before[name], after[name]
+            self.stdout.write(f"{name:22} {b['p50_ms']:11.2f} {b['p95_ms']:9.2f} {a['p50_ms']:10.2f} "
+                              f"{a['p95_ms']:9.2f} {b['p50_ms'] / max(a['p50_ms'], 1e-6):7.1f}x")
+        for name in before:
+            self.stdout.write(f'\n{name}: {before[name]["description"]}')
+            self.stdout.write('  before: ' + '\n          '.join(before[name]['plan']))
+            self.stdout.write('  after:  ' + '\n          '.join(after[name]['plan']))
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump({
+                    'vendor': connection.vendor,
+                    'rows': options['rows'],
+                    'users': len(user_ids),
+                    'before': before,
+                    'after': after,
+                }, f, indent=2)
+                f.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json']}"))
@@ -0,0 +1,124 @@
+import json
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core import bench
+from green_audit.models import GreenAudit, GreenAuditPayload
+from green_loan.models import GreenLoan, GreenLoanPayload
+
+
+def _value_bytes(value):
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode())
+    return 8
+
+
+def bytes_read(queryset):
+    """Bytes of column data the database returns for ``queryset``"""
+    sql, params = queryset.query.sql_with_params()
+    total = rows = 0
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        while True:
+            chunk = cursor.fetchmany(2000)
+            if not chunk:
+                break
+            rows += len(chunk)
+            total += sum(_value_bytes(value) for row in chunk for value in row)
+    return total, rows
+
+
+class Command(BaseCommand):
+    help = "Compare rows per second and bytes read by the history lists with and without the text payloads"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20000, help='Audits and loan applications to seed, each')
+        parser.add_argument('--users', type=int, default=200, help='Users the seeded rows are spread over')
+        parser.add_argument('--repeat', type=int, default=3, help='Full scans per variant; the fastest counts')
+        parser.add_argument('--lists', type=int, default=200, help='Dashboard lists to time per variant')
+        parser.add_argument('--reuse', action='store_true', help='Use the rows left by an earlier --keep run')
+        parser.add_argument('--keep', action='store_true', help='Leave the seeded rows in place')
+        parser.add_argument('--json', help='Also write the results to this JSON file')
+
+    def _measure(self, queryset, page, user_ids, options):
+        scan_rows, scan_seconds = 0, None
+        for _ in range(options['repeat']):
+            started = time.perf_counter()
+            scan_rows = sum(1 for _ in queryset.iterator(chunk_size=2000))
+            elapsed = time.perf_counter() - started
+            scan_seconds = elapsed if scan_seconds is None else min(scan_seconds, elapsed)
+
+        rng = random.Random(7)
+        timings = []
+        for _ in range(options['lists']):
+            started = time.perf_counter()
+            list(queryset.filter(user_id=rng.choice(user_ids))[:page])
+            timings.append((time.perf_counter() - started) * 1000)
+
+        data, _ = bytes_read(queryset)
+        return {
+            'rows': scan_rows,
+            'rows_per_second': scan_rows / scan_seconds if scan_seconds else None,
+            'bytes_read': data,
+            'bytes_per_row': data / scan_rows if scan_rows else 0,
+            'list_p50_ms': statistics.median(timings),
+        }
+
+    def handle(self, *args, **options):
+        if options['reuse']:
+            user_ids = bench.bench_user_ids()
+            self.stdout.write(f'Reusing {len(user_ids)} seeded users')
+        else:
+            bench.delete_bench_rows()
+            self.stdout.write(f"Seeding {options['rows']:,} audits and loan applications with their text "
+                              f"over {options['users']} users on {connection.vendor}")
+            started = time.perf_counter()
+
+            def progress(done):
+                if done % 5000 == 0 or done == options['rows']:
+                    self.stdout.write(f"  seeded {done:,} of {options['rows']:,} ({time.perf_counter() - started:.0f}s)")
+
+            user_ids = bench.seed(options['rows'], options['users'], progress=progress)
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        results = {}
+        for name, model, payload, page in (('audits', GreenAudit, GreenAuditPayload, 10),
+                                           ('loans', GreenLoan, GreenLoanPayload, 5)):
+            rows = model.objects.filter(user_id__in=user_ids)
+            results[name] = {
+                # The old row shape: every list read carried the text columns
+                'with_text': self._measure(rows.with_payload(), page, user_ids, options),
+                'list_rows': self._measure(rows, page, user_ids, options),
+                'table_bytes': bench.table_bytes(model),
+                'payload_table_bytes': bench.table_bytes(payload),
+            }
+
+        if not options['keep']:
+            bench.delete_bench_rows()
+
+        self.stdout.write('')
+        self.stdout.write(f"{'table':8} {'variant':10} {'rows/s':>10} {'bytes/row':>10} {'MB read':>9} {'list p50 ms':>12}")
+        for name, result in results.items():
+            for variant in ('with_text', 'list_rows'):
+                stats = result[variant]
+                self.stdout.write(f"{name:8} {variant:10} {stats['rows_per_second']:10,.0f} {stats['bytes_per_row']:10,.0f} "
+                                  f"{stats['bytes_read'] / 1e6:9.1f} {stats['list_p50_ms']:12.2f}")
+            if result['table_bytes'] is not None:
+                self.stdout.write(f"{'':8} list table {result['table_bytes'] / 1e6:.1f} MB, "
+                                  f"payload table {result['payload_table_bytes'] / 1e6:.1f} MB")
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump({'vendor': connection.vendor, 'rows': options['rows'], 'results': results}, f, indent=2)
+                f.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json']}"))
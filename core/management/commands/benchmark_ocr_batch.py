@@ -0,0 +1,54 @@
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import ocr, preprocess
+
+IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png', '.webp'}
+
+
+class Command(BaseCommand):
+    help = "Compare OCR throughput of one-at-a-time readtext against a batched pass"
+
+    def add_arguments(self, parser):
+        parser.add_argument('folders', nargs='*', default=['audit_images', 'payslip_images'],
+                            help='Folders under MEDIA_ROOT holding sample images')
+        parser.add_argument('--images', type=int, default=6, help='Images per request')
+        parser.add_argument('--rounds', type=int, default=3, help='Timed repetitions of each path')
+
+    def handle(self, *args, **options):
+        paths = []
+        for folder in options['folders']:
+            paths.extend(
+                path for path in sorted((Path(settings.MEDIA_ROOT) / folder).glob('*'))
+                if path.suffix.lower() in IMAGE_SUFFIXES
+            )
+        paths = paths[:options['images']]
+        if not paths:
+            self.stderr.write('No sample images found.')
+            return
+
+        # Both paths see the same preprocessed images; the cache is bypassed
+        images = [preprocess.preprocess(preprocess.decode_image(path.read_bytes()))[0] for path in paths]
+        ocr.warm_up()
+
+        def one_at_a_time():
+            return [ocr.readtext(image) for image in images]
+
+        def batched():
+            return ocr.readtext_batched(images)
+
+        timings = {}
+        for label, run in [('one-at-a-time', one_at_a_time), ('batched', batched)]:
+            run()  # untimed pass so both paths start warm
+            started = time.perf_counter()
+            for _ in range(options['rounds']):
+                run()
+            timings[label] = (time.perf_counter() - started) / options['rounds']
+
+        self.stdout.write(f'{len(images)} images per request, batch size {settings.OCR_BATCH_SIZE}, {options["rounds"]} rounds')
+        for label, seconds in timings.items():
+            self.stdout.write(f'{label:15} {seconds:8.2f} s/request  {len(images) / seconds:6.2f} images/s')
+        self.stdout.write(f"Speed-up: {timings['one-at-a-time'] / timings['batched']:.2f}x")
@@ -0,0 +1,110 @@
+import json
+import statistics
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import ocr, preprocess
+from green_audit.views import extract_bill_data
+from green_loan.views import extract_payslip_data
+
+IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png', '.webp'}
+
+
+def _text(result):
+    return ' '.join(text for _, text, _ in result)
+
+
+def _fields_found(data):
+    return sum(1 for value in data.values() if value not in (None, ''))
+
+
+class Command(BaseCommand):
+    help = "Validate the OCR inference modes against fp32 on the sample bills and payslips"
+
+    def add_arguments(self, parser):
+        parser.add_argument('folders', nargs='*', default=['audit_images', 'payslip_images', 'temp_payslip'],
+                            help='Folders under MEDIA_ROOT holding sample images')
+        parser.add_argument('--modes', nargs='+', default=list(ocr.INFERENCE_MODES), choices=ocr.INFERENCE_MODES,
+                            help='Modes to compare; fp32 is always run as the reference')
+        parser.add_argument('--limit', type=int, default=0, help='Only use the first N images')
+        parser.add_argument('--repeats', type=int, default=3, help='Timed runs per image; the median is kept')
+        parser.add_argument('--ground-truth', help='JSON file mapping image file names to their expected text')
+        parser.add_argument('--min-agreement', type=float, default=0.95,
+                            help='Lowest mean text agreement with fp32 that still passes')
+
+    def handle(self, *args, **options):
+        truth = {}
+        if options['ground_truth']:
+            truth = json.loads(Path(options['ground_truth']).read_text())
+
+        images = []
+        for folder in options['folders']:
+            for path in sorted((Path(settings.MEDIA_ROOT) / folder).glob('*')):
+                if path.suffix.lower() in IMAGE_SUFFIXES:
+                    extract = extract_payslip_data if 'payslip' in folder else extract_bill_data
+                    prepared, _ = preprocess.preprocess(preprocess.decode_image(path.read_bytes()))
+                    images.append((path.name, extract, prepared))
+        if options['limit']:
+            images = images[:options['limit']]
+        if not images:
+            self.stderr.write('No sample images found.')
+            return
+
+        ocr._configure_torch()
+        modes = ['fp32'] + [mode for mode in options['modes'] if mode != 'fp32']
+        reference = {}
+        summary = {}
+        for mode in modes:
+            started = time.perf_counter()
+            reader = ocr.create_reader(mode)
+            load_s = time.perf_counter() - started
+            # The first inference pays one-off allocation and tracing costs
+            reader.readtext(images[0][2])
+
+            rows = []
+            for name, extract, image in images:
+                timings = []
+                for _ in range(max(1, options['repeats'])):
+                    started = time.perf_counter()
+                    result = reader.readtext(image)
+                    timings.append((time.perf_counter() - started) * 1000)
+                text = _text(result)
+                if mode == 'fp32':
+                    reference[name] = text
+
+                row = {
+                    'ms': statistics.median(timings),
+                    'fields': _fields_found(extract(text)),
+                    'conf': statistics.mean([c for _, _, c in result]) if result else 0.0,
+                    'agreement': SequenceMatcher(None, reference[name], text).ratio(),
+                }
+                if name in truth:
+                    row['acc'] = SequenceMatcher(None, truth[name], text).ratio()
+                rows.append(row)
+
+            summary[mode] = {key: statistics.mean([row[key] for row in rows if key in row])
+                             for key in ('ms', 'fields', 'conf', 'agreement', 'acc') if any(key in row for row in rows)}
+            summary[mode]['load_s'] = load_s
+            self.stdout.write(f"{mode:12} loaded in {load_s:.1f}s, {summary[mode]['ms']:.0f} ms per image")
+
+        self.stdout.write('')
+        self.stdout.write(f'Images: {len(images)}   Pipeline: {preprocess.signature()}   Configured mode: {settings.OCR_INFERENCE_MODE}')
+        self.stdout.write(f"{'mode':12} {'ms/image':>9} {'speedup':>8} {'fields':>7} {'conf':>6} {'agree':>6} {'acc':>6}  result")
+        failed = []
+        for mode, stats in summary.items():
+            passed = (stats['agreement'] >= options['min_agreement']
+                      and stats['fields'] >= summary['fp32']['fields'])
+            if not passed:
+                failed.append(mode)
+            accuracy = f"{stats['acc']:6.3f}" if 'acc' in stats else f"{'-':>6}"
+            self.stdout.write(
+                f"{mode:12} {stats['ms']:9.0f} {summary['fp32']['ms'] / stats['ms']:7.2f}x {stats['fields']:7.2f} "
+                f"{stats['conf']:6.3f} {stats['agreement']:6.3f} {accuracy}  {'ok' if passed else 'FAIL'}"
+            )
+
+        if failed:
+            raise CommandError(f"Below fp32 accuracy: {', '.join(failed)}")
@@ -0,0 +1,102 @@
+import json
+import statistics
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import ocr, preprocess
+from green_audit.views import extract_bill_data
+from green_loan.views import extract_payslip_data
+
+IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png', '.webp'}
+
+
+def _text(result):
+    return ' '.join(text for _, text, _ in result)
+
+
+def _fields_found(data):
+    return sum(1 for value in data.values() if value not in (None, ''))
+
+
+class Command(BaseCommand):
+    help = "Compare OCR latency and accuracy with and without image preprocessing"
+
+    def add_arguments(self, parser):
+        parser.add_argument('folders', nargs='*', default=['audit_images', 'payslip_images', 'temp_payslip'],
+                            help='Folders under MEDIA_ROOT holding sample images')
+        parser.add_argument('--limit', type=int, default=0, help='Only use the first N images')
+        parser.add_argument('--ground-truth', help='JSON file mapping image file names to their expected text')
+
+    def handle(self, *args, **options):
+        truth = {}
+        if options['ground_truth']:
+            truth = json.loads(Path(options['ground_truth']).read_text())
+
+        images = []
+        for folder in options['folders']:
+            for path in sorted((Path(settings.MEDIA_ROOT) / folder).glob('*')):
+                if path.suffix.lower() in IMAGE_SUFFIXES:
+                    images.append((folder, path))
+        if options['limit']:
+            images = images[:options['limit']]
+        if not images:
+            self.stderr.write('No sample images found.')
+            return
+
+        # Load the models before timing anything
+        ocr.warm_up()
+
+        rows = []
+        stage_timings = {}
+        for folder, path in images:
+            extract = extract_payslip_data if 'payslip' in folder else extract_bill_data
+            raw = preprocess.decode_image(path.read_bytes())
+
+            started = time.perf_counter()
+            before = ocr.readtext(raw)
+            before_ms = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            prepared, timings = preprocess.preprocess(raw)
+            after = ocr.readtext(prepared)
+            after_ms = (time.perf_counter() - started) * 1000
+
+            for stage, ms in timings.items():
+                stage_timings.setdefault(stage, []).append(ms)
+
+            row = {
+                'image': path.name,
+                'before_ms': before_ms,
+                'after_ms': after_ms,
+                'before_fields': _fields_found(extract(_text(before))),
+                'after_fields': _fields_found(extract(_text(after))),
+                'before_conf': statistics.mean([c for _, _, c in before]) if before else 0.0,
+                'after_conf': statistics.mean([c for _, _, c in after]) if after else 0.0,
+                'agreement': SequenceMatcher(None, _text(before), _text(after)).ratio(),
+            }
+            if path.name in truth:
+                row['before_acc'] = SequenceMatcher(None, truth[path.name], _text(before)).ratio()
+                row['after_acc'] = SequenceMatcher(None, truth[path.name], _text(after)).ratio()
+            rows.append(row)
+
+            self.stdout.write(
+                f"{path.name[:40]:40}  {row['before_ms']:8.0f} ms -> {row['after_ms']:8.0f} ms  "
+                f"fields {row['before_fields']} -> {row['after_fields']}  "
+                f"conf {row['before_conf']:.2f} -> {row['after_conf']:.2f}  "
+                f"agreement {row['agreement']:.2f}"
+            )
+
+        self.stdout.write('')
+        self.stdout.write(f'Pipeline: {preprocess.signature()}')
+        self.stdout.write(f"Images: {len(rows)}")
+        for key, label in [('ms', 'Latency (ms)'), ('fields', 'Fields extracted'), ('conf', 'Mean confidence'), ('acc', 'Accuracy vs ground truth')]:
+            before = [row[f'before_{key}'] for row in rows if f'before_{key}' in row]
+            after = [row[f'after_{key}'] for row in rows if f'after_{key}' in row]
+            if before:
+                self.stdout.write(f'{label:26} before {statistics.mean(before):10.2f}   after {statistics.mean(after):10.2f}')
+        for stage, values in stage_timings.items():
+            self.stdout.write(f'  {stage:10} mean {statistics.mean(values):7.2f} ms')
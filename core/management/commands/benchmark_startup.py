@@ -0,0 +1,121 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Modules a web worker should not load until an OCR or LLM request needs them
+HEAVY_MODULES = ['torch', 'easyocr', 'cv2', 'numpy', 'PIL', 'openai', 'pypdfium2']
+
+# Runs in a fresh interpreter, the way a gunicorn worker boots
+PROBE = '''
+import json, os, sys, time
+started = time.perf_counter()
+from MoLenerzi.wsgi import application
+loaded = time.perf_counter()
+
+from io import BytesIO
+from wsgiref.util import setup_testing_defaults
+environ = {'PATH_INFO': sys.argv[1], 'HTTP_HOST': 'localhost', 'wsgi.input': BytesIO()}
+setup_testing_defaults(environ)
+status = []
+body = b''.join(application(environ, lambda s, h, exc_info=None: status.append(s)))
+served = time.perf_counter()
+
+rss_kb = 0
+try:
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                rss_kb = int(line.split()[1])
+except OSError:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+print(json.dumps({
+    'app_load_ms': (loaded - started) * 1000,
+    'first_request_ms': (served - started) * 1000,
+    'status': status[0] if status else None,
+    'rss_mb': rss_kb / 1024,
+    'heavy_modules': [name for name in sys.argv[2:] if name in sys.modules],
+}))
+'''
+
+METRICS = ['check_ms', 'app_load_ms', 'first_request_ms', 'rss_mb']
+
+
+class Command(BaseCommand):
+    help = "Measure process startup time and memory, and compare them to a saved baseline"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Fresh processes to start per measurement')
+        parser.add_argument('--path', default='/', help='URL of the first request')
+        parser.add_argument('--baseline', default=str(Path(settings.BASE_DIR) / 'startup_baseline.json'),
+                            help='JSON file holding the baseline numbers')
+        parser.add_argument('--save', action='store_true', help='Write these results as the new baseline')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed slowdown or growth over the baseline, as a fraction')
+
+    def _run(self, args):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'MoLenerzi.settings'))
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, *args], cwd=settings.BASE_DIR, env=env,
+                                capture_output=True, text=True)
+        elapsed = (time.perf_counter() - started) * 1000
+        if result.returncode != 0:
+            raise CommandError(f'{" ".join(args[:2])} failed:\n{result.stderr}')
+        return elapsed, result.stdout
+
+    def handle(self, *args, **options):
+        samples = {metric: [] for metric in METRICS}
+        heavy = set()
+        for _ in range(max(1, options['runs'])):
+            elapsed, _ = self._run(['manage.py', 'check'])
+            samples['check_ms'].append(elapsed)
+
+            _, output = self._run(['-c', PROBE, options['path'], *HEAVY_MODULES])
+            probe = json.loads(output.strip().splitlines()[-1])
+            for metric in METRICS[1:]:
+                samples[metric].append(probe[metric])
+            heavy.update(probe['heavy_modules'])
+
+        results = {metric: statistics.median(values) for metric, values in samples.items()}
+        self.stdout.write(f"First request: {options['path']} -> {probe['status']}")
+        for metric in METRICS:
+            self.stdout.write(f'{metric:18} median {results[metric]:9.1f}   min {min(samples[metric]):9.1f}   max {max(samples[metric]):9.1f}')
+        if heavy:
+            self.stdout.write(self.style.WARNING(f"Heavy modules loaded at startup: {', '.join(sorted(heavy))}"))
+        else:
+            self.stdout.write('No heavy modules loaded at startup')
+
+        baseline_path = Path(options['baseline'])
+        if options['save']:
+            baseline_path.write_text(json.dumps(dict(results, heavy_modules=sorted(heavy)), indent=2) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {baseline_path}'))
+            return
+        if not baseline_path.exists():
+            self.stdout.write(f'No baseline at {baseline_path}; run with --save to create one')
+            return
+
+        baseline = json.loads(baseline_path.read_text())
+        regressions = []
+        self.stdout.write('')
+        for metric in METRICS:
+            if metric not in baseline:
+                continue
+            change = results[metric] / baseline[metric] - 1 if baseline[metric] else 0.0
+            self.stdout.write(f'{metric:18} baseline {baseline[metric]:9.1f}   now {results[metric]:9.1f}   {change:+.0%}')
+            if change > options['tolerance']:
+                regressions.append(metric)
+        new_heavy = heavy - set(baseline.get('heavy_modules', []))
+        if new_heavy:
+            self.stdout.write(self.style.WARNING(f"Newly loaded at startup: {', '.join(sorted(new_heavy))}"))
+            regressions.append('heavy_modules')
+        if regressions:
+            raise CommandError(f"Startup regressed beyond {options['tolerance']:.0%}: {', '.join(regressions)}")
+        self.stdout.write(self.style.SUCCESS('Startup is within the baseline'))
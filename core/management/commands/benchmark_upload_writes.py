@@ -0,0 +1,142 @@
+import json
+import multiprocessing
+import random
+import statistics
+import time
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.core import signals
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, connections
+from django.utils import timezone
+
+from core import bench
+from green_audit.views import save_bill_audit
+from green_loan.views import save_loan_application
+
+BILL_FIELDS = ('bill_number', 'account_number', 'billing_period', 'kwh_consumption', 'total_amount',
+               'previous_reading', 'current_reading')
+PAYSLIP_FIELDS = ('employee_name', 'employee_id', 'monthly_salary', 'company_name', 'designation')
+
+
+def _sample(rng, n, now):
+    """The save call a bill (odd ``n``) or payslip upload ends with, waiting for the user"""
+    if n % 2:
+        row, payload = bench.sample_audit(rng, n, now)
+        return partial(save_bill_audit, b'', None, payload['audit_text'], {name: row[name] for name in BILL_FIELDS},
+                       payload['analysis_result'], file_path=f'audit_images/bench_{n}.jpg')
+    row, payload = bench.sample_loan(rng, n, now)
+    loan = {name: row[name] for name in ('loan_available', 'loan_type', 'interest_rate', 'max_loan_amount')}
+    loan['loan_term_years'] = row['loan_term_months'] // 12 if row['loan_term_months'] else None
+    return partial(save_loan_application, payslip_text=payload['payslip_text'],
+                   payslip_image=f'payslip_images/bench_{n}.jpg',
+                   extracted_data={name: row[name] for name in PAYSLIP_FIELDS},
+                   ai_response=payload['loan_suggestion'], loan_data=loan)
+
+
+def _worker(index, user_ids, duration, start, results):
+    """One worker process: uploads back to back, each inside a request's connection handling"""
+    rng = random.Random(index)
+    now = timezone.now()
+    timings, errors = [], 0
+    n = index * 10 ** 7
+    start.wait()
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        n += 1
+        upload = _sample(rng, n, now)
+        user = User(pk=rng.choice(user_ids))
+        started = time.perf_counter()
+        # Django opens, reuses or pools the connection on these signals, as for a request
+        signals.request_started.send(sender=Command)
+        try:
+            upload(user=user)
+        except DatabaseError:
+            errors += 1
+        else:
+            timings.append(time.perf_counter() - started)
+        finally:
+            signals.request_finished.send(sender=Command)
+    connections.close_all()
+    results.put((timings, errors))
+
+
+class Command(BaseCommand):
+    help = ("Measure concurrent upload throughput of the configured database: worker processes save "
+            "bill audits and loan applications as the upload endpoints do, without OCR or OpenAI")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', default='1,2,4,8', help='Comma-separated worker process counts to run')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds to run each worker count for')
+        parser.add_argument('--users', type=int, default=100, help='Users the uploads are spread over')
+        parser.add_argument('--keep', action='store_true', help='Leave the uploaded rows in place')
+        parser.add_argument('--json', help='Also write the results to this JSON file')
+
+    def _run(self, workers, user_ids, duration):
+        context = multiprocessing.get_context('fork')
+        start, results = context.Event(), context.Queue()
+        # Each process opens its own connection (or pool) after the fork
+        connections.close_all()
+        processes = [context.Process(target=_worker, args=(index, user_ids, duration, start, results))
+                     for index in range(workers)]
+        for process in processes:
+            process.start()
+        start.set()
+        timings, errors = [], 0
+        for _ in processes:
+            worker_timings, worker_errors = results.get()
+            timings.extend(worker_timings)
+            errors += worker_errors
+        for process in processes:
+            process.join()
+        timings.sort()
+        return {
+            'workers': workers,
+            'uploads': len(timings),
+            'uploads_per_second': len(timings) / duration,
+            'errors': errors,
+            'p50_ms': statistics.median(timings) * 1000 if timings else None,
+            'p95_ms': timings[max(0, round(0.95 * len(timings)) - 1)] * 1000 if timings else None,
+        }
+
+    def handle(self, *args, **options):
+        try:
+            worker_counts = [int(count) for count in options['workers'].split(',')]
+        except ValueError:
+            raise CommandError('--workers takes comma-separated numbers, e.g. 1,4,8')
+
+        database = connection.settings_dict
+        pool = database['OPTIONS'].get('pool')
+        if pool:
+            connection_handling = f"pool of {pool.get('min_size', 0)}-{pool.get('max_size')} per worker"
+        else:
+            connection_handling = f"CONN_MAX_AGE={database['CONN_MAX_AGE']}"
+        self.stdout.write(f'Uploading on {connection.vendor} ({connection_handling}), '
+                          f"{options['duration']:g}s per worker count")
+
+        bench.delete_bench_rows()
+        user_ids = bench.create_users(options['users'])
+        results = []
+        try:
+            for workers in worker_counts:
+                result = self._run(workers, user_ids, options['duration'])
+                results.append(result)
+                self.stdout.write(f"  {workers:3} workers: {result['uploads_per_second']:7.1f} uploads/s, "
+                                  f"{result['errors']} errors")
+        finally:
+            if not options['keep']:
+                bench.delete_bench_rows()
+
+        self.stdout.write('')
+        self.stdout.write(f"{'workers':>7} {'uploads/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+        for result in results:
+            self.stdout.write(f"{result['workers']:7} {result['uploads_per_second']:10.1f} "
+                              f"{result['p50_ms'] or 0:8.1f} {result['p95_ms'] or 0:8.1f} {result['errors']:7}")
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump({'vendor': connection.vendor, 'connections': connection_handling, 'results': results},
+                          f, indent=2)
+                f.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json']}"))
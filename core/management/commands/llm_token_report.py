@@ -0,0 +1,71 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, Q, Sum
+from django.utils import timezone
+
+from core import prompts
+from core.models import LLMCall
+
+
+class Command(BaseCommand):
+    help = "Report prompt and completion tokens per endpoint and prompt template, biggest spenders first"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Only count calls from the last N days (0 for all)')
+        parser.add_argument('--json', help='Also write the report to this JSON file')
+
+    def handle(self, *args, **options):
+        calls = LLMCall.objects.all()
+        if options['days']:
+            calls = calls.filter(created_at__gte=timezone.now() - timedelta(days=options['days']))
+
+        rows = list(
+            calls.values('endpoint', 'template')
+            .annotate(
+                calls=Count('id'),
+                cache_hits=Count('id', filter=Q(from_cache=True)),
+                prompt_tokens=Sum('prompt_tokens'),
+                cached_prompt_tokens=Sum('cached_prompt_tokens'),
+                completion_tokens=Sum('completion_tokens'),
+                latency_ms=Avg('latency_ms', filter=Q(from_cache=False)),
+            )
+        )
+        for row in rows:
+            row['total_tokens'] = row['prompt_tokens'] + row['completion_tokens']
+            row['api_calls'] = row['calls'] - row['cache_hits']
+        rows.sort(key=lambda row: row['total_tokens'], reverse=True)
+        grand_total = sum(row['total_tokens'] for row in rows)
+
+        period = f"last {options['days']} days" if options['days'] else 'all time'
+        self.stdout.write(f'LLM token usage, {period}')
+        self.stdout.write(f"{'endpoint':40} {'template':18} {'calls':>6} {'cached':>6} {'prompt/call':>11} "
+                          f"{'prefix hit':>10} {'compl/call':>10} {'total':>10} {'share':>6} {'ms':>6}")
+        for row in rows:
+            api_calls = row['api_calls'] or 1
+            prefix_hit = row['cached_prompt_tokens'] / row['prompt_tokens'] if row['prompt_tokens'] else 0.0
+            self.stdout.write(
+                f"{row['endpoint'] or '-':40} {row['template']:18} {row['calls']:6} {row['cache_hits']:6} "
+                f"{row['prompt_tokens'] / api_calls:11.0f} {prefix_hit:10.0%} {row['completion_tokens'] / api_calls:10.0f} "
+                f"{row['total_tokens']:10} {row['total_tokens'] / grand_total if grand_total else 0:6.0%} "
+                f"{row['latency_ms'] or 0:6.0f}"
+            )
+        if not rows:
+            self.stdout.write('No LLM calls recorded.')
+
+        # Static prefixes: the part of every prompt that OpenAI can serve from its cache
+        templates = []
+        self.stdout.write('')
+        self.stdout.write(f"{'template':22} {'model':14} {'prefix tokens':>13}")
+        for template in prompts.all_templates():
+            tokens = template.prefix_tokens()
+            templates.append({'template': template.key, 'model': template.model, 'prefix_tokens': tokens})
+            self.stdout.write(f'{template.key:22} {template.model:14} {tokens:13}')
+        self.stdout.write('OpenAI caches prompt prefixes of 1024 tokens or more; shorter prefixes are billed in full.')
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump({'period_days': options['days'], 'usage': rows, 'templates': templates}, f, indent=2)
+                f.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['json']}"))
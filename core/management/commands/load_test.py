@@ -0,0 +1,200 @@
+import json
+import math
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib import error, request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.preprocess import cv2, decode_image, np
+
+IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png', '.webp', '.pdf'}
+
+SAMPLE_PAYSLIP = '''ACME Ltd - Payslip
+Employee Name: Jane Doe   Employee ID: {ref}
+Designation: Accountant
+Basic Salary: MUR {salary:,}   Net Pay: MUR {net_pay:,}'''
+
+SAMPLE_AUDIT = ('Household of four in Curepipe, {ref}. Monthly bill around MUR 2,400 for 420 kWh. '
+                'Two split AC units, electric geyser, old fridge, mostly CFL bulbs.')
+
+
+def _json_body(payload):
+    return json.dumps(payload).encode(), 'application/json'
+
+
+def _multipart_body(name, filename, content):
+    boundary = uuid.uuid4().hex
+    body = b''.join([
+        f'--{boundary}\r\n'.encode(),
+        f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'.encode(),
+        b'Content-Type: application/octet-stream\r\n\r\n',
+        content,
+        f'\r\n--{boundary}--\r\n'.encode(),
+    ])
+    return body, f'multipart/form-data; boundary={boundary}'
+
+
+def _stamp_consumption(image_bytes, kwh):
+    """The bill as PNG with a 'Consumption: N kWh' line above it, read before the bill's own figure"""
+    image = decode_image(image_bytes)
+    scale = image.shape[1] / 800
+    band = np.full((int(70 * scale), image.shape[1], 3), 255, dtype=np.uint8)
+    cv2.putText(band, f'Consumption: {kwh} kWh', (int(20 * scale), int(50 * scale)),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.2 * scale, (0, 0, 0), max(1, int(2 * scale)))
+    return cv2.imencode('.png', np.vstack([band, image]))[1].tobytes()
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class Command(BaseCommand):
+    help = "Drive the AI endpoints at a fixed request rate and report latency percentiles and throughput"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='Running Django server to test')
+        parser.add_argument('--endpoints', nargs='+', default=['analyze', 'extract-text', 'analyze-payslip'],
+                            choices=['analyze', 'extract-text', 'analyze-payslip'])
+        parser.add_argument('--rps', type=float, default=2.0, help='Requests per second sent to each endpoint')
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds to keep sending')
+        parser.add_argument('--concurrency', type=int, default=64, help='Most requests in flight at once')
+        parser.add_argument('--timeout', type=float, default=180.0, help='Seconds before a request counts as failed')
+        parser.add_argument('--image', help='Bill image or PDF for extract-text (defaults to the first sample in media/audit_images)')
+        parser.add_argument('--same-payload', action='store_true',
+                            help='Send identical payloads, so the OCR and LLM caches answer after the first request')
+        parser.add_argument('--json', help='Also write the results to this JSON file')
+
+    def _payloads(self, options):
+        image = None
+        if 'extract-text' in options['endpoints']:
+            if options['image']:
+                image = Path(options['image'])
+            else:
+                samples = sorted(p for p in (Path(settings.MEDIA_ROOT) / 'audit_images').glob('*')
+                                 if p.suffix.lower() in IMAGE_SUFFIXES)
+                image = samples[0] if samples else None
+            if image is None or not image.exists():
+                raise CommandError('No bill image found; pass --image.')
+            image_bytes = image.read_bytes()
+
+        same = options['same_payload']
+        # The narratives are written from the parsed figures, not the raw text, so
+        # those have to differ for the LLM cache to miss as well as the OCR cache
+        stamp = image is not None and image.suffix.lower() != '.pdf'
+        if same:
+            self.stdout.write('Identical payloads: the OCR and LLM caches answer after the first request')
+        else:
+            self.stdout.write('Varied payloads: each audit text carries a request number, each payslip a '
+                              'different salary' + (' and each bill a stamped consumption figure' if stamp else ''))
+            if image is not None and not stamp:
+                self.stdout.write(self.style.WARNING(
+                    f'{image.name} is a PDF and cannot be stamped: extract-text narratives come from the LLM '
+                    'cache after the first request unless the server runs with LLM_CACHE_ENABLED=False'))
+
+        def build(endpoint, index):
+            ref = 'load-test' if same else f'load-test {index} {uuid.uuid4().hex[:8]}'
+            if endpoint == 'analyze':
+                return '/green_audit/api/analyze/', *_json_body({'audit_text': SAMPLE_AUDIT.format(ref=ref)})
+            if endpoint == 'analyze-payslip':
+                # MUR 10 apart changes the repayment cap and so the narrative prompt
+                salary = 45000 if same else 30000 + index % 20000 * 10
+                payslip = SAMPLE_PAYSLIP.format(ref=ref, salary=salary, net_pay=round(salary * 0.885))
+                return '/green_loan/api/analyze-payslip/', *_json_body({'payslip_text': payslip})
+            if same:
+                return '/green_audit/api/extract-text/', *_multipart_body('image', image.name, image_bytes)
+            if stamp:
+                content = _stamp_consumption(image_bytes, 150 + index % 1000)
+                return '/green_audit/api/extract-text/', *_multipart_body('image', f'{image.stem}.png', content)
+            # Trailing bytes make each upload a distinct file to the OCR cache; readers ignore them
+            return '/green_audit/api/extract-text/', *_multipart_body('image', image.name, image_bytes + ref.encode())
+
+        return build
+
+    def handle(self, *args, **options):
+        if options['rps'] <= 0 or options['duration'] <= 0:
+            raise CommandError('--rps and --duration must be positive.')
+        build = self._payloads(options)
+        base_url = options['base_url'].rstrip('/')
+        results = {endpoint: [] for endpoint in options['endpoints']}
+        results_lock = threading.Lock()
+
+        def send(endpoint, index, scheduled):
+            path, body, content_type = build(endpoint, index)
+            req = request.Request(base_url + path, data=body, method='POST', headers={'Content-Type': content_type})
+            try:
+                with request.urlopen(req, timeout=options['timeout']) as response:
+                    response.read()
+                    status = response.status
+            except error.HTTPError as e:
+                status = e.code
+            except OSError as e:
+                status = type(e).__name__
+            # Measured from when the request was due, so a backed-up client
+            # shows up as latency instead of as a lower request rate
+            latency = time.perf_counter() - scheduled
+            with results_lock:
+                results[endpoint].append((status, latency))
+
+        total = int(options['rps'] * options['duration'])
+        interval = 1 / options['rps']
+        self.stdout.write(f"Sending {total} requests to each of {', '.join(options['endpoints'])} "
+                          f"at {options['rps']:g}/s against {base_url}")
+        pool = ThreadPoolExecutor(max_workers=options['concurrency'])
+        started = time.perf_counter()
+        # Open loop: requests go out on schedule whether or not earlier ones have finished
+        for index in range(total):
+            due = started + index * interval
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            for endpoint in options['endpoints']:
+                pool.submit(send, endpoint, index, due)
+        pool.shutdown(wait=True)
+        elapsed = time.perf_counter() - started
+
+        report = {}
+        self.stdout.write('')
+        self.stdout.write(f"{'endpoint':16} {'sent':>5} {'ok':>5} {'err':>5} {'ok/s':>7} "
+                          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for endpoint, rows in results.items():
+            ok = sorted(latency for status, latency in rows if status == 200)
+            errors = Counter(str(status) for status, _ in rows if status != 200)
+            stats = {
+                'sent': len(rows),
+                'ok': len(ok),
+                'errors': dict(errors),
+                'throughput': len(ok) / elapsed,
+                'p50_ms': percentile(ok, 0.50),
+                'p95_ms': percentile(ok, 0.95),
+                'p99_ms': percentile(ok, 0.99),
+                'max_ms': ok[-1] if ok else None,
+            }
+            for key in ('p50_ms', 'p95_ms', 'p99_ms', 'max_ms'):
+                if stats[key] is not None:
+                    stats[key] *= 1000
+            report[endpoint] = stats
+            cells = ' '.join(f'{stats[key]:8.0f}' if stats[key] is not None else f"{'-':>8}"
+                             for key in ('p50_ms', 'p95_ms', 'p99_ms', 'max_ms'))
+            self.stdout.write(f"{endpoint:16} {stats['sent']:5} {stats['ok']:5} {sum(errors.values()):5} "
+                              f"{stats['throughput']:7.2f} {cells}")
+            if errors:
+                self.stdout.write(f"{'':16} errors: {', '.join(f'{k} x{v}' for k, v in sorted(errors.items()))}")
+
+        self.stdout.write(f'\nRan for {elapsed:.1f}s at a target of {options["rps"]:g} requests/s per endpoint')
+        if options['json']:
+            Path(options['json']).write_text(json.dumps({
+                'base_url': base_url,
+                'rps': options['rps'],
+                'duration_s': elapsed,
+                'endpoints': report,
+            }, indent=2) + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json']}"))
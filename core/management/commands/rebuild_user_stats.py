@@ -0,0 +1,40 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts import stats
+from accounts.models import UserStats
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-user dashboard totals from the audits and loan applications"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', dest='users', metavar='USERNAME',
+                            help='Only rebuild this user (repeatable)')
+
+    def handle(self, *args, **options):
+        rows = UserStats.objects.all()
+        user_ids = None
+        if options['users']:
+            user_ids = list(User.objects.filter(username__in=options['users']).values_list('pk', flat=True))
+            rows = rows.filter(user_id__in=user_ids)
+
+        with transaction.atomic():
+            current = {row['user_id']: row for row in rows.values('user_id', *stats.FIELDS)}
+            fresh = stats.totals(user_ids)
+            changed = [user_id for user_id, values in fresh.items()
+                       if user_id not in current or any(current[user_id][f] != values[f] for f in stats.FIELDS)]
+            # Users left with no audits or loans keep a zero row
+            emptied = [user_id for user_id in current if user_id not in fresh
+                       and any(current[user_id][f] for f in stats.FIELDS)]
+
+            UserStats.objects.bulk_create(
+                [UserStats(user_id=user_id, **fresh[user_id]) for user_id in changed],
+                update_conflicts=True, unique_fields=['user'], update_fields=[*stats.FIELDS, 'updated_at'],
+            )
+            UserStats.objects.filter(user_id__in=emptied).update(**{f: 0 for f in stats.FIELDS})
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt stats for {len(fresh)} users: {len(changed)} corrected or added, {len(emptied)} reset to zero.'
+        ))
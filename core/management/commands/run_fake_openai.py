@@ -0,0 +1,55 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import fake_openai
+
+
+class Command(BaseCommand):
+    help = "Serve a local OpenAI-compatible chat completions endpoint with canned replies, for load tests"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', type=float, default=0.5, help='Seconds before the first token')
+        parser.add_argument('--jitter', type=float, default=0.2,
+                            help='Spread of the latency, as a fraction either side of it')
+        parser.add_argument('--tokens-per-second', type=float, default=50.0, help='Generation speed after the first token')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with a 503')
+        parser.add_argument('--responses', help='JSON list of {"match": ..., "response": ...} tried before the built-in replies')
+
+    def handle(self, *args, **options):
+        if options['tokens_per_second'] <= 0:
+            raise CommandError('--tokens-per-second must be positive.')
+        rules = []
+        if options['responses']:
+            try:
+                rules = fake_openai.load_rules(options['responses'])
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Could not read {options["responses"]}: {e}')
+
+        server = fake_openai.FakeOpenAIServer(
+            (options['host'], options['port']),
+            latency=options['latency'],
+            jitter=options['jitter'],
+            tokens_per_second=options['tokens_per_second'],
+            error_rate=options['error_rate'],
+            rules=rules,
+        )
+        # serve_forever() blocks, so shut down from another thread
+        stop = lambda signum, frame: threading.Thread(target=server.shutdown).start()
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        host, port = server.server_address[:2]
+        self.stdout.write(f'Fake OpenAI API on http://{host}:{port}/v1 '
+                          f"({options['latency']}s to first token, {options['tokens_per_second']:g} tokens/s)")
+        self.stdout.write(f'Run the project with OPENAI_BASE_URL=http://{host}:{port}/v1 and any OPENAI_API_KEY')
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+        stats = server.stats
+        self.stdout.write(f"Fake OpenAI API stopped after {stats['requests']} requests "
+                          f"({stats['errors']} simulated errors, {stats['disconnects']} disconnects)")
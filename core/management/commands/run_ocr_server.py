@@ -0,0 +1,43 @@
+import os
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import ocr, ocr_server
+
+
+class Command(BaseCommand):
+    help = "Serve OCR for every web worker from one process over a Unix socket"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', default=settings.OCR_SERVER_SOCKET,
+                            help='Path of the Unix socket (defaults to OCR_SERVER_SOCKET)')
+        parser.add_argument('--workers', type=int, default=settings.OCR_POOL_SIZE,
+                            help='Readers loaded, and so concurrent inferences (defaults to OCR_POOL_SIZE)')
+        parser.add_argument('--no-warmup', action='store_true',
+                            help='Load the readers on the first request instead of at startup')
+
+    def handle(self, *args, **options):
+        if not options['socket']:
+            raise CommandError('Set OCR_SERVER_SOCKET or pass --socket.')
+
+        ocr.run_locally()
+        settings.OCR_POOL_SIZE = max(1, options['workers'])
+        if not options['no_warmup']:
+            ocr.warm_up()
+
+        server = ocr_server.create_server(options['socket'])
+        # serve_forever() blocks, so shut down from another thread
+        stop = lambda signum, frame: threading.Thread(target=server.shutdown).start()
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        self.stdout.write(f"OCR server listening on {options['socket']} with {settings.OCR_POOL_SIZE} reader(s)")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            os.unlink(options['socket'])
+        self.stdout.write('OCR server stopped')
@@ -0,0 +1,46 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = "Process queued bill and payslip OCR jobs from the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help='Requeue running jobs older than this many seconds')
+        parser.add_argument('--max-attempts', type=int, default=3,
+                            help='Fail a job after this many interrupted runs')
+        parser.add_argument('--once', action='store_true',
+                            help='Drain the queue and exit instead of polling forever')
+
+    def handle(self, *args, **options):
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        self.stdout.write('OCR worker started')
+        while not self._stopping:
+            jobs.requeue_stale_jobs(options['stale_after'], options['max_attempts'])
+
+            job = jobs.claim_next_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            started = time.monotonic()
+            job = jobs.run_job(job)
+            self.stdout.write(f'{job.kind} job {job.pk}: {job.status} in {time.monotonic() - started:.1f}s')
+
+        self.stdout.write('OCR worker stopped')
+
+    def _stop(self, signum, frame):
+        # Finish the job in hand, then exit
+        self._stopping = True
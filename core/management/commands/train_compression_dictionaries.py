@@ -0,0 +1,107 @@
+import random
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from core import bench, compression
+from core.compression import CompressedTextField
+
+
+def compressed_fields():
+    """{dictionary name: [(model, field), ...]} for every CompressedTextField"""
+    fields = {}
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, CompressedTextField):
+                fields.setdefault(field.dictionary, []).append((model, field))
+    return fields
+
+
+def seeded_samples(count):
+    """{field name: [values]} from generated audits and loan applications"""
+    rng = random.Random(1)
+    now = timezone.now()
+    samples = {}
+    for n in range(count):
+        for _, payload in (bench.sample_audit(rng, n, now), bench.sample_loan(rng, n, now)):
+            for name, value in payload.items():
+                samples.setdefault(name, []).append(value)
+    return samples
+
+
+class Command(BaseCommand):
+    help = ("Train a new version of the shared zlib dictionaries of the compressed text fields "
+            "from the stored values or, with --recompress, rewrite the stored values with the "
+            "newest dictionaries already shipped in core/dictionaries")
+
+    def add_arguments(self, parser):
+        parser.add_argument('dictionaries', nargs='*', help='Dictionaries to train (default: all)')
+        parser.add_argument('--samples', type=int, default=2000, help='Newest values to train each dictionary on')
+        parser.add_argument('--min-samples', type=int, default=100,
+                            help='Skip dictionaries with fewer stored values than this')
+        parser.add_argument('--seeded', action='store_true',
+                            help='Train on generated bills and payslips instead of the stored values')
+        parser.add_argument('--recompress', action='store_true',
+                            help='Instead of training, rewrite the stored values with the newest shipped dictionaries')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        fields = compressed_fields()
+        names = options['dictionaries'] or sorted(fields)
+        unknown = set(names) - set(fields)
+        if unknown:
+            raise CommandError(f"Unknown dictionaries: {', '.join(sorted(unknown))}")
+
+        if options['recompress']:
+            if options['seeded']:
+                raise CommandError('--recompress does not train; run it without --seeded')
+            # A dictionary trained by this run exists only on this machine until it is committed and
+            # deployed: rows compressed with it could not be read anywhere else, or after a redeploy
+            for name in names:
+                version, dictionary = compression.latest_dictionary(name)
+                if not dictionary:
+                    self.stdout.write(f'{name}: no dictionary shipped yet, skipped')
+                    continue
+                self.stdout.write(f'{name}: recompressing with version {version}')
+                for model, field in fields[name]:
+                    self._recompress(model, field, options['batch_size'])
+            return
+
+        generated = seeded_samples(options['samples']) if options['seeded'] else None
+        trained = []
+        for name in names:
+            if generated is not None:
+                samples = [value for _, field in fields[name] for value in generated.get(field.name, [])]
+            else:
+                samples = []
+                for model, field in fields[name]:
+                    values = model.objects.exclude(**{f'{field.name}__isnull': True}).order_by('-pk')
+                    samples.extend(value for value in values.values_list(field.name, flat=True)[:options['samples']]
+                                   if value)
+            if len(samples) < options['min_samples']:
+                self.stdout.write(f'{name}: only {len(samples)} values, skipped')
+                continue
+
+            previous = compression.latest_dictionary(name)[1]
+            dictionary = compression.train_dictionary(samples)
+            raw = sum(len(sample.encode()) for sample in samples)
+            before = sum(len(compression.compress(sample, previous)) for sample in samples)
+            after = sum(len(compression.compress(sample, dictionary)) for sample in samples)
+            path = compression.save_dictionary(name, dictionary)
+            trained.append(path.name)
+            self.stdout.write(f'{name}: {len(dictionary):,} bytes from {len(samples):,} values, '
+                              f'{raw / max(before, 1):.1f}x -> {raw / max(after, 1):.1f}x, written to {path.name}')
+
+        if trained:
+            self.stdout.write(f"Commit and deploy {', '.join(trained)}, then run this command with --recompress "
+                              "to rewrite the stored values with them")
+
+    def _recompress(self, model, field, batch_size):
+        pks = list(model.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(pks), batch_size):
+            with transaction.atomic():
+                rows = list(model.objects.filter(pk__in=pks[start:start + batch_size]).only(field.name))
+                model.objects.bulk_update(rows, [field.name])
+        self.stdout.write(f'  recompressed {len(pks):,} {model._meta.verbose_name_plural} ({field.name})')
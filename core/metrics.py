@@ -0,0 +1,51 @@
+"""
+In-process counters and timings for the OCR and LLM pipelines.
+
+Each worker process keeps its own numbers; ``/metrics/`` shows the ones of the
+worker that serves the request.
+"""
+import threading
+from collections import defaultdict
+
+_lock = threading.Lock()
+_counters = defaultdict(float)
+_timings = defaultdict(lambda: {'count': 0, 'total': 0.0, 'max': 0.0})
+
+
+def incr(name, amount=1):
+    with _lock:
+        _counters[name] += amount
+
+
+def observe(name, seconds):
+    """Record one duration, in seconds"""
+    with _lock:
+        timing = _timings[name]
+        timing['count'] += 1
+        timing['total'] += seconds
+        timing['max'] = max(timing['max'], seconds)
+
+
+def mean(name, default=None):
+    with _lock:
+        timing = _timings.get(name)
+        if not timing or not timing['count']:
+            return default
+        return timing['total'] / timing['count']
+
+
+def snapshot():
+    with _lock:
+        return {
+            'counters': dict(_counters),
+            'timings': {
+                name: {**timing, 'mean': timing['total'] / timing['count'] if timing['count'] else 0.0}
+                for name, timing in _timings.items()
+            },
+        }
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _timings.clear()
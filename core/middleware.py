@@ -0,0 +1,17 @@
+from django.core.handlers.asgi import ASGIRequest
+from django.utils.deprecation import MiddlewareMixin
+
+from . import llm
+
+
+class LLMEndpointMiddleware(MiddlewareMixin):
+    """
+    Tag OpenAI calls made while serving a request with its URL route, for the
+    token report, and tell the gateway whether async views get an event loop
+    per request (WSGI) or share a long-lived one (ASGI).
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Not reset afterwards: streamed responses make their calls after the view returns
+        llm.endpoint.set('/' + request.resolver_match.route)
+        llm.loop_per_request.set(not isinstance(request, ASGIRequest))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OCRCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('variant', models.CharField(help_text='OCR settings the result was produced with', max_length=100)),
+                ('result', models.JSONField()),
+                ('size_bytes', models.PositiveIntegerField(default=0)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'OCR cache entry',
+                'verbose_name_plural': 'OCR cache entries',
+                'constraints': [models.UniqueConstraint(fields=('content_hash', 'variant'), name='core_ocrcache_key_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_llmcacheentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMCall',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('template', models.CharField(help_text='Prompt template and version', max_length=100)),
+                ('endpoint', models.CharField(blank=True, help_text='URL route that made the call', max_length=200)),
+                ('model', models.CharField(max_length=50)),
+                ('prompt_tokens', models.PositiveIntegerField(default=0)),
+                ('cached_prompt_tokens', models.PositiveIntegerField(default=0, help_text="Prompt tokens served from OpenAI's prefix cache")),
+                ('completion_tokens', models.PositiveIntegerField(default=0)),
+                ('from_cache', models.BooleanField(default=False, help_text='Answered from the response cache without calling OpenAI')),
+                ('latency_ms', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'LLM call',
+                'verbose_name_plural': 'LLM calls',
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:24
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_llmcall'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InFlightRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('owner', models.CharField(help_text='Host and process id of the worker doing the work', max_length=100)),
+                ('result', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'In-flight request',
+                'verbose_name_plural': 'In-flight requests',
+            },
+        ),
+    ]
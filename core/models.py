@@ -1,3 +1,132 @@
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
-# Create your models here.
+
+class OCRJob(models.Model):
+    """An uploaded bill or payslip waiting to be OCR'd and analysed by the worker"""
+    KIND_BILL = 'bill'
+    KIND_PAYSLIP = 'payslip'
+    KIND_CHOICES = [
+        (KIND_BILL, 'Electricity bill'),
+        (KIND_PAYSLIP, 'Payslip'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='ocr_jobs')
+    image = models.ImageField(upload_to='ocr_jobs/')
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='core_ocrjob_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} job {self.id} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+
+class OCRCacheEntry(models.Model):
+    """Stored ``readtext`` output for an image, keyed by the SHA-256 of its bytes"""
+    content_hash = models.CharField(max_length=64)
+    variant = models.CharField(max_length=100, help_text="OCR settings the result was produced with")
+    result = models.JSONField()
+    size_bytes = models.PositiveIntegerField(default=0)
+    hits = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_hash', 'variant'], name='core_ocrcache_key_unique'),
+        ]
+        verbose_name = 'OCR cache entry'
+        verbose_name_plural = 'OCR cache entries'
+
+    def __str__(self):
+        return f"{self.content_hash[:12]} ({self.variant})"
+
+
+class LLMCacheEntry(models.Model):
+    """Stored chat completion, keyed by a hash of the model, template version and inputs"""
+    key = models.CharField(max_length=64, unique=True)
+    template = models.CharField(max_length=100, help_text="Prompt template and version")
+    model = models.CharField(max_length=50)
+    response = models.TextField()
+    size_bytes = models.PositiveIntegerField(default=0)
+    hits = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'LLM cache entry'
+        verbose_name_plural = 'LLM cache entries'
+
+    def __str__(self):
+        return f"{self.template} ({self.key[:12]})"
+
+
+class LLMCall(models.Model):
+    """Token usage of one chat completion, or of a reply served from the response cache"""
+    template = models.CharField(max_length=100, help_text="Prompt template and version")
+    endpoint = models.CharField(max_length=200, blank=True, help_text="URL route that made the call")
+    model = models.CharField(max_length=50)
+    prompt_tokens = models.PositiveIntegerField(default=0)
+    cached_prompt_tokens = models.PositiveIntegerField(default=0, help_text="Prompt tokens served from OpenAI's prefix cache")
+    completion_tokens = models.PositiveIntegerField(default=0)
+    from_cache = models.BooleanField(default=False, help_text="Answered from the response cache without calling OpenAI")
+    latency_ms = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'LLM call'
+        verbose_name_plural = 'LLM calls'
+
+    def __str__(self):
+        return f"{self.template} via {self.endpoint or '-'} ({self.prompt_tokens}+{self.completion_tokens} tokens)"
+
+
+class InFlightRequest(models.Model):
+    """Claim on a request being computed, shared by identical requests in other workers (see core/singleflight.py)"""
+    key = models.CharField(max_length=64, unique=True)
+    owner = models.CharField(max_length=100, help_text="Host and process id of the worker doing the work")
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'In-flight request'
+        verbose_name_plural = 'In-flight requests'
+
+    def __str__(self):
+        return f"{self.key[:12]} ({'done' if self.finished_at else 'running'} on {self.owner})"
@@ -0,0 +1,253 @@
+"""
+Process-wide EasyOCR engine pool shared by green_audit and green_loan.
+
+Loading the EasyOCR detector and recognizer weights takes several seconds, so
+readers are created once per process and handed out from a small pool. The
+pool size and the torch thread count are coordinated so that concurrent
+inferences do not oversubscribe the CPU.
+
+When ``settings.OCR_SERVER_SOCKET`` is set, the functions below forward to
+the standalone OCR server (see core/ocr_server.py) and this process never
+loads the models.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_MODES = ('fp32', 'int8', 'torchscript')
+
+_pool = None
+_pool_lock = threading.Lock()
+# Set inside the OCR server itself so it runs inference instead of forwarding
+_serve_locally = False
+
+
+def run_locally():
+    """Run inference in this process even if an OCR server is configured"""
+    global _serve_locally
+    _serve_locally = True
+
+
+def _use_server():
+    return bool(settings.OCR_SERVER_SOCKET) and not _serve_locally
+
+
+def _configure_torch():
+    """Split the available cores between the readers in the pool"""
+    import torch
+
+    threads = settings.OCR_TORCH_THREADS
+    if not threads:
+        threads = max(1, (os.cpu_count() or 1) // max(1, settings.OCR_POOL_SIZE))
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Can only be set once, before any parallel work has started
+        pass
+    logger.info('OCR pool: %s reader(s), %s torch thread(s) each, %s inference',
+                settings.OCR_POOL_SIZE, threads, settings.OCR_INFERENCE_MODE)
+
+
+def _freeze_detector(detector):
+    """
+    Trace the CRAFT detector to TorchScript and freeze it for inference.
+
+    Freezing folds batch norms into the convolutions and drops the Python
+    overhead of eager mode. The traced graph is checked against eager mode on
+    a second image size; if anything differs the eager detector is kept.
+    """
+    import torch
+
+    if settings.OCR_USE_GPU:
+        logger.warning('TorchScript OCR mode is CPU-only; keeping the eager detector')
+        return detector
+
+    detector.eval()
+    try:
+        with torch.no_grad():
+            traced = torch.jit.trace(detector, torch.rand(1, 3, 640, 640), check_trace=False)
+            frozen = torch.jit.optimize_for_inference(torch.jit.freeze(traced))
+
+            sample = torch.rand(1, 3, 480, 736)
+            expected, _ = detector(sample)
+            actual, _ = frozen(sample)
+            if expected.shape != actual.shape or not torch.allclose(expected, actual, atol=1e-3):
+                raise ValueError('frozen detector output differs from eager mode')
+    except Exception:
+        logger.exception('Could not freeze the OCR detector; keeping the eager detector')
+        return detector
+    return frozen
+
+
+def create_reader(mode=None):
+    """
+    Build an EasyOCR reader in the given inference mode.
+
+    ``fp32`` runs both networks unquantized. ``int8`` is EasyOCR's own default
+    on CPU: dynamic int8 quantization of the recognizer's LSTM and linear
+    layers (the convolutional detector is unaffected). ``torchscript`` is
+    ``int8`` plus a frozen TorchScript detector.
+    """
+    import easyocr
+
+    mode = mode or settings.OCR_INFERENCE_MODE
+    if mode not in INFERENCE_MODES:
+        raise ImproperlyConfigured(
+            f"OCR_INFERENCE_MODE must be one of {', '.join(INFERENCE_MODES)}, not {mode!r}."
+        )
+
+    reader = easyocr.Reader(settings.OCR_LANGUAGES, gpu=settings.OCR_USE_GPU, quantize=mode != 'fp32')
+    if mode == 'torchscript':
+        reader.detector = _freeze_detector(reader.detector)
+    return reader
+
+
+class EnginePool:
+    """A bounded pool of OCR readers, created lazily up to ``size``"""
+
+    def __init__(self, size, factory):
+        self.size = max(1, size)
+        self._factory = factory
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+
+        if create:
+            try:
+                return self._factory()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError('No OCR engine became available in time.')
+
+    def release(self, engine):
+        self._idle.put(engine)
+
+    @contextmanager
+    def engine(self, timeout=None):
+        reader = self.acquire(timeout=timeout)
+        try:
+            yield reader
+        finally:
+            self.release(reader)
+
+    def fill(self):
+        """Create every reader up front so no request pays the load cost"""
+        engines = [self.acquire() for _ in range(self.size)]
+        for engine in engines:
+            self.release(engine)
+        return engines
+
+
+def get_pool():
+    """Return the process-wide engine pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _configure_torch()
+                _pool = EnginePool(settings.OCR_POOL_SIZE, create_reader)
+    return _pool
+
+
+def readtext(image, **kwargs):
+    """Run ``Reader.readtext`` on a pooled reader"""
+    if _use_server():
+        from . import ocr_server
+
+        return ocr_server.call('readtext', [image], kwargs)
+
+    with get_pool().engine(timeout=settings.OCR_ACQUIRE_TIMEOUT) as reader:
+        started = time.perf_counter()
+        result = reader.readtext(image, **kwargs)
+    metrics.observe('ocr.readtext', time.perf_counter() - started)
+    return result
+
+
+def pad_to_common_size(images):
+    """Pad images with white to the largest height and width among them"""
+    import numpy as np
+
+    height = max(image.shape[0] for image in images)
+    width = max(image.shape[1] for image in images)
+    padded = []
+    for image in images:
+        canvas = np.full((height, width) + image.shape[2:], 255, dtype=image.dtype)
+        canvas[:image.shape[0], :image.shape[1]] = image
+        padded.append(canvas)
+    return padded
+
+
+def readtext_batched(images, **kwargs):
+    """
+    OCR several decoded images in one batched pass on a pooled reader.
+
+    EasyOCR batches only images of equal size. Smaller images are padded at
+    the bottom and right rather than stretched, so each image's boxes stay
+    in its own coordinates.
+    """
+    if not images:
+        return []
+    if len({image.ndim for image in images}) > 1:
+        raise ValueError('Batched images must all be grayscale or all colour.')
+
+    kwargs.setdefault('batch_size', settings.OCR_BATCH_SIZE)
+    if _use_server():
+        from . import ocr_server
+
+        return ocr_server.call('readtext_batched', images, kwargs)
+
+    with get_pool().engine(timeout=settings.OCR_ACQUIRE_TIMEOUT) as reader:
+        started = time.perf_counter()
+        results = reader.readtext_batched(pad_to_common_size(images), **kwargs)
+    elapsed = time.perf_counter() - started
+    metrics.observe('ocr.readtext_batched', elapsed)
+    metrics.incr('ocr.batched_images', len(images))
+    return results
+
+
+def warm_up():
+    """Load every reader in the pool and run one inference through each"""
+    if _use_server():
+        # The models live in the OCR server; just check that it is up
+        from . import ocr_server
+
+        logger.info('Using OCR server %s', ocr_server.ping())
+        return
+
+    import cv2
+    import numpy as np
+
+    sample = np.full((64, 320, 3), 255, dtype=np.uint8)
+    cv2.putText(sample, 'CEB 1234', (10, 45), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2)
+
+    for reader in get_pool().fill():
+        reader.readtext(sample)
+    logger.info('OCR pool warmed up')
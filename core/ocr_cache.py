@@ -0,0 +1,165 @@
+"""
+Content-hash cache for OCR results.
+
+Re-uploads of the same bill or payslip are common, so ``readtext`` output is
+stored against the SHA-256 of the uploaded bytes, together with a variant
+string describing the OCR settings. The table is shared by every worker
+process. It is bounded by ``OCR_CACHE_MAX_BYTES`` and evicts the least
+recently used entries first.
+"""
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from . import ocr, preprocess, quality
+from .models import OCRCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+def image_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def ocr_variant(**kwargs):
+    """Describe the settings an OCR result depends on"""
+    parts = ['+'.join(settings.OCR_LANGUAGES), f'mode={settings.OCR_INFERENCE_MODE}', preprocess.signature()]
+    parts.extend(f'{key}={kwargs[key]}' for key in sorted(kwargs))
+    return ';'.join(parts)
+
+
+def to_json(result):
+    """EasyOCR result as plain lists, as cached here and sent by the OCR server"""
+    return [
+        [[[float(x), float(y)] for x, y in box], str(text), float(confidence)]
+        for box, text, confidence in result
+    ]
+
+
+def from_json(rows):
+    """The (box, text, confidence) tuples of a result read back from ``to_json`` form"""
+    return [(box, text, confidence) for box, text, confidence in rows]
+
+
+def get(digest, variant):
+    """Return the cached result for an image, or None"""
+    entry = OCRCacheEntry.objects.filter(content_hash=digest, variant=variant).only('pk', 'result').first()
+    if entry is None:
+        return None
+    OCRCacheEntry.objects.filter(pk=entry.pk).update(hits=F('hits') + 1, last_used_at=timezone.now())
+    return from_json(entry.result)
+
+
+def put(digest, variant, result):
+    """Store a ``readtext`` result and evict old entries past the size limit"""
+    rows = to_json(result)
+    try:
+        OCRCacheEntry.objects.create(
+            content_hash=digest,
+            variant=variant,
+            result=rows,
+            size_bytes=len(json.dumps(rows)),
+        )
+    except IntegrityError:
+        # Another worker stored the same image first
+        return
+    evict()
+
+
+def evict(max_bytes=None):
+    """Delete least recently used entries until the cache fits in ``max_bytes``"""
+    if max_bytes is None:
+        max_bytes = settings.OCR_CACHE_MAX_BYTES
+    total = OCRCacheEntry.objects.aggregate(total=Sum('size_bytes'))['total'] or 0
+    excess = total - max_bytes
+    if excess <= 0:
+        return 0
+
+    doomed = []
+    for pk, size in OCRCacheEntry.objects.order_by('last_used_at').values_list('pk', 'size_bytes').iterator():
+        doomed.append(pk)
+        excess -= size
+        if excess <= 0:
+            break
+    deleted, _ = OCRCacheEntry.objects.filter(pk__in=doomed).delete()
+    logger.info('OCR cache evicted %s entries', deleted)
+    return deleted
+
+
+def _prepare(data, image=None):
+    if image is None:
+        image = preprocess.decode_image(data)
+    quality.enforce(image)
+    image, timings = preprocess.preprocess(image)
+    logger.info('OCR preprocessing took %s ms: %s', round(sum(timings.values()), 2), timings)
+    return image
+
+
+def _run_ocr(data, image, **kwargs):
+    return ocr.readtext(_prepare(data, image), **kwargs)
+
+
+def cached_readtext(data, image=None, **kwargs):
+    """
+    OCR an uploaded image, reusing the stored result for identical bytes.
+
+    ``image`` is the already decoded image, if the caller has one; otherwise
+    the bytes are decoded in memory on a cache miss.
+    """
+    if not settings.OCR_CACHE_ENABLED:
+        return _run_ocr(data, image, **kwargs)
+
+    digest = image_digest(data)
+    variant = ocr_variant(**kwargs)
+    result = get(digest, variant)
+    if result is not None:
+        return result
+
+    result = _run_ocr(data, image, **kwargs)
+    put(digest, variant, result)
+    return result
+
+
+def cached_readtext_many(datas, **kwargs):
+    """
+    OCR several uploads at once, running every cache miss through one batched
+    EasyOCR pass.
+
+    Returns one ``(result, error)`` pair per upload, in order. ``error`` is
+    the ImageQualityError or ValueError that stopped an upload; the others
+    still get processed.
+    """
+    variant = ocr_variant(**kwargs)
+    use_cache = settings.OCR_CACHE_ENABLED
+    outcomes = [None] * len(datas)
+    misses = []
+
+    for index, data in enumerate(datas):
+        digest = image_digest(data)
+        result = get(digest, variant) if use_cache else None
+        if result is not None:
+            outcomes[index] = (result, None)
+            continue
+        try:
+            misses.append((index, digest, _prepare(data)))
+        except ValueError as e:
+            # Undecodable or rejected by the quality gate
+            outcomes[index] = (None, e)
+
+    # A batch takes only grayscale or only colour images: one pass for each kind
+    groups = {}
+    for miss in misses:
+        groups.setdefault(miss[2].shape[2:], []).append(miss)
+    for group in groups.values():
+        results = ocr.readtext_batched([image for _, _, image in group], **kwargs)
+        for (index, digest, _), result in zip(group, results):
+            if use_cache:
+                put(digest, variant, result)
+            outcomes[index] = (result, None)
+
+    return outcomes
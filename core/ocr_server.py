@@ -0,0 +1,163 @@
+"""
+Standalone OCR server on a local Unix socket.
+
+Every gunicorn worker that runs EasyOCR itself holds its own copy of the
+models. When ``settings.OCR_SERVER_SOCKET`` is set, ``core.ocr`` sends images
+here instead, and only the ``run_ocr_server`` process loads the models. Its
+concurrency is the size of its own engine pool.
+
+Each message is two big-endian lengths followed by a JSON header and a body.
+Requests carry decoded images as raw array bytes, described in the header;
+responses carry the results in the header and an empty body.
+"""
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import time
+
+from django.conf import settings
+
+from . import metrics
+from .lazy import LazyModule
+from .ocr_cache import from_json, to_json
+
+np = LazyModule('numpy')
+
+logger = logging.getLogger(__name__)
+
+_PREFIX = struct.Struct('!II')
+
+
+class OCRServerError(RuntimeError):
+    """The OCR server could not be reached or failed to process a request"""
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError('OCR server connection closed mid-message.')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def send_message(sock, header, body=b''):
+    data = json.dumps(header).encode()
+    sock.sendall(_PREFIX.pack(len(data), len(body)) + data)
+    if body:
+        sock.sendall(body)
+
+
+def recv_message(sock):
+    header_size, body_size = _PREFIX.unpack(_recv_exactly(sock, _PREFIX.size))
+    header = json.loads(_recv_exactly(sock, header_size))
+    return header, _recv_exactly(sock, body_size)
+
+
+def pack_images(images):
+    specs = [{'shape': list(image.shape), 'dtype': str(image.dtype)} for image in images]
+    return specs, b''.join(np.ascontiguousarray(image).tobytes() for image in images)
+
+
+def unpack_images(specs, body):
+    images = []
+    offset = 0
+    for spec in specs:
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape']))
+        images.append(np.frombuffer(body, dtype=dtype, count=count, offset=offset).reshape(spec['shape']))
+        offset += count * dtype.itemsize
+    return images
+
+
+# Client side
+
+def call(op, images, kwargs):
+    """Send one request to the OCR server and return its decoded result"""
+    specs, body = pack_images(images)
+    started = time.perf_counter()
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(settings.OCR_SERVER_TIMEOUT)
+            sock.connect(settings.OCR_SERVER_SOCKET)
+            send_message(sock, {'op': op, 'images': specs, 'kwargs': kwargs}, body)
+            header, _ = recv_message(sock)
+    except OSError as e:
+        metrics.incr('ocr_server.client_errors')
+        raise OCRServerError(f'OCR server at {settings.OCR_SERVER_SOCKET} is unavailable: {e}') from e
+    metrics.observe(f'ocr_server.{op}', time.perf_counter() - started)
+
+    if 'error' in header:
+        raise OCRServerError(header['error'])
+    if op == 'readtext_batched':
+        return [from_json(rows) for rows in header['result']]
+    return from_json(header['result'])
+
+
+def ping():
+    """Check that the OCR server is up and describe it"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(5)
+            sock.connect(settings.OCR_SERVER_SOCKET)
+            send_message(sock, {'op': 'ping'})
+            header, _ = recv_message(sock)
+    except OSError as e:
+        raise OCRServerError(f'OCR server at {settings.OCR_SERVER_SOCKET} is unavailable: {e}') from e
+    return header
+
+
+# Server side
+
+class OCRRequestHandler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        from . import ocr
+
+        try:
+            header, body = recv_message(self.request)
+        except (ConnectionError, ValueError) as e:
+            logger.warning('Dropped malformed OCR request: %s', e)
+            return
+
+        op = header.get('op')
+        try:
+            if op == 'ping':
+                response = {'result': 'pong', 'pid': os.getpid(), 'pool_size': ocr.get_pool().size}
+            elif op == 'readtext':
+                image, = unpack_images(header['images'], body)
+                response = {'result': to_json(ocr.readtext(image, **header.get('kwargs', {})))}
+            elif op == 'readtext_batched':
+                images = unpack_images(header['images'], body)
+                results = ocr.readtext_batched(images, **header.get('kwargs', {}))
+                response = {'result': [to_json(result) for result in results]}
+            else:
+                response = {'error': f'Unknown operation: {op!r}'}
+        except Exception as e:
+            logger.exception('OCR server request failed')
+            response = {'error': str(e)}
+
+        try:
+            send_message(self.request, response)
+        except OSError:
+            logger.warning('OCR client went away before the response was sent')
+
+
+class OCRServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    # Each connection gets a thread that waits for a free reader; allow bursts of clients
+    request_queue_size = 64
+
+
+def create_server(path):
+    """Bind the server to ``path``, replacing a socket left by a previous run"""
+    if os.path.exists(path):
+        os.unlink(path)
+    server = OCRServer(path, OCRRequestHandler)
+    os.chmod(path, 0o660)
+    return server
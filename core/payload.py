@@ -0,0 +1,66 @@
+"""
+One-to-one payload tables for the heavy text of history rows.
+
+The bill audits and loan applications carry multi-KB OCR text and LLM
+output that only the detail and admin change pages show. Those columns live
+in a separate ``<Model>Payload`` table, linked by a one-to-one ``payload``
+relation, so the history lists read narrow rows. The model derives from
+``PayloadModel``, lists the moved fields in ``PAYLOAD_FIELDS`` and exposes
+each one with ``payload_field``. They are passed to the constructor and
+``create`` and assigned like ordinary fields, and ``save`` writes them to
+the payload row in the same transaction. ``bulk_create`` and ``update`` do
+not reach the payload table.
+"""
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import models, router, transaction
+
+
+class PayloadQuerySet(models.QuerySet):
+    def with_payload(self):
+        """Join the payload in, for pages that show the text"""
+        return self.select_related('payload')
+
+
+def _payload(instance):
+    """The instance's payload row, loaded on first access, or a new one if it has none yet"""
+    related = type(instance).payload.related
+    try:
+        return instance.payload
+    except ObjectDoesNotExist:
+        payload = related.related_model(**{related.field.name: instance})
+        related.set_cached_value(instance, payload)
+        return payload
+
+
+def payload_field(name, default=''):
+    """Attribute for a payload column; loads the payload row on first access"""
+    def get(self):
+        try:
+            return getattr(self.payload, name)
+        except ObjectDoesNotExist:
+            return default
+
+    def set(self, value):
+        setattr(_payload(self), name, value)
+        self._payload_changed = True
+
+    get.__name__ = name
+    return property(get, set)
+
+
+class PayloadModel(models.Model):
+    """Saves the payload row along with the model: always when the row is new, otherwise when its text was set"""
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = [name for name in kwargs['update_fields'] if name not in self.PAYLOAD_FIELDS]
+        if not (self._state.adding or self.__dict__.get('_payload_changed')):
+            return super().save(*args, **kwargs)
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            _payload(self).save(using=using)
+        self.__dict__.pop('_payload_changed', None)
@@ -0,0 +1,98 @@
+"""
+PDF ingestion for e-bills and bank payslips.
+
+Pages with a text layer are read directly; scanned pages are rendered and
+OCR'd in a bounded process pool. Results are merged into one text per document.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+from . import ocr_cache, pdf_worker
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def is_pdf(data):
+    return data[:1024].lstrip().startswith(b'%PDF-')
+
+
+def get_executor():
+    """Process pool shared by every PDF handled in this worker"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = max(1, settings.OCR_PDF_WORKERS)
+                torch_threads = max(1, (os.cpu_count() or 1) // workers)
+                # Forking a process that already runs torch threads can deadlock
+                _executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=pdf_worker.init_worker,
+                    initargs=(torch_threads,),
+                )
+    return _executor
+
+
+def read_pages(data):
+    """
+    Return the text of every page of a PDF, in order.
+
+    Text-layer pages are read without OCR. Scanned pages come from the OCR
+    cache or are rendered and OCR'd in parallel.
+    """
+    import pypdfium2 as pdfium
+
+    try:
+        document = pdfium.PdfDocument(data)
+    except pdfium.PdfiumError as e:
+        raise ValueError('The uploaded file is not a readable PDF.') from e
+
+    try:
+        page_count = len(document)
+        if page_count > settings.OCR_PDF_MAX_PAGES:
+            raise ValueError(f'PDFs are limited to {settings.OCR_PDF_MAX_PAGES} pages.')
+
+        texts = []
+        for index in range(page_count):
+            textpage = document[index].get_textpage()
+            texts.append(textpage.get_text_bounded().replace('\r\n', '\n').strip())
+    finally:
+        document.close()
+
+    scanned = [index for index, text in enumerate(texts) if len(text) < settings.OCR_PDF_MIN_TEXT_CHARS]
+    if not scanned:
+        return texts
+
+    dpi = settings.OCR_PDF_DPI
+    digest = ocr_cache.image_digest(data)
+    pending = {}
+    for index in scanned:
+        variant = f'{ocr_cache.ocr_variant()};pdf-page={index};dpi={dpi}'
+        result = ocr_cache.get(digest, variant) if settings.OCR_CACHE_ENABLED else None
+        if result is not None:
+            texts[index] = ' '.join(text for _, text, _ in result)
+        else:
+            pending[index] = (variant, get_executor().submit(pdf_worker.ocr_page, data, index, dpi))
+
+    for index, (variant, future) in pending.items():
+        rows = future.result()
+        if settings.OCR_CACHE_ENABLED:
+            ocr_cache.put(digest, variant, ocr_cache.from_json(rows))
+        texts[index] = ' '.join(text for _, text, _ in rows)
+
+    logger.info('PDF with %s pages: %s read from text layer, %s OCR\'d', page_count, page_count - len(scanned), len(pending))
+    return texts
+
+
+def extract_text(data):
+    """Merged text of all pages of a PDF"""
+    return '\n'.join(text for text in read_pages(data) if text)
@@ -0,0 +1,36 @@
+"""
+Functions run inside the PDF OCR process pool.
+
+Spawned workers unpickle these by importing this module before Django is set
+up, so it must not import models or settings at module level.
+"""
+import os
+
+
+def init_worker(torch_threads):
+    # Configure a one-reader OCR pool that shares the cores with its
+    # siblings, then load Django
+    os.environ['OCR_POOL_SIZE'] = '1'
+    os.environ['OCR_TORCH_THREADS'] = str(torch_threads)
+    os.environ['OCR_WARMUP'] = 'False'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'MoLenerzi.settings')
+    import django
+
+    django.setup()
+
+
+def ocr_page(data, index, dpi):
+    """Render one PDF page and OCR it, returning JSON-ready rows"""
+    import pypdfium2 as pdfium
+
+    from . import ocr, ocr_cache, preprocess
+
+    document = pdfium.PdfDocument(data)
+    try:
+        bitmap = document[index].render(scale=dpi / 72)
+        image = bitmap.to_numpy().copy()
+    finally:
+        document.close()
+
+    image, _ = preprocess.preprocess(image)
+    return ocr_cache.to_json(ocr.readtext(image))
@@ -0,0 +1,80 @@
+"""
+Versioned prompt templates.
+
+Each template keeps its fixed instructions in the system message and puts
+the per-request data last, in the user message. Every call made from the
+same template therefore starts with the same tokens, which OpenAI serves
+from its prompt cache once the prefix passes 1024 tokens.
+
+Apps define their templates in a ``prompts`` module and ``register`` them.
+Bump a template's version whenever its wording changes: the version is part
+of the response cache key in core/llm_cache.py and of the usage records
+behind ``manage.py llm_token_report``.
+"""
+from django.utils.module_loading import autodiscover_modules
+
+_registry = {}
+
+
+class PromptTemplate:
+    """A named, versioned prompt with a static prefix and a per-request data block"""
+
+    def __init__(self, name, version, model, instructions, data, **params):
+        self.name = name
+        self.version = version
+        self.model = model
+        self.instructions = instructions.strip()
+        self.data = data.strip()
+        self.params = params
+
+    def __repr__(self):
+        return f'<PromptTemplate {self.key}>'
+
+    @property
+    def key(self):
+        return f'{self.name}:{self.version}'
+
+    def messages(self, **context):
+        return [
+            {'role': 'system', 'content': self.instructions},
+            {'role': 'user', 'content': self.data.format(**context)},
+        ]
+
+    def request(self, **context):
+        """Keyword arguments for ``llm.chat`` and friends"""
+        return {'template': self.key, 'model': self.model, 'messages': self.messages(**context), **self.params}
+
+    def prefix_tokens(self):
+        """Tokens in the static prefix shared by every call"""
+        return count_tokens(self.instructions, self.model)
+
+
+def register(template):
+    if template.name in _registry and _registry[template.name] is not template:
+        raise ValueError(f'Prompt template {template.name!r} is already registered.')
+    _registry[template.name] = template
+    return template
+
+
+def get(name):
+    if name not in _registry:
+        autodiscover_modules('prompts')
+    return _registry[name]
+
+
+def all_templates():
+    autodiscover_modules('prompts')
+    return sorted(_registry.values(), key=lambda template: template.name)
+
+
+def count_tokens(text, model='gpt-3.5-turbo'):
+    """Token count with tiktoken when it is installed, else the usual four-characters-a-token estimate"""
+    try:
+        import tiktoken
+    except ImportError:
+        return max(1, round(len(text) / 4))
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding('cl100k_base')
+    return len(encoding.encode(text))
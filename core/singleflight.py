@@ -0,0 +1,138 @@
+"""
+Coalescing of identical in-flight requests.
+
+A double-clicked Analyse button or a front-end retry would otherwise run the
+whole OCR and OpenAI pipeline again. ``arun`` runs the work once per key;
+duplicates that arrive while it is running wait for it and get the same
+result.
+
+Within a process the first caller registers a future that the others await,
+whichever thread or event loop they run on. Across worker processes the
+first caller claims the key with an ``InFlightRequest`` row; callers in
+other workers poll that row until the result is stored on it. A finished
+result is shared for ``SINGLE_FLIGHT_RESULT_TTL`` seconds, so a retry that
+lands just after the first request also gets it. If the work fails, the
+claim is dropped: waiters in the same process get the exception, and
+waiters in other workers claim the key and run the work themselves.
+Results must be JSON-serialisable.
+"""
+import asyncio
+import concurrent.futures
+import hashlib
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.utils import timezone
+
+from . import metrics
+from .models import InFlightRequest
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_flights = {}
+
+OWNER = f'{socket.gethostname()}:{os.getpid()}'
+
+
+def request_key(name, user, *parts):
+    """Key for a request: the endpoint name, the user and a hash of the inputs"""
+    digest = hashlib.sha256(name.encode())
+    digest.update(str(user.pk if user is not None and user.is_authenticated else 'anonymous').encode())
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode()
+        digest.update(b'\0' + (part or b''))
+    return digest.hexdigest()
+
+
+def _stale():
+    """Claims that can be replaced: expired results and abandoned runs"""
+    now = timezone.now()
+    return (
+        InFlightRequest.objects.filter(finished_at__lt=now - timedelta(seconds=settings.SINGLE_FLIGHT_RESULT_TTL))
+        | InFlightRequest.objects.filter(finished_at__isnull=True,
+                                         started_at__lt=now - timedelta(seconds=settings.SINGLE_FLIGHT_TIMEOUT))
+    )
+
+
+async def _claim(key):
+    """Claim ``key`` for this worker; returns (True, None), or (False, result) once another worker finishes it"""
+    deadline = time.monotonic() + settings.SINGLE_FLIGHT_TIMEOUT
+    waited = False
+    while True:
+        await _stale().filter(key=key).adelete()
+        try:
+            await InFlightRequest.objects.acreate(key=key, owner=OWNER)
+            return True, None
+        except IntegrityError:
+            pass
+
+        claim = await InFlightRequest.objects.filter(key=key).only('finished_at', 'result').afirst()
+        if claim is not None and claim.finished_at is not None:
+            metrics.incr('singleflight.shared_db' if waited else 'singleflight.reused')
+            return False, claim.result
+        if time.monotonic() > deadline:
+            # The other worker is taking too long; stop waiting and do the work here
+            logger.warning('Gave up waiting on in-flight request %s', key[:12])
+            return True, None
+        waited = True
+        await asyncio.sleep(settings.SINGLE_FLIGHT_POLL_INTERVAL)
+
+
+async def _lead(key, func, args):
+    claimed, result = await _claim(key)
+    if not claimed:
+        return result
+
+    metrics.incr('singleflight.runs')
+    try:
+        result = await func(*args)
+    except BaseException:
+        await InFlightRequest.objects.filter(key=key, owner=OWNER, finished_at__isnull=True).adelete()
+        raise
+    await InFlightRequest.objects.filter(key=key, owner=OWNER).aupdate(result=result, finished_at=timezone.now())
+    await _stale().adelete()
+    return result
+
+
+async def arun(key, func, *args):
+    """
+    Await ``func(*args)`` once for all concurrent callers with the same key.
+
+    Falls through to a plain call when ``SINGLE_FLIGHT_ENABLED`` is off.
+    """
+    if not settings.SINGLE_FLIGHT_ENABLED:
+        return await func(*args)
+
+    with _lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = concurrent.futures.Future()
+
+    if not leader:
+        metrics.incr('singleflight.shared')
+        # Shielded so that a waiter that goes away does not cancel the result for the others
+        return await asyncio.shield(asyncio.wrap_future(flight))
+
+    try:
+        result = await _lead(key, func, args)
+    except asyncio.CancelledError:
+        flight.set_exception(RuntimeError('The identical request being waited on was cancelled.'))
+        raise
+    except BaseException as e:
+        flight.set_exception(e)
+        raise
+    else:
+        flight.set_result(result)
+        return result
+    finally:
+        with _lock:
+            _flights.pop(key, None)
@@ -0,0 +1,46 @@
+"""
+Server-sent events for the long-running analysis endpoints.
+
+The browser posts with ``fetch`` and reads the response body as a stream
+(see ``postEventStream`` in static/js/main.js), so each step of the OCR and
+OpenAI pipeline reaches the page as soon as it is ready.
+"""
+import json
+
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from .aio import iterate_sync
+
+
+def sse_event(event, data):
+    """Encode one event; ``data`` is sent as JSON"""
+    return f'event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n'.encode()
+
+
+def sse_response(request, events):
+    """
+    Stream the events of ``events()``, an async generator.
+
+    Under ASGI it runs on the server's event loop. A WSGI server cannot send
+    an async iterator as it goes: Django would read it to the end before the
+    first byte left, so it is stepped through ``core.aio.iterate_sync``
+    instead. A comment line goes out first so the headers and first byte are
+    sent before any slow work starts.
+    """
+    if isinstance(request, ASGIRequest):
+        async def stream():
+            yield b': stream open\n\n'
+            async for event in events():
+                yield event
+    else:
+        def stream():
+            yield b': stream open\n\n'
+            yield from iterate_sync(events())
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
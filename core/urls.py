@@ -6,4 +6,5 @@ urlpatterns = [
     path('about/', views.about, name='about'),
     # path('courses/', views.courses, name='courses'),
     path('contact/', views.contact, name='contact'),
+    path('metrics/', views.metrics_view, name='metrics'),
 ]
@@ -1,4 +1,12 @@
-from django.shortcuts import render
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
+from django.contrib.admin.views.decorators import staff_member_required
+from django.views.decorators.csrf import csrf_exempt
+
+from . import jobs, metrics
+from .models import OCRJob
+
 
 def home(request):
     return render(request, 'home.html')
@@ -11,3 +19,69 @@ def about(request):
 
 def contact(request):
     return render(request, 'contact.html')
+
+
+@csrf_exempt
+def submit_ocr_job(request, kind):
+    """Queue an uploaded bill or payslip and return the job id straight away"""
+    if request.method != 'POST':
+        return JsonResponse({
+            'success': False,
+            'message': 'Invalid request method.'
+        }, status=405)
+
+    if 'image' not in request.FILES:
+        return JsonResponse({
+            'success': False,
+            'message': 'No image uploaded.'
+        }, status=400)
+
+    job = jobs.submit_job(kind, request.FILES['image'], request.user)
+    return JsonResponse({
+        'success': True,
+        **jobs.job_status(job),
+        'status_url': reverse(f'{kind}_job_status', args=[job.pk]),
+        'result_url': reverse(f'{kind}_job_result', args=[job.pk]),
+    }, status=202)
+
+
+def _get_job(request, kind, job_id):
+    job = get_object_or_404(OCRJob, pk=job_id, kind=kind)
+    if job.user_id is not None and job.user_id != request.user.id:
+        raise Http404('No such job.')
+    return job
+
+
+def ocr_job_status(request, kind, job_id):
+    """Poll the state of a queued OCR job"""
+    job = _get_job(request, kind, job_id)
+    return JsonResponse({'success': True, **jobs.job_status(job)})
+
+
+def ocr_job_result(request, kind, job_id):
+    """Return the analysis of a finished OCR job"""
+    job = _get_job(request, kind, job_id)
+
+    if job.status == OCRJob.STATUS_DONE:
+        return JsonResponse({'success': True, 'job_id': str(job.pk), **job.result})
+
+    if job.status == OCRJob.STATUS_FAILED:
+        return JsonResponse({
+            'success': False,
+            'message': f'Failed to process image: {job.error}',
+            **jobs.job_status(job),
+            **(job.result or {}),
+        }, status=500)
+
+    # Still queued or running
+    return JsonResponse({
+        'success': False,
+        'message': 'The job has not finished yet.',
+        **jobs.job_status(job),
+    }, status=202)
+
+
+@staff_member_required
+def metrics_view(request):
+    """OCR and quality gate counters for the worker process serving this request"""
+    return JsonResponse(metrics.snapshot())
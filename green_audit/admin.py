@@ -1,13 +1,21 @@
 from django.contrib import admin
-from .models import GreenAudit
+from .models import GreenAudit, GreenAuditPayload
 
 # Register your models here.
 
+class GreenAuditPayloadInline(admin.StackedInline):
+    model = GreenAuditPayload
+    can_delete = False
+    verbose_name = 'Analysis'
+    verbose_name_plural = 'Analysis'
+
+
 @admin.register(GreenAudit)
 class GreenAuditAdmin(admin.ModelAdmin):
     list_display = ('user', 'bill_number', 'kwh_consumption', 'total_amount', 'created_at')
     list_filter = ('created_at', 'user')
-    search_fields = ('audit_text', 'analysis_result', 'user__username', 'bill_number', 'account_number')
+    search_fields = ('user__username', 'bill_number', 'account_number')
+    inlines = [GreenAuditPayloadInline]
     readonly_fields = ('created_at', 'updated_at', 'average_daily_kwh', 'cost_per_kwh')
     date_hierarchy = 'created_at'
     
@@ -24,9 +32,6 @@ class GreenAuditAdmin(admin.ModelAdmin):
         ('Cost Data', {
             'fields': ('total_amount', 'supply_charge', 'energy_charge', 'cost_per_kwh')
         }),
-        ('Analysis', {
-            'fields': ('audit_text', 'analysis_result')
-        }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at')
         }),
@@ -0,0 +1,225 @@
+"""
+Electricity bill calculations for Mauritius households.
+
+Every figure in the bill report is computed here from the fields found by
+``extract_bill_data``, using the tables below. The LLM only writes a short
+narrative around the finished numbers.
+"""
+import math
+
+# CEB residential tariff (2024). Each tier is (upper bound in kWh, MUR per kWh);
+# the last tier has no upper bound.
+CEB_TARIFF = [
+    (50, 2.96),
+    (300, 4.17),
+    (None, 5.30),
+]
+
+MAURITIUS = {
+    'tariff': CEB_TARIFF,
+    'days_per_month': 30,
+    'average_household_kwh': 300,
+    'efficient_household_kwh': 180,
+    # Solar PV
+    'sun_hours_per_day': 5.5,
+    'system_efficiency': 0.85,
+    'panel_watts': 350,
+    'cost_per_kw': 80000,
+    'subsidy': 0.60,
+    'export_rate': 5.00,
+    'system_lifetime_years': 25,
+    # Emissions
+    'co2_kg_per_kwh': 0.79,
+    'co2_kg_per_tree_year': 21,
+    'co2_kg_per_car_km': 0.12,
+}
+
+# Action plan: (timeframe, measure, investment in MUR, subsidised share, kWh saved per month).
+# Savings below 1 are a fraction of consumption; 'solar' is the PV system sized below.
+MEASURES = [
+    ('Immediate (This Month)', 'LED bulb replacement and AC set to 24-25°C', 4000, 0, 50),
+    ('Short-term (3 months)', 'Smart power strips to cut standby power', 1500, 0, 0.065),
+    ('Medium-term (6 months)', 'Solar water heater instead of an electric geyser', 30000, 0.60, 125),
+    ('Long-term (12 months)', 'Solar PV system', None, None, 'solar'),
+    ('Ongoing', 'Energy monitoring and behavioural changes', 0, 0, 0.05),
+]
+
+
+def tier_label(index, tariff=CEB_TARIFF):
+    lower = tariff[index - 1][0] + 1 if index else 0
+    upper = tariff[index][0]
+    return f'Tier {index + 1} ({lower}-{upper} kWh)' if upper else f'Tier {index + 1} ({lower}+ kWh)'
+
+
+def tier_breakdown(kwh, tariff=CEB_TARIFF):
+    """Split a month's consumption across the tariff tiers"""
+    rows = []
+    lower = 0
+    for index, (upper, rate) in enumerate(tariff):
+        units = max(0.0, (kwh if upper is None else min(kwh, upper)) - lower)
+        if units <= 0:
+            break
+        rows.append({'tier': tier_label(index, tariff), 'kwh': units, 'rate': rate, 'cost': units * rate})
+        if upper is None:
+            break
+        lower = upper
+    return rows
+
+
+def tariff_cost(kwh, tariff=CEB_TARIFF):
+    return sum(row['cost'] for row in tier_breakdown(kwh, tariff))
+
+
+def kwh_for_cost(amount, tariff=CEB_TARIFF):
+    """Invert the tariff: the consumption that a bill amount pays for"""
+    kwh = 0.0
+    lower = 0
+    for upper, rate in tariff:
+        tier_cost = math.inf if upper is None else (upper - lower) * rate
+        if amount <= tier_cost:
+            return kwh + amount / rate
+        amount -= tier_cost
+        kwh += upper - lower
+        lower = upper
+    return kwh
+
+
+def solar_system_kw(kwh, tables=MAURITIUS):
+    """System size covering the monthly consumption, to the nearest 0.5 kW"""
+    monthly_yield_per_kw = tables['sun_hours_per_day'] * tables['days_per_month'] * tables['system_efficiency']
+    return max(0.5, round(kwh / monthly_yield_per_kw * 2) / 2)
+
+
+def calculate(bill_data, tables=MAURITIUS):
+    """
+    Compute every figure in the bill report.
+
+    Missing consumption is derived from the meter readings or the bill
+    amount, and a missing amount from the tariff. Returns None when neither
+    consumption nor amount can be determined.
+    """
+    tariff = tables['tariff']
+    days = tables['days_per_month']
+
+    kwh = bill_data.get('kwh_consumption')
+    amount = bill_data.get('total_amount')
+    previous, current = bill_data.get('previous_reading'), bill_data.get('current_reading')
+    sources = {'kwh': 'bill', 'amount': 'bill'}
+    if not kwh and previous is not None and current is not None and current > previous:
+        kwh, sources['kwh'] = current - previous, 'meter readings'
+    if not kwh and amount:
+        kwh, sources['kwh'] = kwh_for_cost(float(amount), tariff), 'estimated from the bill amount'
+    if not kwh:
+        return None
+    kwh = float(kwh)
+    if not amount:
+        amount, sources['amount'] = tariff_cost(kwh, tariff), 'estimated from the CEB tariff'
+    amount = float(amount)
+
+    # Usage
+    average = tables['average_household_kwh']
+    versus_average = (kwh - average) / average * 100
+    if versus_average > 10:
+        status = 'HIGH'
+    elif kwh < tables['efficient_household_kwh'] or versus_average < -10:
+        status = 'LOW'
+    else:
+        status = 'MODERATE'
+    tiers = tier_breakdown(kwh, tariff)
+    top_tier = tiers[-1]
+    marginal_rate = top_tier['rate']
+
+    # Solar PV
+    system_kw = solar_system_kw(kwh, tables)
+    production = system_kw * tables['sun_hours_per_day'] * days * tables['system_efficiency']
+    offset_kwh = min(production, kwh)
+    solar_savings = tariff_cost(kwh, tariff) - tariff_cost(kwh - offset_kwh, tariff)
+    surplus_kwh = max(0.0, production - kwh)
+    export_earnings = surplus_kwh * tables['export_rate']
+    investment = system_kw * tables['cost_per_kw']
+    investment_after_subsidy = investment * (1 - tables['subsidy'])
+    annual_solar_benefit = (solar_savings + export_earnings) * 12
+
+    # Emissions
+    monthly_co2 = kwh * tables['co2_kg_per_kwh']
+    annual_co2 = monthly_co2 * 12
+
+    # Action plan, valued at the marginal tariff and capped at the bill
+    measures = []
+    for timeframe, name, cost, subsidy, saving in MEASURES:
+        if saving == 'solar':
+            measures.append({
+                'timeframe': timeframe,
+                'name': f'{name} ({system_kw:g} kW)',
+                'investment': investment,
+                'investment_after_subsidy': investment_after_subsidy,
+                'kwh_saved': offset_kwh,
+                'monthly_savings': solar_savings,
+                'is_solar': True,
+            })
+            continue
+        saved_kwh = saving * kwh if saving < 1 else min(saving, kwh)
+        measures.append({
+            'timeframe': timeframe,
+            'name': name,
+            'investment': cost,
+            'investment_after_subsidy': cost * (1 - subsidy),
+            'kwh_saved': saved_kwh,
+            'monthly_savings': saved_kwh * marginal_rate,
+            'is_solar': False,
+        })
+    plan_investment = sum(m['investment_after_subsidy'] for m in measures)
+    plan_savings = min(sum(m['monthly_savings'] for m in measures), amount)
+
+    return {
+        'sources': sources,
+        'kwh': kwh,
+        'amount': amount,
+        'daily_kwh': kwh / days,
+        'average_household_kwh': average,
+        'efficient_household_kwh': tables['efficient_household_kwh'],
+        'versus_average_pct': versus_average,
+        'status': status,
+        'tiers': tiers,
+        'top_tier': top_tier['tier'],
+        'top_tier_share_pct': top_tier['kwh'] / kwh * 100,
+        'cost_per_kwh': amount / kwh,
+        'annual_cost': amount * 12,
+        'daily_cost': amount / days,
+        'savings_below_average': max(0.0, tariff_cost(kwh, tariff) - tariff_cost(min(kwh, average), tariff)),
+        'solar': {
+            'system_kw': system_kw,
+            'panels': math.ceil(system_kw * 1000 / tables['panel_watts']),
+            'panel_watts': tables['panel_watts'],
+            'investment': investment,
+            'subsidy_pct': tables['subsidy'] * 100,
+            'investment_after_subsidy': investment_after_subsidy,
+            'monthly_production_kwh': production,
+            'monthly_savings': solar_savings,
+            'bill_reduction_pct': solar_savings / amount * 100,
+            'payback_years': investment / (solar_savings * 12) if solar_savings else None,
+            'payback_with_export_years': investment / annual_solar_benefit if annual_solar_benefit else None,
+            'payback_after_subsidy_years': investment_after_subsidy / annual_solar_benefit if annual_solar_benefit else None,
+            'lifetime_years': tables['system_lifetime_years'],
+            'lifetime_net_savings': annual_solar_benefit * tables['system_lifetime_years'] - investment,
+            'surplus_kwh': surplus_kwh,
+            'export_rate': tables['export_rate'],
+            'export_earnings': export_earnings,
+        },
+        'co2': {
+            'monthly_kg': monthly_co2,
+            'annual_kg': annual_co2,
+            'trees': math.ceil(annual_co2 / tables['co2_kg_per_tree_year']),
+            'car_km': annual_co2 / tables['co2_kg_per_car_km'],
+            'solar_reduction_pct': offset_kwh / kwh * 100,
+            'solar_offset_annual_kg': offset_kwh * tables['co2_kg_per_kwh'] * 12,
+        },
+        'measures': measures,
+        'plan': {
+            'investment': plan_investment,
+            'monthly_savings': plan_savings,
+            'reduction_pct': plan_savings / amount * 100,
+            'first_year_net': plan_savings * 12 - plan_investment,
+            'five_year_net': plan_savings * 60 - plan_investment,
+        },
+    }
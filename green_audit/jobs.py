@@ -0,0 +1,9 @@
+from core.aio import run_sync
+from .views import aprocess_bill_image
+
+
+def process_bill_job(job):
+    """Worker handler for queued electricity bill uploads"""
+    with job.image.open('rb') as image_file:
+        image_bytes = image_file.read()
+    return run_sync(aprocess_bill_image, image_bytes, job.image.name, job.user, file_path=job.image.name)
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:29
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('green_audit', '0002_greenaudit_account_number_greenaudit_bill_number_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='greenaudit',
+            index=models.Index(fields=['user', '-created_at'], name='green_audit_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='greenaudit',
+            index=models.Index(fields=['-created_at'], name='green_audit_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='greenaudit',
+            index=models.Index(django.db.models.functions.text.Upper('bill_number'), name='green_audit_bill_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='greenaudit',
+            index=models.Index(django.db.models.functions.text.Upper('account_number'), name='green_audit_account_idx'),
+        ),
+    ]
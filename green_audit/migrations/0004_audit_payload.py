@@ -0,0 +1,58 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def move_text_to_payload(apps, schema_editor):
+    """Copy each audit's text columns into its payload row"""
+    GreenAudit = apps.get_model('green_audit', 'GreenAudit')
+    GreenAuditPayload = apps.get_model('green_audit', 'GreenAuditPayload')
+    rows = GreenAudit.objects.values_list('pk', 'audit_text', 'analysis_result').iterator(chunk_size=1000)
+    batch = []
+    for pk, audit_text, analysis_result in rows:
+        batch.append(GreenAuditPayload(audit_id=pk, audit_text=audit_text, analysis_result=analysis_result))
+        if len(batch) == 1000:
+            GreenAuditPayload.objects.bulk_create(batch)
+            batch = []
+    GreenAuditPayload.objects.bulk_create(batch)
+
+
+def move_text_back(apps, schema_editor):
+    GreenAudit = apps.get_model('green_audit', 'GreenAudit')
+    GreenAuditPayload = apps.get_model('green_audit', 'GreenAuditPayload')
+    for row in GreenAuditPayload.objects.values('audit_id', 'audit_text', 'analysis_result').iterator(chunk_size=1000):
+        GreenAudit.objects.filter(pk=row.pop('audit_id')).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('green_audit', '0003_history_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GreenAuditPayload',
+            fields=[
+                ('audit', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='payload', serialize=False, to='green_audit.greenaudit')),
+                ('audit_text', models.TextField(help_text='Audit details or extracted text from image')),
+                ('analysis_result', models.TextField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(move_text_to_payload, move_text_back),
+        # A default lets the column be added back to existing rows when migrating backwards
+        migrations.AlterField(
+            model_name='greenaudit',
+            name='audit_text',
+            field=models.TextField(default='', help_text='Audit details or extracted text from image'),
+        ),
+        migrations.RemoveField(
+            model_name='greenaudit',
+            name='analysis_result',
+        ),
+        migrations.RemoveField(
+            model_name='greenaudit',
+            name='audit_text',
+        ),
+    ]
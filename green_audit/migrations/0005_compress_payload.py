@@ -0,0 +1,79 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:55
+
+import core.compression
+from django.db import migrations, models
+
+
+def compress_text(apps, schema_editor):
+    """Copy the text columns into their compressed replacements"""
+    GreenAuditPayload = apps.get_model('green_audit', 'GreenAuditPayload')
+    rows = GreenAuditPayload.objects.order_by('pk').iterator(chunk_size=500)
+    batch = []
+    for row in rows:
+        row.audit_text_compressed = row.audit_text
+        row.analysis_result_compressed = row.analysis_result
+        batch.append(row)
+        if len(batch) == 500:
+            GreenAuditPayload.objects.bulk_update(batch, ['audit_text_compressed', 'analysis_result_compressed'])
+            batch = []
+    GreenAuditPayload.objects.bulk_update(batch, ['audit_text_compressed', 'analysis_result_compressed'])
+
+
+def decompress_text(apps, schema_editor):
+    GreenAuditPayload = apps.get_model('green_audit', 'GreenAuditPayload')
+    rows = GreenAuditPayload.objects.order_by('pk').iterator(chunk_size=500)
+    batch = []
+    for row in rows:
+        row.audit_text = row.audit_text_compressed
+        row.analysis_result = row.analysis_result_compressed
+        batch.append(row)
+        if len(batch) == 500:
+            GreenAuditPayload.objects.bulk_update(batch, ['audit_text', 'analysis_result'])
+            batch = []
+    GreenAuditPayload.objects.bulk_update(batch, ['audit_text', 'analysis_result'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('green_audit', '0004_audit_payload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='greenauditpayload',
+            name='audit_text_compressed',
+            field=core.compression.CompressedTextField(default=b'', dictionary='bill_text', help_text='Audit details or extracted text from image'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='greenauditpayload',
+            name='analysis_result_compressed',
+            field=core.compression.CompressedTextField(blank=True, dictionary='bill_report', null=True),
+        ),
+        migrations.RunPython(compress_text, decompress_text),
+        # A default lets the column be added back to existing rows when migrating backwards
+        migrations.AlterField(
+            model_name='greenauditpayload',
+            name='audit_text',
+            field=models.TextField(default='', help_text='Audit details or extracted text from image'),
+        ),
+        migrations.RemoveField(
+            model_name='greenauditpayload',
+            name='audit_text',
+        ),
+        migrations.RemoveField(
+            model_name='greenauditpayload',
+            name='analysis_result',
+        ),
+        migrations.RenameField(
+            model_name='greenauditpayload',
+            old_name='audit_text_compressed',
+            new_name='audit_text',
+        ),
+        migrations.RenameField(
+            model_name='greenauditpayload',
+            old_name='analysis_result_compressed',
+            new_name='analysis_result',
+        ),
+    ]
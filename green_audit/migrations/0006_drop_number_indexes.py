@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:14
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('green_audit', '0005_compress_payload'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='greenaudit',
+            name='green_audit_bill_number_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='greenaudit',
+            name='green_audit_account_idx',
+        ),
+    ]
@@ -1,13 +1,13 @@
 from django.db import models
 from django.contrib.auth.models import User
+from core.compression import CompressedTextField
+from core.payload import PayloadModel, PayloadQuerySet, payload_field
 
 # Create your models here.
 
-class GreenAudit(models.Model):
+class GreenAudit(PayloadModel):
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
-    audit_text = models.TextField(help_text="Audit details or extracted text from image")
     image = models.ImageField(upload_to='audit_images/', null=True, blank=True)
-    analysis_result = models.TextField(null=True, blank=True)
     
     # Electricity Bill Data
     bill_number = models.CharField(max_length=100, null=True, blank=True)
@@ -23,8 +23,21 @@ class GreenAudit(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Stored in GreenAuditPayload (see core/payload.py)
+    PAYLOAD_FIELDS = ('audit_text', 'analysis_result')
+    audit_text = payload_field('audit_text')
+    analysis_result = payload_field('analysis_result', None)
+    
+    objects = PayloadQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Dashboard history: filter(user=...) newest first
+            models.Index(fields=['user', '-created_at'], name='green_audit_user_created_idx'),
+            # Admin list and date hierarchy, newest first
+            models.Index(fields=['-created_at'], name='green_audit_created_idx'),
+        ]
     
     def __str__(self):
         return f"Audit by {self.user.username if self.user else 'Anonymous'} - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
@@ -42,3 +55,13 @@ class GreenAudit(models.Model):
         if self.kwh_consumption and self.total_amount and self.kwh_consumption > 0:
             return round(float(self.total_amount) / float(self.kwh_consumption), 2)
         return 0
+
+
+class GreenAuditPayload(models.Model):
+    """OCR text and report HTML of an audit, loaded only when a page shows them"""
+    audit = models.OneToOneField(GreenAudit, on_delete=models.CASCADE, primary_key=True, related_name='payload')
+    audit_text = CompressedTextField(dictionary='bill_text', help_text="Audit details or extracted text from image")
+    analysis_result = CompressedTextField(dictionary='bill_report', null=True, blank=True)
+    
+    def __str__(self):
+        return f"Payload of audit {self.audit_id}"
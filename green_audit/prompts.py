@@ -0,0 +1,36 @@
+"""OpenAI prompts for the green audit. Static instructions first, request data last (see core/prompts.py)."""
+from core.prompts import PromptTemplate, register
+
+AUDIT_ANALYSIS = register(PromptTemplate(
+    name='audit_analysis',
+    version=2,
+    model='gpt-3.5-turbo',
+    instructions='''
+You are a helpful sustainability auditor. Your job is to analyze the sustainability practices provided by a company. Based on the provided details, provide actionable insights and data analysis. Highlight areas of improvement, potential cost-saving opportunities, and sustainability metrics.
+
+Please provide actionable insights, suggestions for improvements, and overall sustainability performance analysis.
+''',
+    data='''
+The following is the company's sustainability audit data:
+
+{audit_text}
+''',
+    max_tokens=2000,
+    temperature=0.7,
+))
+
+BILL_NARRATIVE = register(PromptTemplate(
+    name='bill_narrative',
+    version=2,
+    model='gpt-3.5-turbo',
+    instructions='''
+You are a helpful energy efficiency expert specializing in Mauritius.
+
+Write a 3-4 sentence summary of a Mauritius household's electricity bill audit. Use only the figures you are given, do not calculate new ones, and return plain text without HTML or markdown.
+''',
+    data='''
+{facts}
+''',
+    max_tokens=200,
+    temperature=0.3,
+))
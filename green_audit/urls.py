@@ -1,8 +1,16 @@
 from django.urls import path
+from core import views as core_views
+from core.models import OCRJob
 from . import views
 
 urlpatterns = [
     path('', views.green_audit_view, name='green_audit'),
     path('api/analyze/', views.analyze_audit, name='analyze_audit'),
+    path('api/analyze/stream/', views.analyze_audit_stream, name='analyze_audit_stream'),
     path('api/extract-text/', views.extract_text_from_image, name='extract_text'),
+    path('api/extract-text/stream/', views.extract_text_stream, name='extract_text_stream'),
+    path('api/extract-text/batch/', views.extract_text_batch, name='extract_text_batch'),
+    path('api/jobs/', core_views.submit_ocr_job, {'kind': OCRJob.KIND_BILL}, name='submit_bill_job'),
+    path('api/jobs/<uuid:job_id>/', core_views.ocr_job_status, {'kind': OCRJob.KIND_BILL}, name='bill_job_status'),
+    path('api/jobs/<uuid:job_id>/result/', core_views.ocr_job_result, {'kind': OCRJob.KIND_BILL}, name='bill_job_result'),
 ]
\ No newline at end of file
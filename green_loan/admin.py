@@ -1,11 +1,20 @@
 from django.contrib import admin
-from .models import GreenLoan
+from .models import GreenLoan, GreenLoanPayload
+
+
+class GreenLoanPayloadInline(admin.StackedInline):
+    model = GreenLoanPayload
+    can_delete = False
+    verbose_name = 'Payslip text and suggestion'
+    verbose_name_plural = 'Payslip text and suggestion'
+
 
 @admin.register(GreenLoan)
 class GreenLoanAdmin(admin.ModelAdmin):
     list_display = ('user', 'employee_name', 'monthly_salary', 'loan_type', 'loan_available', 'max_loan_amount', 'created_at')
     list_filter = ('loan_available', 'loan_type', 'created_at')
     search_fields = ('user__username', 'employee_name', 'employee_id', 'company_name')
+    inlines = [GreenLoanPayloadInline]
     readonly_fields = ('created_at', 'updated_at', 'monthly_payment')
     
     fieldsets = (
@@ -13,13 +22,13 @@ class GreenLoanAdmin(admin.ModelAdmin):
             'fields': ('user',)
         }),
         ('Payslip Data', {
-            'fields': ('payslip_image', 'payslip_text')
+            'fields': ('payslip_image',)
         }),
         ('Employee Information', {
             'fields': ('employee_name', 'employee_id', 'monthly_salary', 'company_name', 'designation')
         }),
         ('Loan Analysis', {
-            'fields': ('loan_suggestion', 'loan_available', 'loan_type', 'interest_rate', 'max_loan_amount', 'loan_term_months', 'monthly_payment')
+            'fields': ('loan_available', 'loan_type', 'interest_rate', 'max_loan_amount', 'loan_term_months', 'monthly_payment')
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
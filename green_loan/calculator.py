@@ -0,0 +1,242 @@
+"""
+Green loan calculations for salaried applicants in Mauritius.
+
+Eligibility, the salary multiple, the loan cap, the rate and the term are
+derived here from the fields found by ``extract_payslip_data``, using the
+rules and bank offers below. The LLM only writes a short narrative around
+the finished figures.
+"""
+import math
+
+from core.lazy import LazyModule
+
+np = LazyModule('numpy')
+
+LOAN_RULES = {
+    # No unsecured green loan below this monthly salary
+    'min_salary': 15000,
+    # (monthly salary up to, loan as a multiple of it); the last band has no upper bound
+    'salary_multiples': [(25000, 3), (50000, 4), (None, 5)],
+    # (monthly salary up to, percentage points added to the bank rate)
+    'rate_spreads': [(25000, 0.75), (50000, 0.25), (None, 0.0)],
+    # Largest share of the salary the repayment may take
+    'max_debt_to_income': 0.35,
+    'min_loan': 25000,
+    'max_loan': 2000000,
+    'default_term_years': 10,
+    'round_to': 1000,
+}
+
+# Indicative green loan offers (2024)
+BANK_OFFERS = [
+    {'name': 'MCB Bank', 'rate': 5.25, 'max_term_years': 15, 'special': 'No processing fees for solar loans'},
+    {'name': 'SBM Bank', 'rate': 5.75, 'max_term_years': 10, 'special': 'Fast approval in 48 hours'},
+    {'name': 'ABC Banking', 'rate': 6.00, 'max_term_years': 12, 'special': 'Green project advisory included'},
+    {'name': 'MauBank', 'rate': 6.25, 'max_term_years': 10, 'special': 'Repayment holidays on request'},
+    {'name': 'HSBC Mauritius', 'rate': 6.50, 'max_term_years': 7, 'special': 'Lower rate for existing customers'},
+]
+
+# (smallest loan, loan type, what it typically funds, tonnes of CO2 avoided a year)
+GREEN_PROJECTS = [
+    (400000, 'Solar Panel Installation Loan', 'a 5 kW rooftop solar system', 3.5),
+    (160000, 'Solar Panel Installation Loan', 'a 2 kW rooftop solar system', 1.4),
+    (30000, 'Solar Water Heater Loan', 'a solar water heater replacing an electric geyser', 1.2),
+    (0, 'Energy Efficiency Loan', 'LED lighting and energy-efficient appliances', 0.4),
+]
+
+DOCUMENTATION = [
+    'Payslips (last 3 months)',
+    'National ID',
+    'Bank statements (6 months)',
+    'Proof of residence',
+    'Project quotation from a registered supplier',
+]
+
+# Payment grid defaults for the scenario endpoint
+DEFAULT_RATES = [4.0, 4.5, 5.0, 5.5, 6.0, 6.5, 7.0, 7.5, 8.0]
+DEFAULT_TERMS = [3, 5, 7, 10, 12, 15]
+
+
+def _band(value, bands):
+    for upper, result in bands:
+        if upper is None or value <= upper:
+            return result
+    return bands[-1][1]
+
+
+def annuity_payment(principal, annual_rate, months):
+    """Monthly repayment of a fixed-rate loan; ``annual_rate`` is a percentage"""
+    rate = annual_rate / 100 / 12
+    if rate <= 0:
+        return principal / months
+    return principal * rate / (1 - (1 + rate) ** -months)
+
+
+def principal_for_payment(payment, annual_rate, months):
+    """Largest loan that a monthly repayment pays off; the inverse of ``annuity_payment``"""
+    rate = annual_rate / 100 / 12
+    if rate <= 0:
+        return payment * months
+    return payment * (1 - (1 + rate) ** -months) / rate
+
+
+def _bank_rows(banks, spread, term_years, principal):
+    rows = []
+    for bank in sorted(banks, key=lambda bank: bank['rate']):
+        if bank['max_term_years'] < term_years:
+            continue
+        rate = bank['rate'] + spread
+        rows.append({
+            'name': bank['name'],
+            'rate': f'{rate:.2f}%',
+            'terms': f"Up to {bank['max_term_years']} years",
+            'special': bank['special'],
+            'monthly_payment': round(annuity_payment(principal, rate, term_years * 12), 2) if principal else None,
+        })
+    return rows
+
+
+def calculate(payslip_data, rules=LOAN_RULES, banks=BANK_OFFERS):
+    """
+    Compute the loan recommendation for a payslip.
+
+    Returns the fields the green loan page shows, with ``detailed_analysis``
+    left as a plain summary for the narrative to replace.
+    """
+    salary = payslip_data.get('monthly_salary')
+    salary = float(salary) if salary else None
+    result = {
+        'loan_available': False,
+        'loan_type': '',
+        'interest_rate': None,
+        'max_loan_amount': None,
+        'loan_term_years': None,
+        'monthly_payment': None,
+        'salary_multiple': None,
+        'max_monthly_payment': None,
+        'total_interest': None,
+        'recommended_banks': [],
+        'documentation': DOCUMENTATION,
+        'approval_tips': [],
+        'eco_impact': '',
+    }
+
+    if salary is None:
+        result['eligibility_reason'] = 'The monthly salary could not be read from the payslip, so the loan cannot be sized.'
+        result['approval_tips'] = ['Upload a clearer payslip showing the basic or gross salary.']
+        result['detailed_analysis'] = result['eligibility_reason']
+        return result
+    if salary < rules['min_salary']:
+        result['eligibility_reason'] = (f"A monthly salary of MUR {salary:,.0f} is below the MUR {rules['min_salary']:,} "
+                                        'minimum for an unsecured green loan.')
+        result['approval_tips'] = ['Apply with a co-borrower to combine incomes.',
+                                   'Ask about government solar subsidies, which need no loan.']
+        result['detailed_analysis'] = result['eligibility_reason']
+        return result
+
+    spread = _band(salary, rules['rate_spreads'])
+    best = min(banks, key=lambda bank: bank['rate'])
+    rate = best['rate'] + spread
+    term_years = min(rules['default_term_years'], best['max_term_years'])
+    months = term_years * 12
+
+    multiple = _band(salary, rules['salary_multiples'])
+    max_payment = salary * rules['max_debt_to_income']
+    cap = min(salary * multiple, principal_for_payment(max_payment, rate, months), rules['max_loan'])
+    amount = math.floor(cap / rules['round_to']) * rules['round_to']
+    if amount < rules['min_loan']:
+        result['eligibility_reason'] = f"The affordable loan (MUR {amount:,.0f}) is below the MUR {rules['min_loan']:,} minimum."
+        result['detailed_analysis'] = result['eligibility_reason']
+        return result
+
+    payment = annuity_payment(amount, rate, months)
+    _, loan_type, project, co2_tonnes = next(project for project in GREEN_PROJECTS if amount >= project[0])
+    limit = 'the salary multiple' if cap == salary * multiple else (
+        'the maximum green loan' if cap == rules['max_loan'] else 'the repayment limit')
+
+    tips = ['Provide detailed project quotations from certified vendors.',
+            'Show stable employment history (minimum 1 year).']
+    if spread:
+        band_top = next(upper for upper, _ in rules['rate_spreads'] if upper is None or salary <= upper)
+        tips.insert(0, f'Rates drop once the salary passes MUR {band_top:,}; it currently adds {spread:.2f} points.')
+    if limit == 'the repayment limit':
+        tips.append('Clearing other monthly debts raises the amount you can borrow.')
+
+    result.update({
+        'loan_available': True,
+        'loan_type': loan_type,
+        'interest_rate': round(rate, 2),
+        'max_loan_amount': amount,
+        'loan_term_years': term_years,
+        'monthly_payment': round(payment, 2),
+        'salary_multiple': multiple,
+        'max_monthly_payment': round(max_payment, 2),
+        'total_interest': round(payment * months - amount, 2),
+        'recommended_banks': _bank_rows(banks, spread, term_years, amount)[:3],
+        'approval_tips': tips,
+        'eligibility_reason': (f'Eligible: a monthly salary of MUR {salary:,.0f} supports up to {multiple}x salary, '
+                               f'limited here by {limit}.'),
+        'eco_impact': (f'This loan can fund {project}, avoiding about {co2_tonnes:.1f} tonnes of CO2 a year '
+                       f'({co2_tonnes * 10:.0f} tonnes over 10 years).'),
+        'detailed_analysis': (f'Up to MUR {amount:,.0f} at {rate:.2f}% over {term_years} years: '
+                              f'MUR {payment:,.0f} a month, {payment / salary:.0%} of the monthly salary.'),
+    })
+    return result
+
+
+def payment_grid(principal, rates, terms_years):
+    """
+    Monthly payment and total interest for every rate (rows) and term (columns).
+
+    ``rates`` are annual percentages. One vectorised NumPy pass, so grids of
+    any size cost the same handful of array operations.
+    """
+    rate = np.asarray(rates, dtype=float)[:, None] / 1200
+    months = np.asarray(terms_years, dtype=float)[None, :] * 12
+    with np.errstate(divide='ignore', invalid='ignore'):
+        payment = np.where(rate > 0, principal * rate / (1 - (1 + rate) ** -months), principal / months)
+    return payment, payment * months - principal
+
+
+def scenarios(principal, rates=DEFAULT_RATES, terms_years=DEFAULT_TERMS, salary=None,
+              rules=LOAN_RULES, banks=BANK_OFFERS):
+    """
+    Payment and interest grids across rates and terms, plus one row per bank offer.
+
+    The bank rows are computed in the same NumPy call as the grid; terms
+    longer than a bank offers are None. With a ``salary``, ``affordable``
+    marks the payments within the repayment limit.
+    """
+    spread = _band(salary, rules['rate_spreads']) if salary else 0.0
+    bank_rates = [bank['rate'] + spread for bank in banks]
+    payment, interest = payment_grid(principal, list(rates) + bank_rates, terms_years)
+    payment, interest = np.round(payment, 2), np.round(interest, 2)
+    grid_rows = len(rates)
+
+    terms = np.asarray(terms_years)
+    bank_rows = []
+    for index, bank in enumerate(banks):
+        offered = terms <= bank['max_term_years']
+        row = grid_rows + index
+        bank_rows.append({
+            'name': bank['name'],
+            'rate': round(bank_rates[index], 2),
+            'max_term_years': bank['max_term_years'],
+            'special': bank['special'],
+            'monthly_payment': [value if ok else None for value, ok in zip(payment[row].tolist(), offered)],
+            'total_interest': [value if ok else None for value, ok in zip(interest[row].tolist(), offered)],
+        })
+
+    result = {
+        'principal': principal,
+        'rates': [float(rate) for rate in rates],
+        'terms_years': [int(term) for term in terms_years],
+        'monthly_payment': payment[:grid_rows].tolist(),
+        'total_interest': interest[:grid_rows].tolist(),
+        'banks': bank_rows,
+    }
+    if salary:
+        max_payment = salary * rules['max_debt_to_income']
+        result['max_monthly_payment'] = round(max_payment, 2)
+        result['affordable'] = (payment[:grid_rows] <= max_payment).tolist()
+    return result
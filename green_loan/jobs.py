@@ -0,0 +1,22 @@
+from core import documents
+from core.aio import run_sync
+from .views import agenerate_loan_analysis, save_loan_application
+
+
+def process_payslip_job(job):
+    """Worker handler for queued payslip uploads: OCR, analysis and saving"""
+    with job.image.open('rb') as image_file:
+        payslip_text = documents.extract_text(image_file.read())
+
+    extracted_data, ai_response, loan_data = run_sync(agenerate_loan_analysis, payslip_text)
+
+    loan_id = None
+    if job.user is not None:
+        loan_id = save_loan_application(job.user, payslip_text, job.image.name, extracted_data, ai_response, loan_data).id
+
+    return {
+        'extracted_text': payslip_text,
+        'analysis': loan_data,
+        'extracted_data': extracted_data,
+        'loan_id': loan_id,
+    }
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('green_loan', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='greenloan',
+            index=models.Index(fields=['user', '-created_at', 'loan_available'], name='green_loan_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='greenloan',
+            index=models.Index(fields=['-created_at'], name='green_loan_created_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def move_text_to_payload(apps, schema_editor):
+    """Copy each loan application's text columns into its payload row"""
+    GreenLoan = apps.get_model('green_loan', 'GreenLoan')
+    GreenLoanPayload = apps.get_model('green_loan', 'GreenLoanPayload')
+    rows = GreenLoan.objects.values_list('pk', 'payslip_text', 'loan_suggestion').iterator(chunk_size=1000)
+    batch = []
+    for pk, payslip_text, loan_suggestion in rows:
+        batch.append(GreenLoanPayload(loan_id=pk, payslip_text=payslip_text, loan_suggestion=loan_suggestion))
+        if len(batch) == 1000:
+            GreenLoanPayload.objects.bulk_create(batch)
+            batch = []
+    GreenLoanPayload.objects.bulk_create(batch)
+
+
+def move_text_back(apps, schema_editor):
+    GreenLoan = apps.get_model('green_loan', 'GreenLoan')
+    GreenLoanPayload = apps.get_model('green_loan', 'GreenLoanPayload')
+    for row in GreenLoanPayload.objects.values('loan_id', 'payslip_text', 'loan_suggestion').iterator(chunk_size=1000):
+        GreenLoan.objects.filter(pk=row.pop('loan_id')).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('green_loan', '0002_history_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GreenLoanPayload',
+            fields=[
+                ('loan', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='payload', serialize=False, to='green_loan.greenloan')),
+                ('payslip_text', models.TextField(blank=True, help_text='Extracted text from payslip')),
+                ('loan_suggestion', models.TextField(blank=True, help_text='AI-generated loan suggestion')),
+            ],
+        ),
+        migrations.RunPython(move_text_to_payload, move_text_back),
+        migrations.RemoveField(
+            model_name='greenloan',
+            name='loan_suggestion',
+        ),
+        migrations.RemoveField(
+            model_name='greenloan',
+            name='payslip_text',
+        ),
+    ]
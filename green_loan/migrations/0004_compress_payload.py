@@ -0,0 +1,74 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:55
+
+import core.compression
+from django.db import migrations
+
+
+def compress_text(apps, schema_editor):
+    """Copy the text columns into their compressed replacements"""
+    GreenLoanPayload = apps.get_model('green_loan', 'GreenLoanPayload')
+    rows = GreenLoanPayload.objects.order_by('pk').iterator(chunk_size=500)
+    batch = []
+    for row in rows:
+        row.payslip_text_compressed = row.payslip_text
+        row.loan_suggestion_compressed = row.loan_suggestion
+        batch.append(row)
+        if len(batch) == 500:
+            GreenLoanPayload.objects.bulk_update(batch, ['payslip_text_compressed', 'loan_suggestion_compressed'])
+            batch = []
+    GreenLoanPayload.objects.bulk_update(batch, ['payslip_text_compressed', 'loan_suggestion_compressed'])
+
+
+def decompress_text(apps, schema_editor):
+    GreenLoanPayload = apps.get_model('green_loan', 'GreenLoanPayload')
+    rows = GreenLoanPayload.objects.order_by('pk').iterator(chunk_size=500)
+    batch = []
+    for row in rows:
+        row.payslip_text = row.payslip_text_compressed
+        row.loan_suggestion = row.loan_suggestion_compressed
+        batch.append(row)
+        if len(batch) == 500:
+            GreenLoanPayload.objects.bulk_update(batch, ['payslip_text', 'loan_suggestion'])
+            batch = []
+    GreenLoanPayload.objects.bulk_update(batch, ['payslip_text', 'loan_suggestion'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('green_loan', '0003_loan_payload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='greenloanpayload',
+            name='payslip_text_compressed',
+            field=core.compression.CompressedTextField(blank=True, default=b'', dictionary='payslip_text', help_text='Extracted text from payslip'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='greenloanpayload',
+            name='loan_suggestion_compressed',
+            field=core.compression.CompressedTextField(blank=True, default=b'', dictionary='loan_suggestion', help_text='AI-generated loan suggestion'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(compress_text, decompress_text),
+        migrations.RemoveField(
+            model_name='greenloanpayload',
+            name='payslip_text',
+        ),
+        migrations.RemoveField(
+            model_name='greenloanpayload',
+            name='loan_suggestion',
+        ),
+        migrations.RenameField(
+            model_name='greenloanpayload',
+            old_name='payslip_text_compressed',
+            new_name='payslip_text',
+        ),
+        migrations.RenameField(
+            model_name='greenloanpayload',
+            old_name='loan_suggestion_compressed',
+            new_name='loan_suggestion',
+        ),
+    ]
@@ -1,13 +1,15 @@
 from django.db import models
 from django.contrib.auth.models import User
 from decimal import Decimal
+from core.compression import CompressedTextField
+from core.payload import PayloadModel, PayloadQuerySet, payload_field
+from .calculator import annuity_payment
 
-class GreenLoan(models.Model):
+class GreenLoan(PayloadModel):
     """Model to store green loan applications and analysis"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='green_loans')
     
     # Payslip data
-    payslip_text = models.TextField(blank=True, help_text="Extracted text from payslip")
     payslip_image = models.ImageField(upload_to='payslip_images/', null=True, blank=True)
     
     # Extracted payslip information
@@ -18,7 +20,6 @@ class GreenLoan(models.Model):
     designation = models.CharField(max_length=255, blank=True)
     
     # Loan analysis result
-    loan_suggestion = models.TextField(blank=True, help_text="AI-generated loan suggestion")
     loan_available = models.BooleanField(default=False)
     loan_type = models.CharField(max_length=255, blank=True)
     interest_rate = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, help_text="Annual interest rate in percentage")
@@ -29,10 +30,26 @@ class GreenLoan(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Stored in GreenLoanPayload (see core/payload.py)
+    PAYLOAD_FIELDS = ('payslip_text', 'loan_suggestion')
+    payslip_text = payload_field('payslip_text')
+    loan_suggestion = payload_field('loan_suggestion')
+    
+    objects = PayloadQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Green Loan Application'
         verbose_name_plural = 'Green Loan Applications'
+        indexes = [
+            # Dashboard history newest first; with loan_available as the last
+            # column, per-user approval counts are answered from the index alone
+            models.Index(fields=['user', '-created_at', 'loan_available'], name='green_loan_user_created_idx'),
+            # Admin list newest first, with or without the loan_available filter:
+            # approval splits the rows too evenly to lead an index, so the list
+            # walks this one in order and stops once a page is filled
+            models.Index(fields=['-created_at'], name='green_loan_created_idx'),
+        ]
     
     def __str__(self):
         return f"Loan Application by {self.user.username} - {self.created_at.strftime('%Y-%m-%d')}"
@@ -40,13 +57,17 @@ class GreenLoan(models.Model):
     @property
     def monthly_payment(self):
         """Calculate estimated monthly payment"""
-        if self.max_loan_amount and self.interest_rate and self.loan_term_months:
-            # Simple monthly payment calculation
-            principal = float(self.max_loan_amount)
-            rate = float(self.interest_rate) / 100 / 12  # Monthly interest rate
-            n = self.loan_term_months
-            
-            if rate > 0:
-                payment = principal * (rate * (1 + rate)**n) / ((1 + rate)**n - 1)
-                return Decimal(str(round(payment, 2)))
+        if self.max_loan_amount and self.interest_rate is not None and self.loan_term_months:
+            payment = annuity_payment(float(self.max_loan_amount), float(self.interest_rate), self.loan_term_months)
+            return Decimal(str(round(payment, 2)))
         return None
+
+
+class GreenLoanPayload(models.Model):
+    """Payslip text and loan suggestion of an application, loaded only when a page shows them"""
+    loan = models.OneToOneField(GreenLoan, on_delete=models.CASCADE, primary_key=True, related_name='payload')
+    payslip_text = CompressedTextField(dictionary='payslip_text', blank=True, help_text="Extracted text from payslip")
+    loan_suggestion = CompressedTextField(dictionary='loan_suggestion', blank=True, help_text="AI-generated loan suggestion")
+    
+    def __str__(self):
+        return f"Payload of loan application {self.loan_id}"
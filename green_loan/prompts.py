@@ -0,0 +1,18 @@
+"""OpenAI prompts for green loans. Static instructions first, request data last (see core/prompts.py)."""
+from core.prompts import PromptTemplate, register
+
+LOAN_NARRATIVE = register(PromptTemplate(
+    name='loan_narrative',
+    version=1,
+    model='gpt-3.5-turbo',
+    instructions='''
+You are a helpful financial advisor specializing in green loans and sustainable finance in Mauritius.
+
+Write a 3-4 sentence explanation of a green loan recommendation for the applicant: why they qualify or not, what the loan could fund, and what the repayment means for their budget. Use only the figures you are given, do not calculate new ones, and return plain text without HTML or markdown.
+''',
+    data='''
+{facts}
+''',
+    max_tokens=250,
+    temperature=0.3,
+))
@@ -1,8 +1,16 @@
 from django.urls import path
+from core import views as core_views
+from core.models import OCRJob
 from . import views
 
 urlpatterns = [
     path('', views.green_loan_view, name='green_loan'),
     path('api/extract-payslip/', views.extract_payslip_text, name='extract_payslip'),
+    path('api/extract-payslip/batch/', views.extract_payslip_batch, name='extract_payslip_batch'),
     path('api/analyze-payslip/', views.analyze_payslip, name='analyze_payslip'),
+    path('api/analyze-payslip/stream/', views.analyze_payslip_stream, name='analyze_payslip_stream'),
+    path('api/loan-scenarios/', views.loan_scenarios, name='loan_scenarios'),
+    path('api/jobs/', core_views.submit_ocr_job, {'kind': OCRJob.KIND_PAYSLIP}, name='submit_payslip_job'),
+    path('api/jobs/<uuid:job_id>/', core_views.ocr_job_status, {'kind': OCRJob.KIND_PAYSLIP}, name='payslip_job_status'),
+    path('api/jobs/<uuid:job_id>/result/', core_views.ocr_job_result, {'kind': OCRJob.KIND_PAYSLIP}, name='payslip_job_result'),
 ]
\ No newline at end of file
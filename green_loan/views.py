@@ -2,58 +2,43 @@ from django.shortcuts import render
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
+from django.conf import settings
+from asgiref.sync import sync_to_async
+from accounts.stats import get_stats
+from core import documents, llm, ocr_cache, singleflight
+from core.aio import offload
+from core.quality import ImageQualityError
+from core.streaming import sse_event, sse_response
 from .models import GreenLoan
+from . import calculator, prompts
 import json
 import os
 import re
 from decimal import Decimal
-import easyocr
-import cv2
-import numpy as np
-from PIL import Image
-from openai import OpenAI
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-
-# Initialize EasyOCR reader (singleton pattern for efficiency)
-reader = None
-
-def get_ocr_reader():
-    """Get or initialize EasyOCR reader"""
-    global reader
-    if reader is None:
-        reader = easyocr.Reader(['en'])
-    return reader
-
 def green_loan_view(request):
     """Main green loan page view"""
-    # Get recent loan applications for the user
+    # Get recent loan applications for the user; the counts come from one stats row
     recent_loans = []
-    total_applications = 0
-    approved_count = 0
+    user_stats = get_stats(request.user)
     
     if request.user.is_authenticated:
         recent_loans = GreenLoan.objects.filter(user=request.user)[:5]
-        total_applications = GreenLoan.objects.filter(user=request.user).count()
-        approved_count = GreenLoan.objects.filter(user=request.user, loan_available=True).count()
     
     context = {
         'recent_loans': recent_loans,
-        'total_applications': total_applications,
-        'approved_count': approved_count,
+        'total_applications': user_stats.loan_applications,
+        'approved_count': user_stats.loans_approved,
     }
     return render(request, 'green_loan/green_loan.html', context)
 
 @csrf_exempt
-def extract_payslip_text(request):
-    """Extract text from uploaded payslip image using EasyOCR"""
+async def extract_payslip_text(request):
+    """Extract text from uploaded payslip image or PDF using EasyOCR"""
     if request.method != 'POST':
         return JsonResponse({'error': 'POST method required'}, status=400)
     
@@ -61,25 +46,16 @@ def extract_payslip_text(request):
         return JsonResponse({'error': 'No image provided'}, status=400)
     
     try:
-        image_file = request.FILES['image']
-        
-        # Save image temporarily
-        image_path = default_storage.save(f'temp_payslip/{image_file.name}', ContentFile(image_file.read()))
-        full_path = default_storage.path(image_path)
+        # Decode straight from the upload buffer; nothing is written to disk
+        image_bytes = request.FILES['image'].read()
         
-        # Read image with OpenCV
-        image = cv2.imread(full_path)
-        
-        # Get OCR reader and extract text
-        ocr_reader = get_ocr_reader()
-        results = ocr_reader.readtext(image)
-        
-        # Combine all detected text
-        extracted_text = ' '.join([text[1] for text in results])
-        
-        # Clean up temporary file
-        if os.path.exists(full_path):
-            os.remove(full_path)
+        # Extract text using the shared EasyOCR engine pool, or reuse the
+        # result of an earlier upload of the same file; PDF payslips are
+        # read from their text layer where they have one
+        try:
+            extracted_text = await offload(documents.extract_text, image_bytes)
+        except ImageQualityError as e:
+            return JsonResponse({'error': str(e), 'quality': e.report}, status=422)
         
         return JsonResponse({
             'success': True,
@@ -89,6 +65,45 @@ def extract_payslip_text(request):
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+@csrf_exempt
+def extract_payslip_batch(request):
+    """Extract text and payslip fields from several payslips in one batched OCR pass"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST method required'}, status=400)
+    
+    image_files = request.FILES.getlist('images')
+    if not image_files:
+        return JsonResponse({'error': 'No images provided'}, status=400)
+    
+    if len(image_files) > settings.OCR_BATCH_MAX_IMAGES:
+        return JsonResponse({'error': f'Please upload at most {settings.OCR_BATCH_MAX_IMAGES} payslips at a time'}, status=400)
+    
+    try:
+        outcomes = ocr_cache.cached_readtext_many([image_file.read() for image_file in image_files])
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+    
+    results = []
+    for image_file, (ocr_results, error) in zip(image_files, outcomes):
+        if error is not None:
+            item = {'name': image_file.name, 'success': False, 'error': str(error)}
+            if isinstance(error, ImageQualityError):
+                item['quality'] = error.report
+        else:
+            extracted_text = ' '.join([text[1] for text in ocr_results])
+            item = {
+                'name': image_file.name,
+                'success': True,
+                'extracted_text': extracted_text,
+                'extracted_data': extract_payslip_data(extracted_text)
+            }
+        results.append(item)
+    
+    return JsonResponse({
+        'success': True,
+        'results': results
+    })
+
 def extract_payslip_data(text):
     """Extract structured data from payslip text using regex patterns"""
     data = {
@@ -171,8 +186,71 @@ def extract_payslip_data(text):
     
     return data
 
+def assess_loan(payslip_text):
+    """Parse the payslip text and compute the green loan recommendation locally"""
+    extracted_data = extract_payslip_data(payslip_text)
+    return extracted_data, calculator.calculate(extracted_data)
+
+def loan_narrative_request(extracted_data, loan_data):
+    """OpenAI request for a few sentences around the computed loan; None without an API key"""
+    if not os.getenv('OPENAI_API_KEY'):
+        return None
+    
+    facts = f"- {loan_data['eligibility_reason']}"
+    if loan_data['loan_available']:
+        banks = ', '.join(f"{bank['name']} ({bank['rate']})" for bank in loan_data['recommended_banks'])
+        facts += f'''
+- Loan: {loan_data['loan_type']}, up to MUR {loan_data['max_loan_amount']:,.0f} at {loan_data['interest_rate']:.2f}% over {loan_data['loan_term_years']} years
+- Repayment: MUR {loan_data['monthly_payment']:,.0f}/month of an allowed MUR {loan_data['max_monthly_payment']:,.0f}, MUR {loan_data['total_interest']:,.0f} interest in total
+- Best offers: {banks}
+- {loan_data['eco_impact']}'''
+    
+    return prompts.LOAN_NARRATIVE.request(facts=facts)
+
+async def awrite_loan_narrative(extracted_data, loan_data):
+    """Ask OpenAI for a few sentences around the computed loan; empty if unavailable"""
+    request_kwargs = loan_narrative_request(extracted_data, loan_data)
+    if request_kwargs is None:
+        return ''
+    try:
+        return (await llm.achat(**request_kwargs)).strip()
+    except Exception as e:
+        print(f'Narrative error: {e}')
+        return ''
+
+def add_loan_narrative(loan_data, narrative):
+    """Put the narrative in place of the plain summary; returns the text to store as the suggestion"""
+    if narrative:
+        loan_data['detailed_analysis'] = narrative
+    return loan_data['detailed_analysis']
+
+async def agenerate_loan_analysis(payslip_text):
+    """Compute the green loan from the payslip text, with a short OpenAI narrative"""
+    extracted_data, loan_data = assess_loan(payslip_text)
+    ai_response = add_loan_narrative(loan_data, await awrite_loan_narrative(extracted_data, loan_data))
+    return extracted_data, ai_response, loan_data
+
+def save_loan_application(user, payslip_text, payslip_image, extracted_data, ai_response, loan_data):
+    """Store the analysed loan application for the user"""
+    return GreenLoan.objects.create(
+        user=user,
+        payslip_text=payslip_text,
+        payslip_image=payslip_image,
+        employee_name=extracted_data.get('employee_name', ''),
+        employee_id=extracted_data.get('employee_id', ''),
+        monthly_salary=extracted_data.get('monthly_salary'),
+        company_name=extracted_data.get('company_name', ''),
+        designation=extracted_data.get('designation', ''),
+        loan_suggestion=ai_response,
+        loan_available=loan_data.get('loan_available', False),
+        loan_type=loan_data.get('loan_type', ''),
+        interest_rate=loan_data.get('interest_rate'),
+        max_loan_amount=loan_data.get('max_loan_amount'),
+        loan_term_months=loan_data.get('loan_term_years', 10) * 12 if loan_data.get('loan_term_years') else None
+    )
+
 @csrf_exempt
-def analyze_payslip(request):
+async def analyze_payslip(request):
     """Analyze payslip and provide green loan suggestions using OpenAI"""
     if request.method != 'POST':
         return JsonResponse({'error': 'POST method required'}, status=400)
@@ -190,123 +268,29 @@ def analyze_payslip(request):
         if not payslip_text:
             return JsonResponse({'error': 'No payslip text provided'}, status=400)
         
-        # Extract structured data from payslip
-        extracted_data = extract_payslip_data(payslip_text)
+        user = await request.auser()
+        image_bytes = b''
+        if image_data and not isinstance(image_data, str):
+            image_bytes = image_data.read()
+            image_data.seek(0)
         
-        # Create detailed prompt for OpenAI
-        prompt = f"""
-You are a financial advisor specializing in green loans for eco-friendly projects in Mauritius. 
-Analyze the following payslip details and provide a comprehensive loan recommendation.
-
-PAYSLIP DATA:
-{payslip_text[:2000]}
-
-EXTRACTED INFORMATION:
-- Employee Name: {extracted_data.get('employee_name', 'Not found')}
-- Employee ID: {extracted_data.get('employee_id', 'Not found')}
-- Monthly Salary: MUR {extracted_data.get('monthly_salary', 'Not found')}
-- Company: {extracted_data.get('company_name', 'Not found')}
-- Designation: {extracted_data.get('designation', 'Not found')}
-
-GREEN LOAN CONTEXT IN MAURITIUS:
-- Green loans fund solar panels, energy-efficient upgrades, electric vehicles, rainwater harvesting, etc.
-- Typical interest rates: 4-8% per annum for green projects
-- Loan amounts: Up to 5x monthly salary for salaried employees
-- Loan terms: 3-15 years depending on project and salary
-- Banks in Mauritius: MCB, SBM, ABC Banking, BOM, HSBC offer green loans
-- Government incentives: VAT exemption on solar equipment, subsidies available
-
-ANALYSIS REQUIREMENTS:
-1. Loan Eligibility: Is the applicant eligible? (Consider if salary is identifiable)
-2. Loan Type: Recommend specific green loan type (Solar, Energy Efficiency, EV, etc.)
-3. Interest Rate: Provide realistic annual rate (4-8%) based on salary and employment
-4. Maximum Loan Amount: Calculate based on 3-5x monthly salary
-5. Loan Term: Suggest term in years (5-15 years typical)
-6. Monthly Payment: Estimate monthly payment amount
-7. Recommended Banks: List 2-3 Mauritian banks offering best rates
-8. Documentation Needed: List required documents
-9. Tips: Provide 3 practical tips for approval
-10. Eco-Impact: Estimate CO2 reduction potential
-
-FORMAT YOUR RESPONSE AS JSON:
-{{
-    "loan_available": true/false,
-    "loan_type": "Solar Panel Installation Loan / Energy Efficiency Loan / EV Loan / etc.",
-    "interest_rate": 5.5,
-    "max_loan_amount": 500000,
-    "loan_term_years": 10,
-    "monthly_payment": 5500,
-    "eligibility_reason": "Brief explanation of eligibility",
-    "recommended_banks": [
-        {{"name": "MCB Bank", "rate": "5.25%", "terms": "Up to 15 years", "special": "No processing fees for solar loans"}},
-        {{"name": "SBM Bank", "rate": "5.75%", "terms": "Up to 10 years", "special": "Fast approval in 48 hours"}}
-    ],
-    "documentation": ["Payslips (last 3 months)", "National ID", "Bank statements (6 months)", "Proof of residence", "Project quotation"],
-    "approval_tips": [
-        "Maintain good credit score above 650",
-        "Provide detailed project quotations from certified vendors",
-        "Show stable employment history (minimum 1 year)"
-    ],
-    "eco_impact": "Installing 5kW solar system can reduce CO2 emissions by approximately 3.5 tons annually and save MUR 45,000 in electricity costs over 10 years.",
-    "detailed_analysis": "Comprehensive narrative analysis explaining the recommendation, calculations, and benefits."
-}}
-
-Provide realistic numbers based on the salary information. If salary cannot be determined, use conservative estimates.
-"""
+        async def analyse():
+            extracted_data, ai_response, loan_data = await agenerate_loan_analysis(payslip_text)
+            
+            # Save to database if user is authenticated
+            if user.is_authenticated and image_data:
+                # Save image
+                if isinstance(image_data, str):
+                    # Base64 image (from JSON)
+                    pass  # Handle base64 if needed
+                else:
+                    # File upload
+                    await sync_to_async(save_loan_application)(user, payslip_text, image_data, extracted_data, ai_response, loan_data)
+            return extracted_data, loan_data
         
-        # Call OpenAI API
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a helpful financial advisor specializing in green loans and sustainable finance in Mauritius."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=2000,
-            temperature=0.7
-        )
-        
-        # Parse AI response
-        ai_response = response.choices[0].message.content.strip()
-        
-        # Try to extract JSON from response
-        try:
-            # Find JSON in the response
-            json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
-            if json_match:
-                loan_data = json.loads(json_match.group())
-            else:
-                # Fallback: create structured response from text
-                loan_data = {
-                    'loan_available': 'eligible' in ai_response.lower() or 'approved' in ai_response.lower(),
-                    'detailed_analysis': ai_response
-                }
-        except:
-            loan_data = {'detailed_analysis': ai_response}
-        
-        # Save to database if user is authenticated
-        if request.user.is_authenticated and image_data:
-            # Save image
-            if isinstance(image_data, str):
-                # Base64 image (from JSON)
-                pass  # Handle base64 if needed
-            else:
-                # File upload
-                loan_record = GreenLoan.objects.create(
-                    user=request.user,
-                    payslip_text=payslip_text,
-                    payslip_image=image_data,
-                    employee_name=extracted_data.get('employee_name', ''),
-                    employee_id=extracted_data.get('employee_id', ''),
-                    monthly_salary=extracted_data.get('monthly_salary'),
-                    company_name=extracted_data.get('company_name', ''),
-                    designation=extracted_data.get('designation', ''),
-                    loan_suggestion=ai_response,
-                    loan_available=loan_data.get('loan_available', False),
-                    loan_type=loan_data.get('loan_type', ''),
-                    interest_rate=loan_data.get('interest_rate'),
-                    max_loan_amount=loan_data.get('max_loan_amount'),
-                    loan_term_months=loan_data.get('loan_term_years', 10) * 12 if loan_data.get('loan_term_years') else None
-                )
+        # A double click or a retry of the same payslip waits for the first request
+        key = singleflight.request_key('analyze_payslip', user, payslip_text, image_bytes)
+        extracted_data, loan_data = await singleflight.arun(key, analyse)
         
         # Return analysis
         return JsonResponse({
@@ -316,4 +300,114 @@ Provide realistic numbers based on the salary information. If salary cannot be d
         })
     
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
\ No newline at end of file
+        return JsonResponse({'error': str(e)}, status=500)
+
+@csrf_exempt
+async def analyze_payslip_stream(request):
+    """
+    Read and analyze a payslip in one request, streamed as server-sent events.
+    
+    Events: ``status`` straight away, ``extracted`` once the payslip has been
+    read (skipped when ``payslip_text`` is posted), ``analysis`` with the
+    locally computed loan, ``narrative`` pieces of the OpenAI explanation,
+    then ``done`` with the same payload as analyze_payslip (or ``error``).
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST method required'}, status=400)
+    
+    payslip_text = request.POST.get('payslip_text', '')
+    image_file = request.FILES.get('image')
+    if not payslip_text and not image_file:
+        return JsonResponse({'error': 'No payslip text or image provided'}, status=400)
+    
+    image_bytes = image_file.read() if image_file and not payslip_text else None
+    user = await request.auser()
+    
+    async def events():
+        text = payslip_text
+        if not text:
+            yield sse_event('status', {'message': 'Reading your payslip...'})
+            try:
+                text = await offload(documents.extract_text, image_bytes)
+            except ImageQualityError as e:
+                yield sse_event('error', {'error': str(e), 'quality': e.report})
+                return
+            except Exception as e:
+                yield sse_event('error', {'error': str(e)})
+                return
+            yield sse_event('extracted', {'extracted_text': text})
+        
+        if not text:
+            yield sse_event('error', {'error': 'No text could be read from the payslip'})
+            return
+        
+        try:
+            yield sse_event('status', {'message': 'Analyzing loan eligibility...'})
+            extracted_data, loan_data = assess_loan(text)
+            yield sse_event('analysis', {'analysis': loan_data, 'extracted_data': extracted_data})
+            
+            request_kwargs = loan_narrative_request(extracted_data, loan_data)
+            narrative = ''
+            if request_kwargs is not None:
+                parts = []
+                try:
+                    async for piece in llm.astream_chat(**request_kwargs):
+                        parts.append(piece)
+                        yield sse_event('narrative', {'text': piece})
+                except Exception as e:
+                    print(f'Narrative error: {e}')
+                narrative = ''.join(parts).strip()
+            ai_response = add_loan_narrative(loan_data, narrative)
+            
+            # Save to database if user is authenticated
+            if user.is_authenticated and image_file:
+                await sync_to_async(save_loan_application)(user, text, image_file, extracted_data, ai_response, loan_data)
+            
+            yield sse_event('done', {
+                'success': True,
+                'analysis': loan_data,
+                'extracted_data': extracted_data
+            })
+        except Exception as e:
+            yield sse_event('error', {'error': str(e)})
+    
+    return sse_response(request, events)
+
+def _number_list(value, default, limit=20):
+    """Comma-separated numbers from a query parameter"""
+    if not value:
+        return default
+    numbers = [float(item) for item in value.split(',') if item.strip()]
+    if not numbers or len(numbers) > limit:
+        raise ValueError(f'Give between 1 and {limit} values')
+    return numbers
+
+def loan_scenarios(request):
+    """
+    Monthly payment and total interest across interest rates, terms and the bank offers.
+    
+    GET ``amount`` (MUR), or ``salary`` to use the loan it qualifies for; optional
+    comma-separated ``rates`` (annual %) and ``terms`` (years). The whole grid is
+    computed in one NumPy call, so sliders can query it on every change.
+    """
+    salary = request.GET.get('salary')
+    try:
+        salary = float(salary) if salary else None
+        amount = float(request.GET['amount']) if request.GET.get('amount') else None
+        rates = _number_list(request.GET.get('rates'), calculator.DEFAULT_RATES)
+        terms = [int(term) for term in _number_list(request.GET.get('terms'), calculator.DEFAULT_TERMS)]
+    except ValueError as e:
+        return JsonResponse({'error': f'Invalid parameters: {e}'}, status=400)
+    
+    if salary is not None and not 0 < salary < 10000000:
+        return JsonResponse({'error': 'Invalid salary'}, status=400)
+    if amount is None and salary is not None:
+        amount = calculator.calculate({'monthly_salary': salary})['max_loan_amount']
+        if amount is None:
+            return JsonResponse({'error': 'This salary does not qualify for a green loan'}, status=400)
+    if amount is None or not 0 < amount <= 100000000:
+        return JsonResponse({'error': 'A positive amount or salary is required'}, status=400)
+    if not all(0 <= rate <= 50 for rate in rates) or not all(1 <= term <= 40 for term in terms):
+        return JsonResponse({'error': 'Rates must be 0-50% and terms 1-40 years'}, status=400)
+    
+    return JsonResponse(calculator.scenarios(amount, rates, terms, salary=salary))
@@ -31,14 +31,8 @@ document.getElementById('payslipInput').addEventListener('change', async functio
     document.getElementById('loadingIndicator').style.display = 'block';
     
     try {
-        // Extract text from image
-        await extractTextFromImage(file);
-        
-        // Wait a moment for extraction to complete
-        await new Promise(resolve => setTimeout(resolve, 1000));
-        
-        // Analyze the payslip
-        await analyzePayslip();
+        // Read and analyze the payslip in one streamed request
+        await streamPayslipAnalysis(file);
     } catch (error) {
         console.error('Error processing payslip:', error);
         alert('Failed to process payslip. Please try again.');
@@ -50,68 +44,46 @@ document.getElementById('payslipInput').addEventListener('change', async functio
     }
 });
 
-// Extract text from image
-async function extractTextFromImage(file) {
+// Read and analyze the payslip, showing each step as the server streams it
+async function streamPayslipAnalysis(file) {
     const formData = new FormData();
     formData.append('image', file);
 
-    try {
-        const response = await fetch('/green_loan/api/extract-payslip/', {
-            method: 'POST',
-            body: formData
-        });
+    const statusText = document.getElementById('streamStatus');
+    const preview = document.getElementById('streamPreview');
+    let generated = '';
+    preview.textContent = '';
+    preview.style.display = 'none';
 
-        const data = await response.json();
-        
-        if (data.success) {
+    await postEventStream('/green_loan/api/analyze-payslip/stream/', formData, {
+        status: data => {
+            statusText.textContent = data.message;
+        },
+        extracted: data => {
             extractedText = data.extracted_text;
             console.log('Extracted text:', extractedText);
-            return true;
-        } else {
-            console.error('OCR extraction failed:', data.error);
-            return false;
-        }
-    } catch (error) {
-        console.error('Error extracting text:', error);
-        return false;
-    }
-}
-
-async function analyzePayslip() {
-    console.log('Analyzing payslip with text:', extractedText);
-    
-    if (!extractedText) {
-        console.error('No extracted text available');
-        alert('Please wait for text extraction to complete');
-        return;
-    }
-
-    try {
-        const formData = new FormData();
-        formData.append('payslip_text', extractedText);
-        formData.append('image', uploadedImage);
-
-        console.log('Sending request to analyze-payslip API...');
-        const response = await fetch('/green_loan/api/analyze-payslip/', {
-            method: 'POST',
-            body: formData
-        });
-
-        console.log('Response status:', response.status);
-        const data = await response.json();
-        console.log('Response data:', data);
-
-        if (data.success) {
+        },
+        analysis: data => {
+            statusText.textContent = data.analysis.loan_available
+                ? 'Loan calculated, writing the explanation...'
+                : 'Eligibility checked, writing the explanation...';
+        },
+        narrative: data => {
+            generated += data.text;
+            preview.style.display = 'block';
+            preview.textContent = generated;
+            preview.scrollTop = preview.scrollHeight;
+        },
+        done: data => {
             console.log('Analysis successful, displaying results');
+            preview.style.display = 'none';
             displayAnalysis(data.analysis, data.extracted_data);
-        } else {
+        },
+        error: data => {
             console.error('Analysis failed:', data.error);
             alert('Analysis failed: ' + (data.error || 'Unknown error'));
         }
-    } catch (error) {
-        console.error('Error analyzing payslip:', error);
-        alert('Failed to analyze payslip. Please try again. Error: ' + error.message);
-    }
+    });
 }
 
 // Display analysis results
@@ -4,3 +4,45 @@
 document.addEventListener('DOMContentLoaded', function() {
     console.log('MoLenerzi loaded successfully');
 });
+
+// POST a form or JSON body to a server-sent-events endpoint and call
+// handlers[event](data) for each event as it arrives. EventSource cannot
+// POST, so the response body is read as a stream instead.
+async function postEventStream(url, body, handlers) {
+    const options = { method: 'POST', body: body };
+    if (!(body instanceof FormData)) {
+        options.headers = { 'Content-Type': 'application/json' };
+        options.body = JSON.stringify(body);
+    }
+
+    const response = await fetch(url, options);
+    if (!response.ok || !response.body) {
+        // Validation errors come back as plain JSON before the stream starts
+        const data = await response.json().catch(() => ({}));
+        if (handlers.error) handlers.error(data);
+        return;
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = 'message';
+            let data = '';
+            frame.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            });
+            if (data && handlers[event]) handlers[event](JSON.parse(data));
+        }
+    }
+}
@@ -1,36 +1,22 @@
-from openai import OpenAI
-from django.conf import settings
+from core import llm
 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+from . import prompts
 
-def generate_quote_email(user_name, user_email, message_body, business):
-    prompt = f"""
-    Write a professional quotation request email.
-
-    The sender is a potential customer requesting a price or quotation from this business.
-
-    Sender name: {user_name}
-    Sender email: {user_email}
 
-    Business receiving the request:
-    - Name: {business.name}
-    - Category: {business.category.name if business.category else "Not specified"}
+def quote_email_request(user_name, user_email, message_body, business):
+    return prompts.QUOTE_EMAIL.request(
+        user_name=user_name,
+        user_email=user_email,
+        business_name=business.name,
+        category=business.category.name if business.category else "Not specified",
+        message_body=message_body,
+    )
 
-    Main user request:
-    {message_body}
 
-    Format the email clearly and politely.
-    Tone: respectful, concise, customer-like.
-    Start with a greeting ("Good day"/"Hello"), address the business by name, explain the need, 
-    include the sender's contact info, and end with thanks.
-    """
+def generate_quote_email(user_name, user_email, message_body, business):
+    return llm.chat(**quote_email_request(user_name, user_email, message_body, business))
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": "You are a professional email writing assistant."},
-            {"role": "user", "content": prompt},
-        ]
-    )
 
-    return response.choices[0].message.content
+async def agenerate_quote_email(user_name, user_email, message_body, business):
+    """Async version of ``generate_quote_email``; ``business.category`` must already be loaded"""
+    return await llm.achat(**quote_email_request(user_name, user_email, message_body, business))
@@ -0,0 +1,29 @@
+"""OpenAI prompts for the waste exchange. Static instructions first, request data last (see core/prompts.py)."""
+from core.prompts import PromptTemplate, register
+
+QUOTE_EMAIL = register(PromptTemplate(
+    name='quote_email',
+    version=2,
+    model='gpt-4o-mini',
+    instructions='''
+You are a professional email writing assistant.
+
+Write a professional quotation request email. The sender is a potential customer requesting a price or quotation from the business described in the user message.
+
+Format the email clearly and politely.
+Tone: respectful, concise, customer-like.
+Start with a greeting ("Good day"/"Hello"), address the business by name, explain the need,
+include the sender's contact info, and end with thanks.
+''',
+    data='''
+Sender name: {user_name}
+Sender email: {user_email}
+
+Business receiving the request:
+- Name: {business_name}
+- Category: {category}
+
+Main user request:
+{message_body}
+''',
+))
@@ -1,4 +1,5 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.conf import settings
 from django.core.mail import send_mail
 from django.contrib import messages
@@ -9,7 +10,7 @@ from .utils import business_to_dict
 from .forms import BusinessForm
 
 # Import AI email generator
-from .openai_utils import generate_quote_email
+from .openai_utils import agenerate_quote_email
 
 
 def waste_exchange_view(request):
@@ -57,8 +58,8 @@ def business_detail(request, pk):
     })
 
 
-def request_quote(request, pk):
-    business = get_object_or_404(Business, pk=pk)
+async def request_quote(request, pk):
+    business = await aget_object_or_404(Business.objects.select_related("category"), pk=pk)
 
     if request.method == "POST":
         user_name = request.POST.get("name")
@@ -66,7 +67,7 @@ def request_quote(request, pk):
         message_body = request.POST.get("message")
 
         # Generate the email content using OpenAI
-        ai_email_body = generate_quote_email(
+        ai_email_body = await agenerate_quote_email(
             user_name=user_name,
             user_email=user_email,
             message_body=message_body,
@@ -76,7 +77,7 @@ def request_quote(request, pk):
         subject = f"Quotation Request from {user_name}"
 
         # Send the AI-generated email to the business
-        send_mail(
+        await sync_to_async(send_mail)(
             subject,
             ai_email_body,
             user_email,            # Sender: User requesting quote